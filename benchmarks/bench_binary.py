@@ -0,0 +1,41 @@
+"""Benchmark of the loading of a large generated swagger (about 6 MB of json by default)
+in json, yaml, msgpack and CBOR.
+
+Run it with::
+
+    python benchmarks/bench_binary.py [NB_DEFINITIONS]
+"""
+import io
+import logging
+import sys
+
+from bench_fingerprint import generate_swagger
+
+from oasapi.binary import BINARY_FORMATS, load_binary
+from oasapi.common import parse_swagger, write_swagger
+from oasapi.timer import Timer
+
+
+def main(nb_definitions=4000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    swagger = generate_swagger(nb_definitions)
+
+    for format in ["json", "yaml"] + BINARY_FORMATS:
+        stream = io.BytesIO()
+        text_stream = io.TextIOWrapper(stream, encoding="utf-8")
+        write_swagger(swagger, text_stream, format)
+        text_stream.flush()
+        content = stream.getvalue()
+        text_stream.detach()
+        logging.info(f"swagger of {len(content) / 2 ** 20:.1f} MB in {format}")
+
+        with Timer(f"load {format}"):
+            if format in BINARY_FORMATS:
+                loaded = load_binary(content)
+            else:
+                loaded = parse_swagger(content.decode("utf-8"))
+        assert loaded == swagger
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,36 @@
+"""Benchmark of the diff of two versions of a large generated swagger (about 20 MB of json by default)
+differing in a few lines.
+
+Run it with::
+
+    python benchmarks/bench_diff.py [NB_DEFINITIONS]
+"""
+import copy
+import logging
+import sys
+
+from bench_fingerprint import generate_swagger
+
+from oasapi import diff, fingerprint
+from oasapi.timer import Timer
+
+
+def main(nb_definitions=16000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    old = generate_swagger(nb_definitions)
+    new = copy.deepcopy(old)
+    new["definitions"]["Model10"]["properties"]["status"]["enum"].remove("sold")
+    new["paths"]["/models20/{id}"]["get"]["parameters"][0]["maximum"] = 100
+    del new["paths"]["/models30/{id}"]
+
+    with Timer("diff"):
+        changes = diff(old, new)
+    logging.info(f"{len(changes)} changes found")
+
+    old_tree, new_tree = fingerprint(old), fingerprint(new)
+    with Timer("diff of the fingerprints"):
+        diff(old_tree, new_tree)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,85 @@
+"""Benchmark of the events generated by oasapi.validate on a generated swagger with many invalid parameters.
+
+Run it with::
+
+    python benchmarks/bench_events.py [NB_ENDPOINTS]
+"""
+import logging
+import sys
+import tracemalloc
+
+from oasapi import validate
+from oasapi.timer import Timer
+from oasapi.validation import check_parameters, check_security
+
+
+def generate_swagger(nb_endpoints):
+    """Return a swagger with 10 invalid parameters per endpoint (each with a large enum)."""
+    enum = [f"value{i}" for i in range(50)] * 2
+    paths = {}
+    for i in range(nb_endpoints):
+        paths[f"/resource{i}"] = {
+            "parameters": [
+                {
+                    "name": f"param{j}",
+                    "in": "query",
+                    "type": "string",
+                    "format": "date",
+                    "required": True,
+                    "default": f"not a date {j}",
+                    "enum": enum,
+                }
+                for j in range(10)
+            ],
+            "get": {
+                "security": [{"oauth": ["unknown"]}],
+                "responses": {"200": {"$ref": "#/responses/unknown"}},
+            },
+        }
+
+    return {
+        "swagger": "2.0",
+        "info": {"title": "benchmark", "version": "v1.0"},
+        "paths": paths,
+        "securityDefinitions": {
+            "oauth": {
+                "type": "oauth2",
+                "flow": "implicit",
+                "authorizationUrl": "http://example.com",
+                "scopes": {"read": ""},
+            }
+        },
+    }
+
+
+def retained_memory(function, *args):
+    """Return the result of the function with the memory it retains (in bytes)"""
+    tracemalloc.start()
+    result = function(*args)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main(nb_endpoints=5000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    swagger = generate_swagger(nb_endpoints)
+
+    # the parameters and security checks are the ones generating most of the events
+    name = f"check {nb_endpoints * 10} invalid parameters"
+    with Timer(name):
+        check_parameters(swagger) | check_security(swagger)
+    events, memory = retained_memory(
+        lambda: check_parameters(swagger) | check_security(swagger)
+    )
+    logging.info(f"'{name}' retains {memory / 2 ** 20:.2f} MB for {len(events)} events")
+    with Timer(f"{name}, format the events reasons"):
+        for event in events:
+            str(event.reason)
+
+    with Timer(f"validate {nb_endpoints * 10} invalid parameters"):
+        validate(swagger)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,66 @@
+"""Benchmark of oasapi.filter on a generated swagger where most operations inherit the global security.
+
+Run it with::
+
+    python benchmarks/bench_filter.py [NB_ENDPOINTS]
+"""
+import logging
+import sys
+
+from oasapi import filter
+from oasapi.filter import FilterCondition
+from oasapi.timer import Timer, MemoryTracker
+
+
+def generate_swagger(nb_endpoints):
+    """Return a swagger with 4 operations per endpoint, 1 over 10 having its own security."""
+    verbs = ["get", "post", "put", "delete"]
+    paths = {}
+    for i in range(nb_endpoints):
+        paths[f"/resource{i}"] = {
+            verb: {
+                "tags": [f"tag{i % 20}"],
+                "responses": {"200": {"description": "OK"}},
+                **({"security": [{"oauth": ["read"]}]} if (i + j) % 10 == 0 else {}),
+            }
+            for j, verb in enumerate(verbs)
+        }
+
+    return {
+        "swagger": "2.0",
+        "info": {"title": "benchmark", "version": "v1.0"},
+        "paths": paths,
+        "securityDefinitions": {
+            "oauth": {
+                "type": "oauth2",
+                "flow": "implicit",
+                "authorizationUrl": "http://example.com",
+                "scopes": {"read": "", "write": ""},
+            }
+        },
+        "security": [{"oauth": ["read", "write"]}],
+    }
+
+
+def main(nb_endpoints=5000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    swagger = generate_swagger(nb_endpoints)
+
+    for label, conditions in [
+        ("global security not matching", [FilterCondition(security_scopes=["read"])]),
+        ("global security matching", [FilterCondition(security_scopes=["read", "write"])]),
+        (
+            "global security not matching + tags",
+            [FilterCondition(security_scopes=["read"], tags=["tag1", "tag2"])],
+        ),
+    ]:
+        for dry_run in [False, True]:
+            name = f"filter {nb_endpoints * 4} operations, {label}{' (dry run)' if dry_run else ''}"
+            with Timer(name):
+                filter(swagger, conditions=conditions, dry_run=dry_run)
+            with MemoryTracker(name):
+                filter(swagger, conditions=conditions, dry_run=dry_run)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,56 @@
+"""Benchmark of the time and memory used by oasapi.filter and oasapi.filter_stream on a large generated swagger
+written to a JSON file (about 70 MB by default).
+
+Run it with::
+
+    python benchmarks/bench_filter_stream.py [NB_ENDPOINTS]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from bench_filter import generate_swagger
+
+from oasapi import filter, filter_stream
+from oasapi.filter import FilterCondition
+from oasapi.timer import Timer, MemoryTracker
+
+
+def load_filter_dump(input_path, output_path, conditions):
+    """Filter the swagger loaded in memory"""
+    with open(input_path) as f:
+        swagger = json.load(f)
+    swagger, _ = filter(swagger, conditions=conditions)
+    with open(output_path, "w") as f:
+        f.write(json.dumps(swagger, indent=2))
+
+
+def stream(input_path, output_path, conditions):
+    """Filter the swagger streamed from/to the files"""
+    with open(input_path) as f, open(output_path, "w") as out:
+        for _ in filter_stream(f, out, conditions=conditions):
+            pass
+
+
+def main(nb_endpoints=100000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    conditions = [FilterCondition(security_scopes=["read"], tags=["tag1", "tag2"])]
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "swagger.json")
+        output_path = os.path.join(directory, "output.json")
+        with open(input_path, "w") as f:
+            json.dump(generate_swagger(nb_endpoints), f, indent=2)
+        logging.info(f"swagger of {os.path.getsize(input_path) / 2 ** 20:.1f} MB")
+
+        for name, function in [("load, filter and dump", load_filter_dump), ("filter_stream", stream)]:
+            with Timer(name):
+                function(input_path, output_path, conditions)
+            with MemoryTracker(name):
+                function(input_path, output_path, conditions)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
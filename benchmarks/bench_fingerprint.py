@@ -0,0 +1,84 @@
+"""Benchmark of the fingerprinting of a large generated swagger (about 20 MB of json by default).
+
+Run it with::
+
+    python benchmarks/bench_fingerprint.py [NB_DEFINITIONS]
+"""
+import json
+import logging
+import sys
+
+from oasapi import fingerprint
+from oasapi.common import spec_hash
+from oasapi.timer import Timer
+
+
+def generate_swagger(nb_definitions):
+    """Return a swagger with nb_definitions definitions of 10 properties and one operation per definition."""
+    definitions = {
+        f"Model{i}": {
+            "type": "object",
+            "description": f"The model {i}",
+            "required": ["id", "name"],
+            "properties": {
+                "id": {"type": "integer", "format": "int64"},
+                "name": {"type": "string"},
+                "created": {"type": "string", "format": "date-time"},
+                "status": {"type": "string", "enum": ["available", "pending", "sold"]},
+                "tags": {"type": "array", "items": {"type": "string"}},
+                **{f"field{j}": {"type": "string", "maxLength": 255} for j in range(5)},
+            },
+        }
+        for i in range(nb_definitions)
+    }
+    paths = {
+        f"/models{i}/{{id}}": {
+            "get": {
+                "operationId": f"getModel{i}",
+                "produces": ["application/json"],
+                "parameters": [{"name": "id", "in": "path", "required": True, "type": "integer"}],
+                "responses": {
+                    "200": {"description": "OK", "schema": {"$ref": f"#/definitions/{name}"}},
+                    "404": {"description": "Not found"},
+                },
+            }
+        }
+        for i, name in enumerate(definitions)
+    }
+    return {
+        "swagger": "2.0",
+        "info": {"title": "benchmark", "version": "v1.0"},
+        "paths": paths,
+        "definitions": definitions,
+    }
+
+
+def main(nb_definitions=16000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    swagger = generate_swagger(nb_definitions)
+    size = len(json.dumps(swagger, indent=2))
+    logging.info(f"swagger of {size / 2 ** 20:.1f} MB")
+
+    with Timer("spec_hash (hash of the whole swagger only)"):
+        spec_hash(swagger)
+
+    with Timer("fingerprint"):
+        tree = fingerprint(swagger)
+
+    with Timer("operations hashes"):
+        tree.operations()
+
+    with Timer("update after a local edit"):
+        swagger["definitions"]["Model0"]["description"] = "changed"
+        tree.update(("definitions", "Model0", "description"))
+
+    with Timer("update after 100 local edits"):
+        paths = []
+        for i in range(0, nb_definitions, nb_definitions // 100):
+            swagger["definitions"][f"Model{i}"]["description"] = "changed again"
+            paths.append(("definitions", f"Model{i}", "description"))
+        tree.update(*paths)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
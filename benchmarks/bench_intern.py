@@ -0,0 +1,75 @@
+"""Benchmark of the memory used by swaggers loaded with and without an Interner.
+
+Run it with::
+
+    python benchmarks/bench_intern.py [NB_SPECS] [NB_DEFINITIONS]
+"""
+import json
+import logging
+import sys
+import tracemalloc
+
+from oasapi.common import Interner, parse_swagger
+from oasapi.timer import Timer
+
+
+def generate_content(index, nb_definitions):
+    """Return the json content of a swagger with nb_definitions definitions of 10 properties."""
+    definitions = {
+        f"Model{index}_{i}": {
+            "type": "object",
+            "description": f"The model {i} of the api {index}",
+            "required": ["id", "name"],
+            "properties": {
+                "id": {"type": "integer", "format": "int64"},
+                "name": {"type": "string"},
+                "created": {"type": "string", "format": "date-time"},
+                "status": {"type": "string", "enum": ["available", "pending", "sold"]},
+                "tags": {"type": "array", "items": {"type": "string"}},
+                **{f"field{j}": {"type": "string", "maxLength": 255} for j in range(5)},
+            },
+        }
+        for i in range(nb_definitions)
+    }
+    paths = {
+        f"/models{i}": {
+            "get": {
+                "produces": ["application/json"],
+                "responses": {"200": {"description": "OK", "schema": {"$ref": f"#/definitions/{name}"}}},
+            }
+        }
+        for i, name in enumerate(definitions)
+    }
+    return json.dumps(
+        {
+            "swagger": "2.0",
+            "info": {"title": f"api {index}", "version": "v1.0"},
+            "paths": paths,
+            "definitions": definitions,
+        }
+    )
+
+
+def load_all(contents, interner):
+    """Return the memory retained (in bytes) by the swaggers parsed from the contents"""
+    tracemalloc.start()
+    swaggers = [parse_swagger(content, interner=interner) for content in contents]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del swaggers
+    return current
+
+
+def main(nb_specs=100, nb_definitions=50):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    contents = [generate_content(i, nb_definitions) for i in range(nb_specs)]
+
+    for label, interner_factory in [("not interned", lambda: None), ("interned", Interner)]:
+        name = f"load {nb_specs} swaggers of {nb_definitions} definitions, {label}"
+        with Timer(name):
+            memory = load_all(contents, interner_factory())
+        logging.info(f"'{name}' uses {memory / nb_specs / 1024:.1f} KB per swagger")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,81 @@
+"""Benchmark of the time, latency (time to the first write) and memory used to write a large generated swagger
+(about 20 MB of json by default) to a file, by serializing it as a single string or incrementally with
+oasapi.common.write_swagger.
+
+Run it with::
+
+    python benchmarks/bench_output.py [NB_DEFINITIONS]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+from bench_fingerprint import generate_swagger
+
+from oasapi.common import write_swagger
+from oasapi.timer import Timer, MemoryTracker
+
+
+class LatencyFile:
+    """File recording the time of its first write"""
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+        self.start = time.perf_counter()
+        self.first_write = None
+
+    def write(self, content):
+        if self.first_write is None:
+            self.first_write = time.perf_counter() - self.start
+        return self.file.write(content)
+
+    def close(self):
+        self.file.close()
+
+
+def json_dumps(swagger, output):
+    output.write(json.dumps(swagger, indent=2))
+
+
+def yaml_dump(swagger, output):
+    yaml.dump(swagger, output, sort_keys=False)
+
+
+def write_json(swagger, output):
+    write_swagger(swagger, output, "json")
+
+
+def write_yaml(swagger, output):
+    write_swagger(swagger, output, "yaml")
+
+
+def main(nb_definitions=16000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    swagger = generate_swagger(nb_definitions)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "output")
+        for name, function in [
+            ("json.dumps", json_dumps),
+            ("write_swagger json", write_json),
+            ("yaml.dump", yaml_dump),
+            ("write_swagger yaml", write_yaml),
+        ]:
+            output = LatencyFile(path)
+            with Timer(name):
+                function(swagger, output)
+            output.close()
+            logging.info(f"'{name}' first write after {output.first_write:.2f} seconds")
+            output = LatencyFile(path)
+            with MemoryTracker(name):
+                function(swagger, output)
+            output.close()
+            logging.info(f"'{name}' wrote {os.path.getsize(path) / 2 ** 20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,37 @@
+"""Benchmark of the parsing of a large generated swagger in yaml (about 4 MB by default)
+without and with the on-disk cache of the parsed swaggers.
+
+Run it with::
+
+    python benchmarks/bench_parse_cache.py [NB_DEFINITIONS]
+"""
+import logging
+import sys
+import tempfile
+
+import yaml
+from bench_fingerprint import generate_swagger
+
+from oasapi.cache import ParseCache
+from oasapi.common import parse_swagger
+from oasapi.timer import Timer
+
+
+def main(nb_definitions=4000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    content = yaml.dump(generate_swagger(nb_definitions), sort_keys=False)
+    logging.info(f"swagger of {len(content) / 2 ** 20:.1f} MB of yaml")
+
+    with Timer("parse_swagger"):
+        swagger = parse_swagger(content)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ParseCache(directory)
+        with Timer("ParseCache.parse (cold)"):
+            cache.parse(content)
+        with Timer("ParseCache.parse (warm)"):
+            assert cache.parse(content) == swagger
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,76 @@
+"""Benchmark of oasapi.prune on a generated swagger with many endpoints, definitions and tags.
+
+Run it with::
+
+    python benchmarks/bench_prune.py [NB_ENDPOINTS]
+"""
+import logging
+import sys
+
+from oasapi import prune
+from oasapi.timer import Timer, MemoryTracker
+
+
+def generate_swagger(nb_endpoints):
+    """Return a swagger with 2 operations per endpoint, each endpoint using one definition
+    (referring to another definition) and with 1 over 5 definitions not used."""
+    paths = {}
+    definitions = {}
+    for i in range(nb_endpoints):
+        ref = {"$ref": f"#/definitions/Model{i}"}
+        paths[f"/resource{i}"] = {
+            "get": {
+                "tags": [f"tag{i % 50}"],
+                "security": [{"oauth": ["read"]}],
+                "responses": {"200": {"description": "OK", "schema": ref}},
+            },
+            "put": {
+                "tags": [f"tag{i % 50}"],
+                "security": [{"oauth": ["write"]}],
+                "parameters": [{"name": "body", "in": "body", "schema": ref}],
+                "responses": {"204": {"description": "Updated"}},
+            },
+        }
+        definitions[f"Model{i}"] = {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "child": {"$ref": f"#/definitions/Child{i}"},
+            },
+        }
+        definitions[f"Child{i}"] = {"type": "object", "properties": {"name": {"type": "string"}}}
+        if i % 5 == 0:
+            definitions[f"Unused{i}"] = {"type": "string"}
+
+    return {
+        "swagger": "2.0",
+        "info": {"title": "benchmark", "version": "v1.0"},
+        "tags": [{"name": f"tag{i}"} for i in range(100)],
+        "paths": paths,
+        "definitions": definitions,
+        "securityDefinitions": {
+            "oauth": {
+                "type": "oauth2",
+                "flow": "implicit",
+                "authorizationUrl": "http://example.com",
+                "scopes": {"read": "", "write": "", "admin": ""},
+            },
+            "basic": {"type": "basic"},
+        },
+    }
+
+
+def main(nb_endpoints=5000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    swagger = generate_swagger(nb_endpoints)
+
+    for dry_run in [False, True]:
+        name = f"prune {nb_endpoints} endpoints{' (dry run)' if dry_run else ''}"
+        with Timer(name):
+            prune(swagger, dry_run=dry_run)
+        with MemoryTracker(name):
+            prune(swagger, dry_run=dry_run)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
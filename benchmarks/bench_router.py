@@ -0,0 +1,93 @@
+"""Benchmark of the matching of requests to the operations of a generated swagger with 10k routes, with the radix
+tree of oasapi.router or by trying the regexps of the path templates one after the other.
+
+Run it with::
+
+    python benchmarks/bench_router.py [NB_ROUTES] [NB_REQUESTS]
+"""
+import logging
+import random
+import re
+import sys
+
+from oasapi.common import OPERATIONS_LOWER
+from oasapi.router import compile, PARAMETER_RE
+from oasapi.timer import Timer
+
+
+def generate_swagger(nb_routes):
+    """Return a swagger with nb_routes operations on path templates with literal and parameter segments"""
+    paths = {}
+    nb_resources = max(nb_routes // 10, 1)
+    for i in range(nb_resources):
+        resource = f"/resources{i}"
+        for endpoint in [
+            resource,
+            f"{resource}/{{id}}",
+            f"{resource}/{{id}}/items",
+            f"{resource}/{{id}}/items/{{itemId}}",
+            f"{resource}/{{id}}/files/{{name}}.json",
+        ]:
+            paths[endpoint] = {
+                verb: {"operationId": f"{verb}{endpoint}", "responses": {"200": {"description": "ok"}}}
+                for verb in ["get", "put"]
+            }
+    return {"swagger": "2.0", "basePath": "/api", "paths": paths}
+
+
+def compile_linear(swagger):
+    """Return the list of (regexp, endpoint, names) of the path templates (the naive matcher)"""
+    routes = []
+    for endpoint in swagger["paths"]:
+        pattern = "".join(
+            "([^/]+)" if i % 2 else re.escape(part)
+            for i, part in enumerate(PARAMETER_RE.split(swagger["basePath"] + endpoint))
+        )
+        routes.append((re.compile(pattern), endpoint, PARAMETER_RE.findall(endpoint)))
+    return routes
+
+
+def match_linear(swagger, routes, verb, path):
+    """Return the operation and the path parameters of the first path template matching the request"""
+    verb = verb.lower()
+    for regex, endpoint, names in routes:
+        match = regex.fullmatch(path)
+        if match is not None and verb in swagger["paths"][endpoint]:
+            return swagger["paths"][endpoint][verb], dict(zip(names, match.groups()))
+    return None
+
+
+def generate_requests(swagger, nb_requests):
+    """Return random requests (verb, path) on the operations of the swagger"""
+    rnd = random.Random(0)
+    endpoints = list(swagger["paths"])
+    requests = []
+    for _ in range(nb_requests):
+        endpoint = rnd.choice(endpoints)
+        verb = rnd.choice([verb for verb in OPERATIONS_LOWER if verb in swagger["paths"][endpoint]])
+        path = PARAMETER_RE.sub(lambda m: str(rnd.randrange(1000)), endpoint)
+        requests.append((verb.upper(), swagger["basePath"] + path))
+    return requests
+
+
+def main(nb_routes=10000, nb_requests=2000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    swagger = generate_swagger(nb_routes)
+    requests = generate_requests(swagger, nb_requests)
+    logging.info(f"{sum(len(value) for value in swagger['paths'].values())} routes, {len(requests)} requests")
+
+    with Timer("compile router"):
+        router = compile(swagger)
+    with Timer("compile regexps"):
+        routes = compile_linear(swagger)
+
+    with Timer("match router"):
+        matches = [router.match(verb, path) for verb, path in requests]
+    with Timer("match regexps"):
+        linear_matches = [match_linear(swagger, routes, verb, path) for verb, path in requests]
+
+    assert [(m.operation, m.path_parameters) for m in matches] == linear_matches
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
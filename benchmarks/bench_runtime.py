@@ -0,0 +1,86 @@
+"""Benchmark of the number of requests validated per second by the validators of oasapi.runtime
+(compiled once per operation) on the petstore swagger, compared to checking the requests
+by looking up and resolving the parameters of the operation at each request.
+
+Run it with::
+
+    python benchmarks/bench_runtime.py [NB_REQUESTS]
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+from oasapi.common import load_file
+from oasapi.runtime import (
+    compile_request_validator,
+    _compile_check,
+    _operation_parameters,
+    _InvalidValue,
+)
+from oasapi.timer import Timer
+
+SWAGGER_PETSTORE = Path(__file__).parent.parent / "docs" / "samples" / "swagger_petstore.json"
+
+# requests (endpoint, verb, path, query, headers, body) on the petstore
+REQUESTS = [
+    ("/pet/findByStatus", "get", {}, {"status": "available,sold"}, {}, None),
+    ("/pet/{petId}", "get", {"petId": "42"}, {}, {}, None),
+    ("/pet/{petId}", "delete", {"petId": "42"}, {}, {"api_key": "secret"}, None),
+    ("/store/order/{orderId}", "get", {"orderId": "x"}, {}, {}, None),
+    ("/user/login", "get", {}, {"username": "john", "password": "doe"}, {}, None),
+    ("/pet", "post", {}, {}, {}, {"name": "rex", "photoUrls": ["http://rex"]}),
+]
+
+
+def validate_uncompiled(swagger, endpoint, verb, path, query, headers, body):
+    """Check the parameters of the request, resolving and compiling them at each request"""
+    sources = {"path": path, "query": query, "header": headers}
+    errors = []
+    for (name, location), (param_path, param) in _operation_parameters(
+        swagger, endpoint, verb
+    ).items():
+        if location in sources and name in sources[location]:
+            try:
+                _compile_check(param)(sources[location][name])
+            except _InvalidValue as e:
+                errors.append(e.reason)
+    return errors
+
+
+def main(nb_requests=100000):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    swagger = load_file(SWAGGER_PETSTORE)
+
+    with Timer("compile validators"):
+        validators = compile_request_validator(swagger)
+    logging.info(f"{len(validators)} operations")
+
+    for name, requests in [
+        ("parameters", [request for request in REQUESTS if request[-1] is None]),
+        ("parameters and body", REQUESTS),
+    ]:
+        start = time.perf_counter()
+        for i in range(nb_requests):
+            endpoint, verb, path, query, headers, body = requests[i % len(requests)]
+            validators[endpoint, verb](path=path, query=query, headers=headers, body=body)
+        duration = time.perf_counter() - start
+        logging.info(
+            f"compiled validators ({name}): {nb_requests / duration:,.0f} requests per second "
+            f"({duration / nb_requests * 1e6:.1f} us per request)"
+        )
+
+    requests = [request for request in REQUESTS if request[-1] is None]
+    start = time.perf_counter()
+    for i in range(nb_requests):
+        validate_uncompiled(swagger, *requests[i % len(requests)])
+    duration = time.perf_counter() - start
+    logging.info(
+        f"uncompiled checks (parameters): {nb_requests / duration:,.0f} requests per second "
+        f"({duration / nb_requests * 1e6:.1f} us per request)"
+    )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
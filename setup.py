@@ -73,6 +73,9 @@ setup(
         # eg:
         #   'rst': ['docutils>=0.11'],
         #   ':python_version=="2.6"': ['argparse'],
+        "zstd": ["zstandard"],
+        "msgpack": ["msgpack"],
+        "cbor": ["cbor2"],
     },
     entry_points={"console_scripts": ["oasapi = oasapi.cli:main"]},
 )
@@ -2,6 +2,23 @@ __version__ = "0.1.17"
 
 from .prune import prune
 from .validation import validate
-from .filter import filter
+from .filter import filter, filter_stream
+from .bundle import bundle
+from .dereference import dereference
+from .dedupe import dedupe
+from .fleet import fleet_check
+from .fingerprint import fingerprint
+from .diff import diff
 
-__all__ = ["validate", "prune", "filter"]
+__all__ = [
+    "validate",
+    "prune",
+    "filter",
+    "filter_stream",
+    "bundle",
+    "dereference",
+    "dedupe",
+    "fleet_check",
+    "fingerprint",
+    "diff",
+]
@@ -0,0 +1,73 @@
+"""Compact binary formats of the swaggers (msgpack and CBOR), faster to load than json or yaml"""
+from typing import BinaryIO, Dict, Optional
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+#: the binary formats supported (as the extensions of the files)
+BINARY_FORMATS = ["msgpack", "cbor"]
+
+# tag starting a self-described CBOR document (RFC 8949)
+CBOR_SELF_DESCRIBE = b"\xd9\xd9\xf7"
+
+
+def _module(format: str):
+    """Return the module (an optional dependency) implementing the binary format"""
+    module = {"msgpack": msgpack, "cbor": cbor2}[format]
+    if module is None:
+        raise ImportError(
+            f"the {'cbor2' if format == 'cbor' else format} package is required for {format} swaggers "
+            f"(pip install oasapi[{format}])"
+        )
+    return module
+
+
+def detect_binary_format(content: bytes) -> Optional[str]:
+    """Return the binary format of the content of a swagger (None if it is not a binary format).
+
+    The first byte of a map in msgpack or CBOR is never the first byte of a json/yaml text in utf-8."""
+    if content.startswith(CBOR_SELF_DESCRIBE):
+        return "cbor"
+    first = content[:1]
+    if b"\x80" <= first <= b"\x8f" or first in {b"\xde", b"\xdf"}:
+        return "msgpack"
+    if b"\xa0" <= first <= b"\xbf" or first == b"\xd8":
+        return "cbor"
+    return None
+
+
+def dump_binary(swagger: Dict, stream: BinaryIO, format: str):
+    """Write the swagger to the binary stream in the binary format.
+
+    The keys are kept as is (e.g. integer response codes). The objects shared in the swagger (e.g. the leaf
+    objects of an interned swagger) are written at each of their locations so that the loaded swagger has
+    no aliasing."""
+    if format == "msgpack":
+        stream.write(_module(format).packb(swagger, use_bin_type=True))
+    elif format == "cbor":
+        stream.write(CBOR_SELF_DESCRIBE)
+        _module(format).dump(swagger, stream)
+    else:
+        raise ValueError(f"unknown binary format '{format}' (should be one of {BINARY_FORMATS})")
+
+
+def load_binary(content: bytes, format: str = None) -> Dict:
+    """Load a swagger from its content in a binary format (detected from the content if not given)"""
+    format = format or detect_binary_format(content)
+    if format == "msgpack":
+        return _module(format).unpackb(content, raw=False, strict_map_key=False)
+    elif format == "cbor":
+        if content.startswith(CBOR_SELF_DESCRIBE):
+            # decode the document itself (cbor2 decodes the content of a tag as immutable objects)
+            start = len(CBOR_SELF_DESCRIBE)
+            content = content[start:]
+        return _module(format).loads(content)
+    else:
+        raise ValueError(f"unknown binary format '{format}' (should be one of {BINARY_FORMATS})")
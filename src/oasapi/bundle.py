@@ -0,0 +1,269 @@
+"""Bundling of a swagger split across several files in a single swagger"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Tuple, List, Union
+
+from oasapi.common import REFERENCE_SECTIONS, load_file, copy_swagger
+from oasapi.events import (
+    Event,
+    ExternalReferenceBundledBundleAction,
+    ExternalReferenceInlinedBundleAction,
+    ExternalReferenceNotFoundBundleError,
+    ExternalReferenceCycleBundleError,
+)
+
+
+class DocumentCache:
+    """A thread safe cache of the documents (json/yaml files) parsed, keyed by their path and modification time.
+
+    A document is parsed again only if its file has been modified since it was parsed.
+    The documents returned are shared and must not be modified.
+    """
+
+    def __init__(self):
+        # resolved path -> (mtime, document)
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: Union[str, Path]) -> Dict:
+        """Return the document parsed from the file path"""
+        path = Path(path).resolve()
+        mtime = path.stat().st_mtime_ns
+
+        with self._lock:
+            cached = self._documents.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        document = load_file(path)
+        with self._lock:
+            self._documents[path] = (mtime, document)
+        return document
+
+    def clear(self):
+        """Remove all documents from the cache"""
+        with self._lock:
+            self._documents.clear()
+
+
+#: the cache of documents shared by default by all bundlings
+document_cache = DocumentCache()
+
+
+def split_reference(reference: str) -> Tuple[str, Tuple[str, ...]]:
+    """Split a reference like 'file.yaml#/section/item' in its file part and its pointer as a tuple"""
+    file, _, pointer = reference.partition("#")
+    pointer = tuple(
+        part.replace("~1", "/").replace("~0", "~") for part in pointer.split("/")[1:]
+    )
+    return file, pointer
+
+
+class _Bundler:
+    def __init__(self, swagger: Dict, base_path: Path, cache: DocumentCache, executor):
+        self.swagger = swagger
+        self.base_path = base_path
+        self.cache = cache
+        self.executor = executor
+        self.events = []
+        # (file, section, item) -> local reference of the item bundled in the swagger
+        self.bundled = {}
+        # (section, name) of the items bundled in the swagger (processed relatively to their own file)
+        self.bundled_items = set()
+        # (file, pointer) being inlined (to detect cycles)
+        self.inlining = []
+
+    def run(self):
+        self.prefetch(self.swagger, self.base_path)
+        self.process(self.swagger, self.base_path, ())
+
+    def external_files(self, o, document_path: Path, files: set):
+        """Add to files the files referred to by the external references in o"""
+        if isinstance(o, dict):
+            for key, value in o.items():
+                if key == "$ref" and isinstance(value, str):
+                    file, _ = split_reference(value)
+                    if file and "://" not in file:
+                        files.add(document_path.parent / file)
+                else:
+                    self.external_files(value, document_path, files)
+        elif isinstance(o, list):
+            for value in o:
+                self.external_files(value, document_path, files)
+
+    def prefetch(self, o, document_path: Path):
+        """Load concurrently in the cache the files referred to by the external references in o"""
+        files = set()
+        self.external_files(o, document_path, files)
+        files = [file for file in files if file.is_file()]
+        if len(files) > 1:
+            for _ in self.executor.map(self.try_load, files):
+                pass
+
+    def try_load(self, file: Path):
+        try:
+            return self.cache.load(file)
+        except (OSError, ValueError):
+            # the error will be reported when resolving the reference
+            return None
+
+    def resolve(self, file: Path, pointer: Tuple[str, ...]):
+        """Return the object at the pointer in the file (raise KeyError if it does not exist)"""
+        try:
+            o = self.cache.load(file)
+        except (OSError, ValueError) as e:
+            raise KeyError(str(e))
+
+        for part in pointer:
+            if isinstance(o, list):
+                try:
+                    o = o[int(part)]
+                except (ValueError, IndexError):
+                    raise KeyError(part)
+            else:
+                o = o[part]
+        return o
+
+    def local_name(self, section: str, item: str, file: Path, content) -> str:
+        """Return a name for the item not used yet in the section (unless with the same content)"""
+        items = self.swagger.setdefault(section, {})
+        name = item
+        i = 1
+        while name in items and items[name] != content:
+            name = f"{file.stem}_{item}" if i == 1 else f"{file.stem}_{item}_{i}"
+            i += 1
+        return name
+
+    def process(self, o, document_path: Path, path: Tuple):
+        """Bundle (in place) the external references in o coming from the document at document_path
+
+        Return the object o or, if o is a reference to be inlined, the object inlined."""
+        if isinstance(o, dict):
+            reference = o.get("$ref")
+            if isinstance(reference, str):
+                return self.process_reference(o, reference, document_path, path)
+
+            # iterate on a copy as bundled items may be added to o (if o is the swagger or a section)
+            for key, value in list(o.items()):
+                if len(path) == 1 and (path[0], key) in self.bundled_items:
+                    # item bundled (and already processed) while processing another part of the swagger
+                    continue
+                o[key] = self.process(value, document_path, path + (key,))
+        elif isinstance(o, list):
+            for i, value in enumerate(o):
+                o[i] = self.process(value, document_path, path + (i,))
+        return o
+
+    def process_reference(self, o: Dict, reference: str, document_path: Path, path: Tuple):
+        file, pointer = split_reference(reference)
+        if "://" in file or (not file and document_path == self.base_path):
+            # remote references and local references of the swagger are kept as is
+            return o
+
+        file = (document_path.parent / file) if file else document_path
+
+        if len(pointer) == 2 and pointer[0] in REFERENCE_SECTIONS:
+            # reference to a global item, bundle it in the same section of the swagger
+            section, item = pointer
+            key = (file.resolve(), section, item)
+            local_reference = self.bundled.get(key)
+            if local_reference is None:
+                try:
+                    content = copy_swagger(self.resolve(file, pointer))
+                except KeyError:
+                    return self.not_found(o, reference, path)
+
+                name = self.local_name(section, item, file, content)
+                local_reference = self.bundled[key] = f"#/{section}/{name}"
+                if name in self.swagger[section]:
+                    # the same item is already in the swagger
+                    o["$ref"] = local_reference
+                    return o
+                self.bundled_items.add((section, name))
+                self.swagger[section][name] = content
+                self.events.append(
+                    ExternalReferenceBundledBundleAction(
+                        path=path,
+                        reason=f"reference '{reference}' bundled as '{local_reference}'",
+                    )
+                )
+                self.prefetch(content, file)
+                self.swagger[section][name] = self.process(content, file, (section, name))
+
+            o["$ref"] = local_reference
+            return o
+
+        # reference to another object, inline it
+        key = (file.resolve(), pointer)
+        if key in self.inlining:
+            self.events.append(
+                ExternalReferenceCycleBundleError(
+                    path=path, reason=f"reference '{reference}' refers to itself"
+                )
+            )
+            return o
+
+        try:
+            content = copy_swagger(self.resolve(file, pointer))
+        except KeyError:
+            return self.not_found(o, reference, path)
+
+        self.events.append(
+            ExternalReferenceInlinedBundleAction(
+                path=path, reason=f"reference '{reference}' inlined"
+            )
+        )
+        self.inlining.append(key)
+        self.prefetch(content, file)
+        content = self.process(content, file, path)
+        self.inlining.pop()
+        return content
+
+    def not_found(self, o, reference, path):
+        self.events.append(
+            ExternalReferenceNotFoundBundleError(
+                path=path, reason=f"reference '{reference}' could not be resolved"
+            )
+        )
+        return o
+
+
+def bundle(
+    swagger: Dict, path: Union[str, Path] = None, cache: DocumentCache = None, max_workers=8
+) -> Tuple[Dict, List[Event]]:
+    """
+    Bundle a swagger split across several files in a single swagger.
+
+    The external references (e.g. ``./common/errors.yaml#/definitions/Error``) are resolved relatively
+    to the file of the document using them:
+
+    - the references to a global definition/response/parameter are bundled in the same section of
+      the swagger (renamed with the name of its file if the name is already used) and rewritten as
+      local references (e.g. ``#/definitions/Error``)
+    - the other references (e.g. to a whole file) are replaced by the object they refer to
+
+    The references in the objects bundled are themselves bundled. Remote references (URLs) are kept as is.
+
+    The files are parsed once in the cache (by default, a cache shared by all bundlings)
+    and the files referred to by a document are loaded concurrently.
+
+    :param swagger: the swagger spec
+    :param path: the path of the swagger file (the current directory is used if not given)
+    :param cache: the cache of the parsed files
+    :param max_workers: the maximum number of files loaded concurrently
+    :return: bundled swagger, a list of events
+    """
+    swagger = copy_swagger(swagger)
+    base_path = Path(path) if path is not None else Path.cwd() / "swagger"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        bundler = _Bundler(
+            swagger,
+            base_path=base_path,
+            cache=document_cache if cache is None else cache,
+            executor=executor,
+        )
+        bundler.run()
+
+    return swagger, bundler.events
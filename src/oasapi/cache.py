@@ -0,0 +1,340 @@
+"""Memoization of the filtering of swaggers and on-disk caches of the swaggers downloaded over HTTP
+and of the parsed swaggers"""
+import hashlib
+import json
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Tuple, Hashable, Any
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from attr import dataclass
+
+from oasapi.common import spec_hash, parse_swagger, Interner
+from oasapi.events import FilterAction
+from oasapi.filter import FilterCondition, filter
+
+
+@dataclass
+class CacheStats:
+    """Statistics of use of a cache"""
+
+    #: number of lookups that found a (non expired) value in the cache
+    hits: int = 0
+    #: number of lookups that did not find a (non expired) value in the cache
+    misses: int = 0
+    #: number of values removed from the cache as it was full
+    evictions: int = 0
+    #: number of values removed from the cache as they were too old
+    expirations: int = 0
+    #: number of hits confirmed by the origin server (HTTP 304 Not Modified)
+    revalidations: int = 0
+
+
+class LRUCache:
+    """A cache keeping at most maxsize values, evicting the least recently used one when full.
+
+    If ttl is given, the values older than ttl seconds are considered as missing.
+    """
+
+    _missing = object()
+
+    def __init__(self, maxsize: int = 128, ttl: float = None, timer=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError(f"The maxsize of the cache should be positive (got {maxsize}).")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.stats = CacheStats()
+        # key -> (time of insertion, value), ordered from the least to the most recently used
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable):
+        return self.get(key, self._missing, _count=False) is not self._missing
+
+    def get(self, key: Hashable, default=None, *, _count=True):
+        """Return the value for key (marking it as recently used) or default if missing."""
+        entry = self._data.get(key)
+        if entry is not None:
+            inserted, value = entry
+            if self.ttl is None or self.timer() - inserted < self.ttl:
+                self._data.move_to_end(key)
+                if _count:
+                    self.stats.hits += 1
+                return value
+
+            # the value is too old, remove it
+            del self._data[key]
+            self.stats.expirations += 1
+
+        if _count:
+            self.stats.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any):
+        """Store the value for key, evicting the least recently used value if the cache is full."""
+        self._data[key] = (self.timer(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self):
+        """Remove all values from the cache (the statistics are kept)."""
+        self._data.clear()
+
+
+class FilterCache:
+    """Memoize the results of :py:meth:`oasapi.filter` keyed by the content of the swagger and the conditions.
+
+    The swagger and actions returned are shared between the calls with the same arguments and must not be
+    modified.
+
+    To avoid hashing the swagger on each call, its hash (as returned by :py:func:`oasapi.common.spec_hash`)
+    can be given through swagger_hash.
+
+    The cache can be used by several threads (the swaggers are filtered concurrently).
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = None, timer=time.monotonic):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> CacheStats:
+        """The hits/misses/evictions statistics of the cache"""
+        return self._cache.stats
+
+    @staticmethod
+    def key(swagger_hash: str, mode: str, conditions: List[FilterCondition]) -> Tuple:
+        """Return the key of the cache for a call to filter"""
+        return (
+            swagger_hash,
+            mode,
+            None if conditions is None else tuple(condition.key() for condition in conditions),
+        )
+
+    def filter(
+        self,
+        swagger: Dict,
+        mode="keep_only",
+        conditions: List[FilterCondition] = None,
+        swagger_hash: str = None,
+    ) -> Tuple[Dict, List[FilterAction]]:
+        """Filter the swagger like :py:meth:`oasapi.filter` or return the result memoized for the same arguments."""
+        if swagger_hash is None:
+            swagger_hash = spec_hash(swagger)
+
+        key = self.key(swagger_hash, mode, conditions)
+        with self._lock:
+            result = self._cache.get(key)
+        if result is None:
+            result = filter(swagger, mode=mode, conditions=conditions)
+            with self._lock:
+                self._cache.set(key, result)
+
+        return result
+
+    def clear(self):
+        """Remove all memoized results."""
+        self._cache.clear()
+
+
+def _write_atomically(path: Path, data: bytes):
+    """Write the data to the path through a temporary file with a unique name, replaced atomically
+    (the caches may be shared by concurrent threads and processes)"""
+    with tempfile.NamedTemporaryFile(
+        dir=str(path.parent), prefix=f"{path.name}.", suffix=".tmp", delete=False
+    ) as f:
+        tmp_path = f.name
+        try:
+            f.write(data)
+        except BaseException:
+            f.close()
+            os.remove(tmp_path)
+            raise
+    try:
+        os.replace(tmp_path, str(path))
+    except OSError:
+        os.remove(tmp_path)
+        raise
+
+
+class HttpCache:
+    """On-disk cache of the documents downloaded over HTTP(S).
+
+    The body of each url is stored in the directory with its ETag/Last-Modified headers (in the same file,
+    a first line of json followed by the body) and is revalidated on each fetch with a conditional request
+    (If-None-Match/If-Modified-Since), so that an unchanged document is not downloaded again.
+    In offline mode, the cached body is returned without any request.
+    """
+
+    def __init__(self, directory, offline: bool = False):
+        self.directory = Path(directory)
+        self.offline = offline
+        self.stats = CacheStats()
+        # the urls may be fetched concurrently by several threads
+        self._lock = threading.Lock()
+
+    def _count(self, *counters: str):
+        """Increment the counters of the statistics"""
+        with self._lock:
+            for counter in counters:
+                setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    def _path(self, url: str) -> Path:
+        """Return the path of the entry (metadata with the url and validators, and body) of the url"""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.entry"
+
+    def fetch(self, url: str, opener=urlopen) -> bytes:
+        """Return the body of the document at the url, from the cache if it is still valid.
+
+        The requests are sent with the opener (urlopen or e.g. :py:meth:`oasapi.fetch.Fetcher.open`).
+        Raise a LookupError in offline mode if the url is not in the cache.
+        """
+        path = self._path(url)
+        try:
+            header, _, body = path.read_bytes().partition(b"\n")
+            metadata = json.loads(header.decode("utf-8"))
+        except (OSError, ValueError):
+            metadata, body = {}, None
+
+        if self.offline:
+            if body is None:
+                self._count("misses")
+                raise LookupError(f"'{url}' is not in the cache '{self.directory}' (offline mode)")
+            self._count("hits")
+            return body
+
+        request = Request(url)
+        if body is not None:
+            if metadata.get("etag"):
+                request.add_header("If-None-Match", metadata["etag"])
+            if metadata.get("last_modified"):
+                request.add_header("If-Modified-Since", metadata["last_modified"])
+
+        try:
+            response = opener(request)
+        except HTTPError as err:
+            if err.code == 304 and body is not None:
+                self._count("hits", "revalidations")
+                return body
+            raise
+
+        with response:
+            body = response.read()
+            metadata = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+        self._count("misses")
+
+        # the validators are written with the body (never paired with another body)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomically(path, json.dumps(metadata).encode("utf-8") + b"\n" + body)
+        return body
+
+
+class ParseCache:
+    """On-disk cache of the parsed swaggers, to skip the (slow) parsing of the swaggers already parsed.
+
+    The swaggers are stored in the directory in the marshal format (fast to load) keyed by the hash of their
+    content (and the version of python, as the marshal format depends on it): a changed content is never served
+    from the cache. When the files of the cache exceed max_size bytes, the least recently used ones are removed.
+    """
+
+    _missing = object()
+
+    def __init__(self, directory, max_size: int = 2 ** 28):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._version = f"py{sys.version_info[0]}{sys.version_info[1]}-{marshal.version}"
+        # the swaggers may be parsed concurrently by several threads
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str, increment: int = 1):
+        """Increment the counter of the statistics"""
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + increment)
+
+    def _path(self, content: str) -> Path:
+        key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.{self._version}.marshal"
+
+    def parse(self, content: str, interner: Interner = None):
+        """Parse the content like :py:func:`oasapi.common.parse_swagger` or return the swagger cached for it"""
+        path = self._path(content)
+        try:
+            swagger = marshal.loads(path.read_bytes())
+        except FileNotFoundError:
+            swagger = self._missing
+        except (OSError, EOFError, ValueError, TypeError):
+            # corrupted file, parse the content again
+            swagger = self._missing
+            try:
+                path.unlink()
+            except OSError:
+                # already removed (or replaced) by a concurrent thread or process
+                pass
+        else:
+            # mark the file as recently used
+            try:
+                os.utime(str(path))
+            except OSError:
+                # evicted by a concurrent thread or process
+                pass
+            self._count("hits")
+
+        if swagger is self._missing:
+            self._count("misses")
+            swagger = parse_swagger(content)
+            try:
+                data = marshal.dumps(swagger)
+            except ValueError:
+                # the swagger contains objects not supported by marshal (e.g. dates in yaml), do not cache it
+                pass
+            else:
+                self._store(path, data)
+
+        if interner is not None:
+            swagger = interner(swagger)
+
+        return swagger
+
+    def _store(self, path: Path, data: bytes):
+        """Write atomically the data to the path and evict the least recently used files if the cache is too large"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomically(path, data)
+
+        entries = []
+        for entry in os.scandir(str(self.directory)):
+            if entry.name.endswith(".marshal"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # removed by a concurrent thread or process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                # already removed by a concurrent process
+                pass
+            total_size -= size
+            self._count("evictions")
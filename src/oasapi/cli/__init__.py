@@ -1,3 +1,29 @@
-from .cli import main, validate, prune, filter
+from .cli import (
+    main,
+    validate,
+    prune,
+    filter,
+    filter_stream,
+    bundle,
+    flatten,
+    dedupe,
+    serve,
+    fleet_check,
+    fingerprint,
+    diff,
+)
 
-__all__ = ["main", "validate", "prune", "filter"]
+__all__ = [
+    "main",
+    "validate",
+    "prune",
+    "filter",
+    "filter_stream",
+    "bundle",
+    "flatten",
+    "dedupe",
+    "serve",
+    "fleet_check",
+    "fingerprint",
+    "diff",
+]
@@ -20,11 +20,39 @@ import sys
 from typing import List
 
 import click
-import yaml
 
 import oasapi
+from oasapi.cache import HttpCache, ParseCache
+from oasapi.common import write_swagger
 from oasapi.filter import FilterCondition
-from .common import CliOasapiCommand, SwaggerFileURL, validate_json_yaml_filename
+from oasapi.server import make_server
+from oasapi.timer import MemoryTracker
+from .common import (
+    HTTP_CACHE_KEY,
+    PARSE_CACHE_KEY,
+    CliOasapiCommand,
+    SwaggerFileURL,
+    validate_json_yaml_filename,
+    open_compressed_output,
+    open_decompressed_input,
+    compile_template,
+    action_sort_key,
+)
+from .formats import WRITERS
+
+
+def dereference_tracking_memory(swagger, no_shared, memory):
+    """Dereference the swagger, reporting the peak of memory allocated if memory is True"""
+    if not memory:
+        return oasapi.dereference(swagger, shared=not no_shared)
+
+    with MemoryTracker("flatten") as tracker:
+        result = oasapi.dereference(swagger, shared=not no_shared)
+    click.secho(
+        f"Peak memory allocated while flattening: {tracker.peak / 2 ** 20:.2f} MB", err=True
+    )
+    return result
+
 
 commands = [
     CliOasapiCommand(
@@ -38,6 +66,7 @@ commands = [
         action_item="- {action.type} @ '{action.format_path(action.path)}' -> {action.reason}",
         description="Prune from the SWAGGER unused global definitions/responses/parameters, "
         "unused securityDefinition/scopes, unused tags and unused paths.",
+        report_only=True,
     ),
     CliOasapiCommand(
         name="validate",
@@ -53,7 +82,7 @@ commands = [
     ),
     CliOasapiCommand(
         name="filter",
-        command=lambda swagger, tag, path, security_scope: oasapi.filter(
+        command=lambda swagger, tag, path, security_scope, dry_run=False: oasapi.filter(
             swagger,
             mode="keep_only",
             conditions=[
@@ -63,6 +92,7 @@ commands = [
                     security_scopes=security_scope or None,
                 )
             ],
+            dry_run=dry_run,
         ),
         extra_options=[
             click.option("-t", "--tag", help="A tag to keep", multiple=True),
@@ -75,29 +105,146 @@ commands = [
         ),
         action_item="- {action.type} @ '{action.format_path(action.path)}' -> {action.reason}",
         description="Filter the SWAGGER operations based on tags, operation path or security scopes.",
+        report_only=True,
+    ),
+    CliOasapiCommand(
+        name="bundle",
+        command=lambda swagger, url: oasapi.bundle(
+            swagger, path=url if url != "[stdin]" and "://" not in url else None
+        ),
+        extra_options=[],
+        action_messages=(
+            "The swagger has been bundled with the following {len(actions)} external references:",
+            "The swagger has no external references.",
+        ),
+        action_item="- {action.type} @ '{action.format_path(action.path)}' -> {action.reason}",
+        description="Bundle in a single swagger the SWAGGER split across several files "
+        "(i.e. resolve its references to other files).",
+        with_url=True,
+    ),
+    CliOasapiCommand(
+        name="dedupe",
+        command=lambda swagger, threshold: oasapi.dedupe(swagger, threshold=threshold),
+        extra_options=[
+            click.option(
+                "--threshold",
+                type=int,
+                default=1,
+                show_default=True,
+                help="Number of times an inline schema can be repeated before being moved to the definitions",
+            ),
+        ],
+        action_messages=(
+            "The swagger has been deduplicated with the following {len(actions)} changes:",
+            "The swagger has no duplicated definitions or inline schemas.",
+        ),
+        action_item="- {action.type} @ '{action.format_path(action.path)}' -> {action.reason}",
+        description="Deduplicate the SWAGGER by merging its identical definitions and moving "
+        "its repeated inline schemas to the definitions.",
+    ),
+    CliOasapiCommand(
+        name="flatten",
+        command=dereference_tracking_memory,
+        extra_options=[
+            click.option(
+                "--no-shared",
+                is_flag=True,
+                help="Do not share the objects inlined for the same reference "
+                "(no YAML anchors/aliases in the output)",
+            ),
+            click.option(
+                "--memory",
+                is_flag=True,
+                help="Report the peak of memory allocated while flattening",
+            ),
+        ],
+        action_messages=(
+            "The swagger has been flattened with the following {len(actions)} references inlined or kept:",
+            "The swagger has no references to inline.",
+        ),
+        action_item="- {action.type} @ '{action.format_path(action.path)}' -> {action.reason}",
+        description="Flatten the SWAGGER by replacing its references by the objects they refer to "
+        "(recursive references are kept).",
     ),
 ]
 
 
 @click.group()
-def main():
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    envvar="OASAPI_CACHE_DIR",
+    help="Directory where the swaggers downloaded over HTTP are cached "
+    "(and revalidated with their ETag/Last-Modified).",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Use the copies cached in --cache-dir of the swaggers instead of downloading them.",
+)
+@click.option(
+    "--parse-cache-dir",
+    type=click.Path(file_okay=False),
+    envvar="OASAPI_PARSE_CACHE_DIR",
+    help="Directory where the parsed swaggers are cached (to skip the parsing of unchanged swaggers).",
+)
+@click.option(
+    "--parse-cache-size",
+    type=click.IntRange(min=1),
+    default=256,
+    show_default=True,
+    help="Maximum size (in MB) of the --parse-cache-dir (the least recently used swaggers are evicted).",
+)
+@click.pass_context
+def main(ctx, cache_dir, offline, parse_cache_dir, parse_cache_size):
     """These are common operations offered by the oasapi library"""
+    if offline and not cache_dir:
+        raise click.UsageError("--offline requires a --cache-dir")
+
+    logger = logging.getLogger(__name__)
+    if cache_dir:
+        http_cache = ctx.meta[HTTP_CACHE_KEY] = HttpCache(cache_dir, offline=offline)
+        ctx.call_on_close(lambda: logger.info(f"HTTP cache statistics: {http_cache.stats}"))
+    if parse_cache_dir:
+        parse_cache = ctx.meta[PARSE_CACHE_KEY] = ParseCache(
+            parse_cache_dir, max_size=parse_cache_size * 2 ** 20
+        )
+        ctx.call_on_close(lambda: logger.info(f"Parse cache statistics: {parse_cache.stats}"))
 
 
 def create_commands(commands: List[CliOasapiCommand]):
     """Generate all the commands for the cli."""
 
     def create_command(command: CliOasapiCommand):
+        # compile once the templates of the messages
+        action_message, noaction_message = command.action_messages
+        format_action_message = compile_template(action_message, "actions")
+        format_action_item = compile_template(command.action_item, "action")
+
         def cmd(verbose, silent, **kwargs):
             if verbose > 0:
                 logging.basicConfig(level=logging.DEBUG)
 
-            action_message, noaction_message = command.action_messages
             action_exit_code, noaction_exit_code = command.action_results
 
             # extract input/output
-            swagger = kwargs.pop("swagger").swagger
+            swagger_file_url = kwargs.pop("swagger")
+            swagger = swagger_file_url.swagger
+            if command.with_url:
+                kwargs["url"] = swagger_file_url.url
             output = kwargs.pop("output", None)
+            swagger_format = kwargs.pop("swagger_format", None)
+            output_format = kwargs.pop("output_format")
+            if (
+                output_format != "text"
+                and output
+                and getattr(output, "name", "<stdout>") == "<stdout>"
+            ):
+                raise click.UsageError(f"--output cannot be stdout with --format {output_format}")
+            if kwargs.pop("report_only", False):
+                if output:
+                    raise click.UsageError("--output cannot be used with --report-only")
+                kwargs["dry_run"] = True
 
             secho = click.secho if not silent else lambda *args, **kwargs: None
 
@@ -125,19 +272,36 @@ def create_commands(commands: List[CliOasapiCommand]):
                 sys.exit(1)
 
             if output:
-                if output.extension in {"yaml", "yml"}:
-                    yaml.dump(swagger, output, sort_keys=False)
-                elif output.extension in {"json"}:
-                    output.write(json.dumps(swagger, indent=2))
-                else:  # pragma: no cover
-                    raise ValueError("extension of output could not be determined")
+                write_swagger(swagger, output, swagger_format or output.extension)
+
+            if output_format != "text":
+                # write the events to stdout in the machine readable format, one by one
+                # in the order they are produced (the same from one run to the other)
+                WRITERS[output_format](
+                    click.get_text_stream("stdout"),
+                    actions,
+                    url=swagger_file_url.url,
+                    tool_version=oasapi.__version__,
+                )
+                secho(
+                    format_action_message(actions) if actions else noaction_message,
+                    fg="red" if actions else "green",
+                    err=True,
+                )
+                sys.exit(action_exit_code if actions else noaction_exit_code)
 
             if actions:
-                # display message in case of actions as well as all actions
+                # display message in case of actions as well as all actions (in a single write)
                 # and exit with the action_exit_code
-                secho(eval(f'f"{action_message}"'), fg="red", err=True)
-                for action in sorted(actions, key=lambda error: str(error)):
-                    secho(eval(f'f"{command.action_item}"'), fg="red", err=True)
+                secho(format_action_message(actions), fg="red", err=True)
+                secho(
+                    "\n".join(
+                        format_action_item(action)
+                        for action in sorted(actions, key=action_sort_key)
+                    ),
+                    fg="red",
+                    err=True,
+                )
                 sys.exit(action_exit_code)
             else:
                 # display message in case of no actions
@@ -148,7 +312,7 @@ def create_commands(commands: List[CliOasapiCommand]):
         cmd.__doc__ = command.description
         cmd.__doc__ += """
 
-            SWAGGER is the path to the swagger file, in json or yaml format.
+            SWAGGER is the path to the swagger file, in json or yaml format (possibly compressed).
             It can be a file path, an URL or a dash (-) for the stdin"""
 
         decorators = [
@@ -165,11 +329,37 @@ def create_commands(commands: List[CliOasapiCommand]):
             click.option(
                 "-o",
                 "--output",
-                help="Path to write the resulting swagger ('-' for stdout)",
+                help="Path to write the resulting swagger ('-' for stdout, .gz/.bz2/.zst to compress it)",
                 type=click.File("w"),
                 callback=validate_json_yaml_filename,
             )
         )
+        decorators.append(
+            click.option(
+                "--output-format",
+                "swagger_format",
+                type=click.Choice(["json", "yaml", "msgpack", "cbor"]),
+                help="Format of the resulting swagger (by default, from the extension of --output)",
+            )
+        )
+        decorators.append(
+            click.option(
+                "--format",
+                "output_format",
+                type=click.Choice(["text", "jsonl", "sarif"]),
+                default="text",
+                show_default=True,
+                help="Format of the events reported (jsonl and sarif are written to stdout)",
+            )
+        )
+        if command.report_only:
+            decorators.append(
+                click.option(
+                    "--report-only",
+                    is_flag=True,
+                    help="Only report the changes (no swagger built)",
+                )
+            )
         # add extra options
         decorators += command.extra_options
 
@@ -184,3 +374,261 @@ def create_commands(commands: List[CliOasapiCommand]):
 
 # create all commands and add them to the locals()
 locals().update(create_commands(commands))
+
+
+@main.command()
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option("--host", default="127.0.0.1", show_default=True, help="The host to listen on")
+@click.option("--port", default=8000, show_default=True, help="The port to listen on")
+@click.option(
+    "--reload-interval",
+    default=1.0,
+    show_default=True,
+    help="Minimal delay (in seconds) between two checks for changes in the DIRECTORY",
+)
+@click.option(
+    "--intern",
+    is_flag=True,
+    help="Share the identical strings and leaf objects of the swaggers to reduce memory",
+)
+@click.option("-v", "--verbose", count=True, help="Make the operation more talkative")
+def serve(directory, host, port, reload_interval, intern, verbose):
+    """Serve over HTTP the swaggers of the DIRECTORY.
+
+    The swaggers (json or yaml files) are loaded once and reloaded when they change.
+    They are served filtered and pruned on demand.
+
+    \b
+    GET /specs returns the names of the swaggers (i.e. their file names without extension).
+    GET /specs/{name}?tag=..&path=..&scope=..&prune=1&format=json|yaml returns the swagger
+    filtered on the tags, paths and security scopes, pruned (if prune=1) in json or yaml."""
+    if verbose > 0:
+        logging.basicConfig(level=logging.DEBUG if verbose > 1 else logging.INFO)
+
+    server = make_server(
+        directory, host=host, port=port, reload_interval=reload_interval, intern=intern
+    )
+    click.secho(f"Serving the swaggers of '{directory}' on http://{host}:{port}/specs", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:  # pragma: no cover
+        pass
+    finally:
+        server.server_close()
+
+
+@main.command(name="fleet-check")
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--index",
+    type=click.Path(dir_okay=False),
+    help="Path of the index file (default: .oasapi-fleet.json in the DIRECTORY)",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "jsonl", "sarif"]),
+    default="text",
+    show_default=True,
+    help="Format of the events reported (jsonl and sarif are written to stdout)",
+)
+@click.option("-v", "--verbose", count=True, help="Make the operation more talkative")
+@click.option("-s", "--silent", is_flag=True, help="Do not print the oasapi messages to stderr")
+def fleet_check(directory, index, output_format, verbose, silent):
+    """Check the collisions of operationIds, operations and definitions across the swaggers of the DIRECTORY.
+
+    The index of the swaggers is persisted and updated incrementally: only the swaggers which files
+    have changed since the last check are parsed again."""
+    if verbose > 0:
+        logging.basicConfig(level=logging.DEBUG)
+
+    secho = click.secho if not silent else lambda *args, **kwargs: None
+
+    fleet_index, events = oasapi.fleet_check(directory, index_path=index)
+    nb_swaggers = len(fleet_index.entries)
+
+    if output_format != "text":
+        WRITERS[output_format](
+            click.get_text_stream("stdout"), events, url=directory, tool_version=oasapi.__version__
+        )
+    elif events:
+        secho(
+            "\n".join(
+                f"- {event.type} @ '{event.format_path(event.path)}' -> {event.reason}"
+                for event in sorted(events, key=action_sort_key)
+            ),
+            fg="red",
+            err=True,
+        )
+
+    if events:
+        secho(
+            f"Following {len(events)} collisions have been detected across the {nb_swaggers} swaggers.",
+            fg="red",
+            err=True,
+        )
+        sys.exit(1)
+    else:
+        secho(f"No collisions detected across the {nb_swaggers} swaggers.", fg="green", err=True)
+
+
+@main.command(name="hash")
+@click.argument(
+    "swaggers", nargs=-1, required=True, callback=SwaggerFileURL.open_urls, metavar="SWAGGER..."
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    show_default=True,
+    help="Format of the hashes written to stdout",
+)
+def fingerprint(swaggers, output_format):
+    """Print the hash of each SWAGGER and the hashes of its operations.
+
+    The hashes are the ones of the Merkle tree of the swagger: they are independent of the order of the keys
+    (and of the format json/yaml) and the hash of an operation changes only when the operation changes.
+
+    The SWAGGER can be a file path or an URL (or - for stdin). Several URLs are downloaded concurrently."""
+    hashes = {}
+    lines = []
+    for swagger in swaggers:
+        tree = oasapi.fingerprint(swagger.swagger)
+        operations = tree.operations()
+        hashes[swagger.url] = {
+            "root": tree.digest,
+            "operations": {
+                f"{verb.upper()} {endpoint}": digest
+                for (endpoint, verb), digest in operations.items()
+            },
+        }
+        lines.append(f"{tree.digest}  {swagger.url}")
+        lines.extend(
+            f"{digest}  {verb.upper()} {endpoint}"
+            for (endpoint, verb), digest in operations.items()
+        )
+
+    if output_format == "json":
+        # the hashes of a single swagger or the hashes by url of several swaggers
+        click.echo(json.dumps(hashes.popitem()[1] if len(hashes) == 1 else hashes, indent=2))
+    else:
+        click.echo("\n".join(lines))
+
+
+@main.command()
+@click.argument("old", callback=SwaggerFileURL.open_url, metavar="OLD")
+@click.argument("new", callback=SwaggerFileURL.open_url, metavar="NEW")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "jsonl", "sarif"]),
+    default="text",
+    show_default=True,
+    help="Format of the changes reported (jsonl and sarif are written to stdout)",
+)
+@click.option("-v", "--verbose", count=True, help="Make the operation more talkative")
+@click.option("-s", "--silent", is_flag=True, help="Do not print the oasapi messages to stderr")
+def diff(old, new, output_format, verbose, silent):
+    """Compare the OLD and NEW versions of a swagger and report the changes of their operations,
+    parameters and definitions.
+
+    The changes that may break the clients of the OLD swagger (removed operations, new required parameters,
+    narrowed enums, ...) are flagged as breaking and make the command fail.
+
+    The OLD and NEW swaggers can be file paths or URLs (or - for stdin)."""
+    if verbose > 0:
+        logging.basicConfig(level=logging.DEBUG)
+
+    secho = click.secho if not silent else lambda *args, **kwargs: None
+
+    changes = oasapi.diff(old.swagger, new.swagger)
+    nb_breaking = sum(change.breaking for change in changes)
+
+    if output_format != "text":
+        WRITERS[output_format](
+            click.get_text_stream("stdout"), changes, url=new.url, tool_version=oasapi.__version__
+        )
+    elif changes:
+        secho(
+            "\n".join(
+                f"- {'[breaking] ' if change.breaking else ''}{change.type} "
+                f"@ '{change.format_path(change.path)}' -> {change.reason}"
+                for change in sorted(changes, key=action_sort_key)
+            ),
+            fg="red" if nb_breaking else "yellow",
+            err=True,
+        )
+
+    if nb_breaking:
+        secho(
+            f"Following {len(changes)} changes ({nb_breaking} breaking) have been detected.",
+            fg="red",
+            err=True,
+        )
+        sys.exit(1)
+    elif changes:
+        secho(
+            f"Following {len(changes)} changes (none breaking) have been detected.",
+            fg="green",
+            err=True,
+        )
+    else:
+        secho("The swaggers have no changes.", fg="green", err=True)
+
+
+@main.command(name="filter-stream")
+@click.argument(
+    "swagger", type=click.File("rb"), callback=open_decompressed_input, metavar="SWAGGER"
+)
+@click.option("-t", "--tag", help="A tag to keep", multiple=True)
+@click.option("-p", "--path", help="A path to keep", multiple=True)
+@click.option("-sc", "--security-scope", help="A security scope to keep", multiple=True)
+@click.option(
+    "-o",
+    "--output",
+    type=click.File("w", encoding="utf-8"),
+    default="-",
+    callback=open_compressed_output,
+    help="Output file for the filtered swagger in json (stdout by default)",
+)
+@click.option("-v", "--verbose", count=True, help="Make the operation more talkative")
+@click.option("-s", "--silent", is_flag=True, help="Do not print the oasapi messages to stderr")
+def filter_stream(swagger, tag, path, security_scope, output, verbose, silent):
+    """Filter the SWAGGER operations based on tags, operation path or security scopes
+    without loading the SWAGGER in memory.
+
+    The SWAGGER (a json file, possibly compressed, or - for stdin) is read and the filtered swagger is written incrementally:
+    only one path item is loaded at a time and the other sections are copied as is.
+    The actions are reported as they happen."""
+    if verbose > 0:
+        logging.basicConfig(level=logging.DEBUG)
+
+    secho = click.secho if not silent else lambda *args, **kwargs: None
+
+    conditions = [
+        FilterCondition(
+            tags=tag or None, operations=path or None, security_scopes=security_scope or None
+        )
+    ]
+    nb_actions = 0
+    try:
+        for action in oasapi.filter_stream(swagger, output, conditions=conditions):
+            nb_actions += 1
+            secho(
+                f"- {action.type} @ '{action.format_path(action.path)}' -> {action.reason}",
+                fg="red",
+                err=True,
+            )
+    except ValueError as e:
+        # includes the json.JSONDecodeError
+        raise click.ClickException(f"Could not parse the json swagger ({e})")
+
+    if nb_actions:
+        secho(
+            f"The swagger has filtered or removed the above {nb_actions} operations.",
+            fg="red",
+            err=True,
+        )
+    else:
+        secho("The swagger is unchanged after filtering.", fg="green", err=True)
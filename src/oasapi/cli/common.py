@@ -1,13 +1,27 @@
+import io
 import json
+from functools import partial
 from pathlib import Path
-from typing import Callable, List, Dict, Tuple
+from typing import Callable, List, Dict, Tuple, Union
 from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
 from urllib.request import urlopen
 
 import click
 import yaml
 from attr import dataclass
 
+from oasapi.binary import BINARY_FORMATS, detect_binary_format, load_binary
+from oasapi.cache import ParseCache
+from oasapi.common import Interner, parse_swagger
+from oasapi.compression import open_compressed, open_decompressed, split_compression
+from oasapi.fetch import Fetcher
+
+
+# keys of the caches given to the main command in the meta of the click context
+HTTP_CACHE_KEY = "oasapi.http_cache"
+PARSE_CACHE_KEY = "oasapi.parse_cache"
+
 
 @dataclass
 class CliOasapiCommand:
@@ -18,6 +32,21 @@ class CliOasapiCommand:
     description: str
     action_messages: Tuple[str, str]  # message in case of actions, no actions
     action_results: Tuple[int, int] = (0, 0)  # exit code in case of actions, no actions
+    report_only: bool = False  # command supports a --report-only option (calling it with dry_run=True)
+    with_url: bool = False  # command is called with the url of the SWAGGER (as url=...)
+
+
+def compile_template(template: str, *names: str) -> Callable:
+    """Compile once a f-string template into a function taking the variables names of the template.
+
+    For instance, compile_template("{len(actions)} actions", "actions") returns a function
+    equivalent to lambda actions: f"{len(actions)} actions"."""
+    return eval(f'lambda {", ".join(names)}: f"{template}"')
+
+
+def action_sort_key(action) -> Tuple:
+    """Return the key to sort the actions displayed (by type of action, path and reason)"""
+    return type(action).__name__, tuple(map(str, action.path)), str(action.reason)
 
 
 def shorten_text(txt, before, after, placeholder="..."):
@@ -34,33 +63,46 @@ def shorten_text(txt, before, after, placeholder="..."):
         return txt[:before] + placeholder + txt[-after:]
 
 
+def decode_content(content: bytes) -> Union[str, bytes]:
+    """Decode the content as text assuming utf-8 (keeping it as bytes if it is in a binary format)"""
+    if detect_binary_format(content):
+        return content
+    return content.decode("utf-8")
+
+
 @dataclass
 class FileURL:
     url: str
-    content: str
+    content: Union[str, bytes]  # bytes for the binary formats (msgpack, cbor)
 
     @classmethod
     def open_url(cls, ctx, param, value):
+        # the HTTP cache given to the main command with --cache-dir (if any)
+        http_cache = ctx.meta.get(HTTP_CACHE_KEY) if ctx is not None else None
         try:
             # try to open as if value is an URL
-            fp = urlopen(value)
+            if http_cache is not None and urlsplit(value).scheme in {"http", "https"}:
+                fp = io.BytesIO(http_cache.fetch(value))
+            else:
+                fp = urlopen(value)
         except HTTPError as err:
             raise click.ClickException(
                 f"Error when downloading {value} : {err.reason} ({err.code})"
             )
+        except LookupError as err:
+            raise click.ClickException(str(err))
         except (URLError, ValueError):
             # it should be a file
-            path = click.File()
+            path = click.File("rb")
             fp = path.convert(value=value, param=param, ctx=ctx)
             if value == "-":
                 value = "[stdin]"
 
-        # read the file
-        content = fp.read()
-
-        # convert to text if bytes assuming utf-8
-        if isinstance(content, bytes):
-            content = content.decode("utf-8")
+        # read the file (decompressing it if compressed)
+        try:
+            content = decode_content(open_decompressed(fp).read())
+        except (OSError, EOFError, ImportError) as err:
+            raise click.ClickException(f"Could not read the swagger from '{value}' ({err})")
 
         return FileURL(url=value, content=content)
 
@@ -70,34 +112,101 @@ class SwaggerFileURL(FileURL):
     swagger: Dict
 
     @classmethod
-    def open_url(cls, ctx, param, value) -> "SwaggerFileURL":
+    def open_url(cls, ctx, param, value, interner: Interner = None) -> "SwaggerFileURL":
+        """Open the swagger at the url value (interning it with the interner if given)"""
         file_url = super().open_url(ctx, param, value)
+        parse_cache = ctx.meta.get(PARSE_CACHE_KEY) if ctx is not None else None
 
-        file_content = file_url.content
-        if file_content.lstrip().startswith("{"):
-            # this is a json file
+        return cls.parse(file_url.url, file_url.content, interner=interner, parse_cache=parse_cache)
+
+    @classmethod
+    def parse(
+        cls, url: str, content: str, interner: Interner = None, parse_cache: ParseCache = None
+    ) -> "SwaggerFileURL":
+        """Parse the swagger downloaded from the url (through the parse_cache if given)"""
+        if isinstance(content, bytes):
             try:
-                swagger = json.loads(file_content)
-            except json.JSONDecodeError:
+                swagger = load_binary(content)
+            except ImportError as err:
+                raise click.ClickException(str(err))
+            except ValueError:
                 swagger = None
+            if interner is not None and swagger is not None:
+                swagger = interner(swagger)
         else:
-            # this is a yaml file
+            parse = parse_cache.parse if parse_cache is not None else parse_swagger
             try:
-                swagger = yaml.safe_load(file_content)
-            except yaml.YAMLError:
+                swagger = parse(content, interner=interner)
+            except (json.JSONDecodeError, yaml.YAMLError):
                 swagger = None
 
         if swagger is None:
+            text = content if isinstance(content, str) else repr(content)
             raise click.ClickException(
-                f"Could not parse json/yaml swagger from '{file_url.url}' "
-                f"with content {shorten_text(file_url.content, 15, 10)}"
+                f"Could not parse json/yaml swagger from '{url}' "
+                f"with content {shorten_text(text, 15, 10)}"
             )
 
-        return cls(swagger=swagger, url=file_url.url, content=file_url.content)
+        return cls(swagger=swagger, url=url, content=content)
+
+    @classmethod
+    def open_urls(cls, ctx, param, values) -> List["SwaggerFileURL"]:
+        """Open the swaggers at the url values, downloading and parsing concurrently the http(s) urls"""
+        http_cache = ctx.meta.get(HTTP_CACHE_KEY) if ctx is not None else None
+        parse_cache = ctx.meta.get(PARSE_CACHE_KEY) if ctx is not None else None
+        urls = [value for value in values if urlsplit(value).scheme in {"http", "https"}]
+
+        with Fetcher() as fetcher:
+            if http_cache is not None:
+                fetch = partial(http_cache.fetch, opener=fetcher.open)
+            else:
+                fetch = fetcher.fetch
+            results = fetcher.fetch_all(
+                urls,
+                lambda url: cls.parse(
+                    url,
+                    decode_content(open_decompressed(io.BytesIO(fetch(url))).read()),
+                    parse_cache=parse_cache,
+                ),
+            )
+
+        swaggers = dict(zip(urls, results))
+        for url, result in swaggers.items():
+            if isinstance(result, HTTPError):
+                raise click.ClickException(
+                    f"Error when downloading {url} : {result.reason} ({result.code})"
+                )
+            elif isinstance(result, (OSError, EOFError, LookupError, ImportError)):
+                raise click.ClickException(f"Error when downloading {url} : {result}")
+            elif isinstance(result, Exception):
+                raise result
+
+        # the other values are files (or the stdin)
+        return [
+            swaggers[value] if value in swaggers else cls.open_url(ctx, param, value)
+            for value in values
+        ]
+
+
+def open_compressed_output(ctx, param, value):
+    """Replace the output file by a file compressed incrementally if its name ends with a compression extension
+    (e.g. swagger.json.gz)"""
+    if value is None or not hasattr(value, "name") or value.name == "<stdout>":
+        return value
+
+    _, compression = split_compression(value.name)
+    if compression is not None:
+        try:
+            value = open_compressed(value.name, compression)
+        except ImportError as err:
+            raise click.BadParameter(str(err))
+        ctx.call_on_close(value.close)
+    return value
 
 
 def validate_json_yaml_filename(ctx, param, value):
-    """Validate the name of the file has the proper extension and add the extension to the file object"""
+    """Validate the name of the file has the proper extension (before a compression extension like .gz)
+    and add the extension to the file object"""
     if value is None:
         return value
 
@@ -106,12 +215,22 @@ def validate_json_yaml_filename(ctx, param, value):
         value.extension = "yaml"
         return value
 
-    ALLOWED_EXTENSIONS = ["json", "yaml", "yml"]
-    extension = Path(value.name).suffix[1:]
+    ALLOWED_EXTENSIONS = ["json", "yaml", "yml"] + BINARY_FORMATS
+    name, _ = split_compression(value.name)
+    extension = Path(name).suffix[1:]
 
     if extension not in ALLOWED_EXTENSIONS:
         raise click.BadParameter(
             f"the extension of the file is '{extension}' while it should be one of {ALLOWED_EXTENSIONS}"
         )
+    value = open_compressed_output(ctx, param, value)
     value.extension = extension
     return value
+
+
+def open_decompressed_input(ctx, param, value):
+    """Wrap the binary input file in a text stream decompressing it incrementally if it is compressed"""
+    try:
+        return io.TextIOWrapper(open_decompressed(value), encoding="utf-8")
+    except ImportError as err:
+        raise click.BadParameter(str(err))
@@ -0,0 +1,73 @@
+"""Machine readable formats (JSON Lines, SARIF) of the events reported by the CLI commands.
+
+The events are serialized one by one to the stream (no full document is built in memory),
+in the order they are produced by the commands.
+"""
+import json
+from typing import Iterable, TextIO
+
+from oasapi.events import Event, Error, Warning, DiffChange
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+encoder = json.JSONEncoder(default=str)
+
+
+def write_jsonl(stream: TextIO, events: Iterable[Event], url: str, tool_version: str):
+    """Write the events to the stream in JSON Lines (one json object per event)"""
+    for event in events:
+        stream.write(encoder.encode(event.as_dict()))
+        stream.write("\n")
+
+
+def sarif_level(event: Event) -> str:
+    """Return the SARIF level of the event (the breaking changes being errors)"""
+    if isinstance(event, Error) or (isinstance(event, DiffChange) and event.breaking):
+        return "error"
+    elif isinstance(event, Warning):
+        return "warning"
+    else:
+        return "note"
+
+
+def sarif_result(event: Event, url: str):
+    """Return the SARIF result of the event"""
+    return {
+        "ruleId": type(event).__name__,
+        "level": sarif_level(event),
+        "message": {"text": str(event.reason)},
+        "locations": [
+            {
+                "physicalLocation": {"artifactLocation": {"uri": url}},
+                "logicalLocations": [{"fullyQualifiedName": event.format_path(event.path)}],
+            }
+        ],
+        "properties": event.as_dict(),
+    }
+
+
+def write_sarif(stream: TextIO, events: Iterable[Event], url: str, tool_version: str):
+    """Write the events to the stream as a SARIF 2.1.0 log with a single run"""
+    driver = {
+        "name": "oasapi",
+        "version": tool_version,
+        "informationUri": "https://github.com/sdementen/oasapi",
+    }
+    # open the log, its single run and its results
+    stream.write('{"version": "2.1.0", "$schema": ')
+    stream.write(encoder.encode(SARIF_SCHEMA))
+    stream.write(', "runs": [{"tool": {"driver": ')
+    stream.write(encoder.encode(driver))
+    stream.write('}, "results": [')
+
+    for i, event in enumerate(events):
+        if i:
+            stream.write(",")
+        for chunk in encoder.iterencode(sarif_result(event, url)):
+            stream.write(chunk)
+
+    # close the results, the run and the log
+    stream.write("]}]}\n")
+
+
+WRITERS = {"jsonl": write_jsonl, "sarif": write_sarif}
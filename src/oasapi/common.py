@@ -1,11 +1,20 @@
+import hashlib
+import json
 import logging
 import re
+import sys
 
 # list of verbs that are valid in an OpenAPI/Swagger
-from functools import singledispatch
+from functools import singledispatch, lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Dict
 
+import yaml
 from jsonpath_ng import Fields, Index, DatumInContext, Child, parse, Union
 
+from oasapi.binary import BINARY_FORMATS, dump_binary
+
 OPERATIONS_LIST = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "HEAD"]
 OPERATIONS = set(OPERATIONS_LIST)
 OPERATIONS_LOWER = [op.lower() for op in OPERATIONS_LIST]  # ordered list of operations
@@ -14,6 +23,9 @@ OPERATIONS_RE = re.compile("|".join(OPERATIONS), re.IGNORECASE)
 
 REFERENCE_SECTIONS = ["definitions", "responses", "parameters"]
 
+#: the extensions of the swagger files in a directory of swaggers
+SWAGGER_EXTENSIONS = {".json", ".yaml", ".yml"}
+
 # list of JSPATH for different structures
 JSPATH_ENDPOINTS = parse(f"paths.*")
 JSPATH_OPERATIONS = parse(f"paths.*.({'|'.join(OPERATIONS_LOWER)})")
@@ -59,6 +71,203 @@ def commonprefix(m):
     return "/".join(s)
 
 
+class Interner:
+    """Share the identical strings and leaf objects of the swaggers interned with it.
+
+    The keys and the strings shorter than max_length are interned (with :py:func:`sys.intern`)
+    and the non empty dicts/lists containing only scalars (e.g. ``{"type": "string"}``) are replaced by a single
+    shared object (hash-consing).
+    Using the same Interner for all the swaggers loaded in a process shares these objects across the swaggers.
+    The leaf objects are kept by the Interner until :py:meth:`retain` is called with the swaggers still in use.
+
+    As the leaf objects are shared, an interned swagger must be considered as read-only: it is copied with
+    :py:func:`copy_swagger` (as by the oasapi functions) before being changed in place, as :py:func:`copy.deepcopy`
+    keeps the sharing in the copy.
+    """
+
+    def __init__(self, max_length: int = 64):
+        self.max_length = max_length
+        self.leaves = {}
+
+    def __call__(self, o):
+        """Return a copy of o with its strings interned and its leaf objects shared"""
+        if isinstance(o, dict):
+            o = {self.intern_scalar(key): self(value) for key, value in o.items()}
+            leaf_key = self.leaf_key(o.values())
+            if leaf_key is not None:
+                return self.leaves.setdefault((dict, tuple(o), leaf_key), o)
+            return o
+        elif isinstance(o, list):
+            o = [self(value) for value in o]
+            leaf_key = self.leaf_key(o)
+            if leaf_key is not None:
+                return self.leaves.setdefault((list, leaf_key), o)
+            return o
+        else:
+            return self.intern_scalar(o)
+
+    def retain(self, objects):
+        """Keep only the leaf objects used by the objects (interned with this interner) to free the leaf objects
+        of the swaggers that are not used anymore (the leaf objects are not copied)"""
+        leaves = {}
+
+        def collect(o):
+            if isinstance(o, dict):
+                values = o.values()
+                key_prefix = (dict, tuple(o))
+            elif isinstance(o, list):
+                values = o
+                key_prefix = (list,)
+            else:
+                return
+            leaf_key = self.leaf_key(values)
+            if leaf_key is not None:
+                leaves.setdefault(key_prefix + (leaf_key,), o)
+            else:
+                for value in values:
+                    collect(value)
+
+        for o in objects:
+            collect(o)
+        self.leaves = leaves
+
+    def intern_scalar(self, o):
+        if isinstance(o, str) and len(o) <= self.max_length:
+            return sys.intern(o)
+        return o
+
+    @staticmethod
+    def leaf_key(values):
+        """Return a hashable key for the values if they are all scalars (None otherwise or if there are no values,
+        as the empty dicts/lists are the ones filled in place, e.g. ``definitions: {}``)"""
+        if not values:
+            return None
+        # the type distinguishes values equal but of different types (e.g. 1, 1.0 and True)
+        key = tuple((type(value), value) for value in values)
+        try:
+            hash(key)
+        except TypeError:
+            # a value is not hashable (not a scalar)
+            return None
+        return key
+
+
+def copy_swagger(o):
+    """Return a deep copy of a swagger (or of any json/yaml object) as a tree.
+
+    Unlike :py:func:`copy.deepcopy`, an object found at several locations of o (e.g. a leaf object of an interned
+    swagger) is copied at each location, so that a change of the copy in place changes only one location.
+    """
+    if isinstance(o, dict):
+        return {key: copy_swagger(value) for key, value in o.items()}
+    elif isinstance(o, list):
+        return [copy_swagger(value) for value in o]
+    else:
+        return o
+
+
+def parse_swagger(content: str, interner: Interner = None):
+    """Parse a swagger (or any json/yaml object) from a json or yaml content,
+    interning it with the interner if given"""
+    if content.lstrip().startswith("{"):
+        swagger = json.loads(content)
+    else:
+        swagger = yaml.safe_load(content)
+
+    if interner is not None:
+        swagger = interner(swagger)
+
+    return swagger
+
+
+def load_file(path, interner: Interner = None) -> Dict:
+    """Load a swagger (or any json/yaml object) from a json or yaml file,
+    interning it with the interner if given"""
+    content = Path(path).read_text(encoding="utf-8")
+    swagger = parse_swagger(content, interner=interner)
+
+    if not isinstance(swagger, dict):
+        raise ValueError(f"the content of '{path}' is not a json/yaml object")
+
+    return swagger
+
+
+#: the yaml dumper used to write the swaggers (the C emitter of libyaml when available)
+YAML_DUMPER = getattr(yaml, "CDumper", yaml.Dumper)
+
+#: the number of chunks of the json encoder (of a few characters each) joined in a single write to the output streams
+WRITE_BUFFER_SIZE = 2 ** 16
+
+_JSON_ENCODER = json.JSONEncoder(indent=2)
+
+
+def write_swagger(swagger: Dict, stream, format: str = "json"):
+    """Write a swagger to a text stream in json or yaml (with the order of the keys kept)
+    or in a binary format (msgpack or cbor, written to the binary buffer of the text stream).
+
+    The json document is written incrementally by batches of :py:data:`WRITE_BUFFER_SIZE` chunks
+    instead of being serialized as a single string in memory.
+    """
+    if format == "json":
+        chunks = _JSON_ENCODER.iterencode(swagger)
+        while True:
+            content = "".join(islice(chunks, WRITE_BUFFER_SIZE))
+            if not content:
+                break
+            stream.write(content)
+    elif format in {"yaml", "yml"}:
+        yaml.dump(swagger, stream, sort_keys=False, Dumper=YAML_DUMPER)
+    elif format in BINARY_FORMATS:
+        dump_binary(swagger, getattr(stream, "buffer", stream), format)
+    else:
+        raise ValueError(f"unknown format '{format}' to write the swagger")
+
+
+def spec_hash(swagger) -> str:
+    """Return a stable hash of the content of the swagger (independent of the order of the keys).
+
+    The keys that are not strings (e.g. integer response codes) and the values that are not json values
+    (e.g. yaml dates) are tagged with their type, so {200: ...} and {"200": ...} have different hashes."""
+    content = json.dumps(_tag_types(swagger), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+# prefix of the tagged keys and values in the content hashed by spec_hash (never used in a json/yaml swagger)
+_TYPE_TAG = "\x00"
+_JSON_SCALARS = {str, int, float, bool, type(None)}
+
+
+def _tag_key(key) -> str:
+    """Return the key as an unambiguous string (tagged with its type if it is not a string)"""
+    if isinstance(key, str):
+        # escape the (unlikely) string keys starting with the tag
+        return _TYPE_TAG + key if key[:1] == _TYPE_TAG else key
+    return f"{_TYPE_TAG}{type(key).__name__}:{key!r}"
+
+
+def _tag_types(o):
+    """Return a copy of o with the non string keys and the non json values tagged with their type"""
+    if type(o) is dict:
+        return {
+            (k if type(k) is str and k[:1] != _TYPE_TAG else _tag_key(k)): (
+                v if type(v) in _JSON_SCALARS else _tag_types(v)
+            )
+            for k, v in o.items()
+        }
+    elif type(o) in _JSON_SCALARS:
+        return o
+    elif isinstance(o, (list, tuple)):
+        return [v if type(v) in _JSON_SCALARS else _tag_types(v) for v in o]
+    elif isinstance(o, dict):
+        return _tag_types(dict(o))
+    elif isinstance(o, (str, int, float)):
+        # e.g. an IntEnum, serialized as its json value
+        return o
+    else:
+        # e.g. a date loaded from a yaml swagger (differs from its string representation)
+        return {_TYPE_TAG + type(o).__name__: str(o)}
+
+
 def get_elements(dct, jspth):
     """Return tuples of (key, value, tuple_path) in the dict dct with keys according to the JSON path jspth"""
     for elem in jspth.find(dct):
@@ -83,7 +292,13 @@ def _(o):  # pragma: no cover
 
 @tuple_path.register(Index)
 def _(o):
-    return (f"[{o.index}]",)
+    return _index_path(o.index)
+
+
+@lru_cache(maxsize=None)
+def _index_path(index: int):
+    """Return the path of an index (shared by all the paths with this index)"""
+    return (f"[{index}]",)
 
 
 @tuple_path.register(DatumInContext)
@@ -0,0 +1,68 @@
+"""Transparent (de)compression of the swaggers read and written (gzip, bzip2 and zstandard)"""
+import bz2
+import gzip
+import io
+from typing import BinaryIO, Optional, TextIO, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+#: the compressions supported (as the extensions of the compressed files)
+COMPRESSIONS = ["gz", "bz2", "zst"]
+
+# the magic bytes starting the content compressed with each compression
+MAGIC_BYTES = {b"\x1f\x8b": "gz", b"BZh": "bz2", b"\x28\xb5\x2f\xfd": "zst"}
+
+
+def _zstandard():
+    """Return the zstandard module (an optional dependency)"""
+    if zstandard is None:
+        raise ImportError(
+            "the zstandard package is required for zstd compressed swaggers (pip install oasapi[zstd])"
+        )
+    return zstandard
+
+
+def split_compression(name: str) -> Tuple[str, Optional[str]]:
+    """Return the name of a file without its compression extension and the compression (None if not compressed)
+
+    For instance, split_compression("swagger.json.gz") returns ("swagger.json", "gz")."""
+    base, _, extension = name.rpartition(".")
+    if base and extension in COMPRESSIONS:
+        return base, extension
+    return name, None
+
+
+def open_decompressed(stream: BinaryIO) -> BinaryIO:
+    """Return a binary stream reading the content of the stream, decompressed incrementally if it is compressed
+    (the compression is detected from the magic bytes at the start of the content)"""
+    if not hasattr(stream, "peek"):
+        stream = io.BufferedReader(stream)
+    head = stream.peek(4)[:4]
+
+    compression = next(
+        (compression for magic, compression in MAGIC_BYTES.items() if head.startswith(magic)), None
+    )
+    if compression == "gz":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    elif compression == "bz2":
+        return bz2.BZ2File(stream)
+    elif compression == "zst":
+        return _zstandard().ZstdDecompressor().stream_reader(stream)
+    else:
+        return stream
+
+
+def open_compressed(path, compression: str) -> TextIO:
+    """Open the file at path to write text (in utf-8) compressed incrementally with the compression"""
+    if compression == "gz":
+        return gzip.open(path, "wt", encoding="utf-8")
+    elif compression == "bz2":
+        return bz2.open(path, "wt", encoding="utf-8")
+    elif compression == "zst":
+        writer = _zstandard().ZstdCompressor().stream_writer(open(path, "wb"))
+        return io.TextIOWrapper(writer, encoding="utf-8")
+    else:
+        raise ValueError(f"unknown compression '{compression}' (should be one of {COMPRESSIONS})")
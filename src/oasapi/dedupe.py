@@ -0,0 +1,279 @@
+"""Structural deduplication of a swagger (merge of identical definitions and extraction of repeated inline schemas)"""
+import hashlib
+import json
+import re
+from collections import Counter
+from typing import Dict, Tuple, List, Callable
+
+from oasapi.common import OPERATIONS_LOWER, copy_swagger
+from oasapi.events import (
+    FilterAction,
+    DefinitionMergedFilterAction,
+    InlineSchemaExtractedFilterAction,
+    InlineSchemaReplacedFilterAction,
+    SwaggerSizeReducedFilterAction,
+)
+
+
+class _Digests:
+    """Canonical hashes of the subtrees of a swagger (computed once per object, independent of the order of the keys)"""
+
+    def __init__(self):
+        # id(o) -> (o, digest), o is kept to ensure its id is not reused while the digests are in use
+        self.digests = {}
+
+    def __call__(self, o) -> str:
+        if isinstance(o, dict):
+            entry = self.digests.get(id(o))
+            if entry is None:
+                content = ",".join(
+                    sorted(f"{json.dumps(key, default=str)}:{self(value)}" for key, value in o.items())
+                )
+                entry = self.digests[id(o)] = (o, self._hash("{" + content + "}"))
+            return entry[1]
+        elif isinstance(o, list):
+            entry = self.digests.get(id(o))
+            if entry is None:
+                content = ",".join(self(value) for value in o)
+                entry = self.digests[id(o)] = (o, self._hash("[" + content + "]"))
+            return entry[1]
+        else:
+            return json.dumps(o, default=str)
+
+    @staticmethod
+    def _hash(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _is_candidate(schema) -> bool:
+    """Return True if the schema is an inline object schema worth being shared in the definitions"""
+    return isinstance(schema, dict) and "$ref" not in schema and ("properties" in schema or "allOf" in schema)
+
+
+def _nested_schemas(schema: Dict, path):
+    """Yield the (container, key, path) of the schemas nested in the schema"""
+    for key in ("items", "additionalProperties"):
+        if isinstance(schema.get(key), dict):
+            yield schema, key, path + (key,)
+    properties = schema.get("properties")
+    if isinstance(properties, dict):
+        for name in properties:
+            yield properties, name, path + ("properties", name)
+    all_of = schema.get("allOf")
+    if isinstance(all_of, list):
+        for i in range(len(all_of)):
+            yield all_of, i, path + ("allOf", f"[{i}]")
+
+
+def _walk_schema(container, key, path, visit: Callable):
+    """Call visit on the schema container[key] (if not a reference) then on its nested schemas"""
+    schema = container[key]
+    if not isinstance(schema, dict) or "$ref" in schema:
+        return
+    visit(container, key, path)
+    # the visit may have replaced the schema by a reference
+    schema = container[key]
+    if "$ref" in schema:
+        return
+    for nested in _nested_schemas(schema, path):
+        _walk_schema(*nested, visit)
+
+
+def _walk_swagger(swagger: Dict, visit: Callable):
+    """Call visit on all the inline schemas of the swagger (but the definitions themselves)"""
+    for name, definition in list((swagger.get("definitions") or {}).items()):
+        if isinstance(definition, dict):
+            for nested in _nested_schemas(definition, ("definitions", name)):
+                _walk_schema(*nested, visit)
+
+    for section in ("parameters", "responses"):
+        for name, item in (swagger.get(section) or {}).items():
+            if isinstance(item, dict) and "schema" in item:
+                _walk_schema(item, "schema", (section, name, "schema"), visit)
+
+    for endpoint_name, endpoint in (swagger.get("paths") or {}).items():
+        if not isinstance(endpoint, dict):
+            continue
+        path = ("paths", endpoint_name)
+        for i, parameter in enumerate(endpoint.get("parameters") or []):
+            if isinstance(parameter, dict) and "schema" in parameter:
+                _walk_schema(parameter, "schema", path + ("parameters", f"[{i}]", "schema"), visit)
+        for verb in OPERATIONS_LOWER:
+            operation = endpoint.get(verb)
+            if not isinstance(operation, dict):
+                continue
+            for i, parameter in enumerate(operation.get("parameters") or []):
+                if isinstance(parameter, dict) and "schema" in parameter:
+                    _walk_schema(
+                        parameter, "schema", path + (verb, "parameters", f"[{i}]", "schema"), visit
+                    )
+            for code, response in (operation.get("responses") or {}).items():
+                if isinstance(response, dict) and "schema" in response:
+                    _walk_schema(response, "schema", path + (verb, "responses", code, "schema"), visit)
+
+
+def _rewrite_references(o, references: Dict[str, str]):
+    """Rewrite (in place) the references of o according to the references mapping"""
+    if isinstance(o, dict):
+        reference = o.get("$ref")
+        if isinstance(reference, str) and reference in references:
+            o["$ref"] = references[reference]
+        for value in o.values():
+            _rewrite_references(value, references)
+    elif isinstance(o, list):
+        for value in o:
+            _rewrite_references(value, references)
+
+
+def merge_definitions(swagger: Dict) -> List[FilterAction]:
+    """Merge (in place) the identical definitions of the swagger, keeping the first one and rewriting
+    the references to the others.
+
+    As merging definitions can make other definitions identical (if they differ only by references to the
+    merged definitions), the merge is repeated until no more definitions are identical."""
+    definitions = swagger.get("definitions") or {}
+
+    actions = []
+    while True:
+        digests = _Digests()
+        first_definitions = {}
+        merged = {}
+        for name, definition in definitions.items():
+            kept = first_definitions.setdefault(digests(definition), name)
+            if kept != name:
+                merged[name] = kept
+
+        if not merged:
+            return actions
+
+        for name, kept in merged.items():
+            del definitions[name]
+            actions.append(
+                DefinitionMergedFilterAction(
+                    path=("definitions", name),
+                    reason=f"definition identical to 'definitions.{kept}' merged into it",
+                )
+            )
+        _rewrite_references(
+            swagger,
+            {f"#/definitions/{name}": f"#/definitions/{kept}" for name, kept in merged.items()},
+        )
+
+
+def _definition_name(schema: Dict, definitions: Dict) -> str:
+    """Return a name for a new definition (based on the title of the schema if any)"""
+    title = schema.get("title")
+    if isinstance(title, str):
+        name = re.sub(r"[^\w.-]", "", title)
+        if name and name not in definitions:
+            return name
+
+    i = len(definitions) + 1
+    while f"Schema{i}" in definitions:
+        i += 1
+    return f"Schema{i}"
+
+
+def extract_inline_schemas(swagger: Dict, threshold: int = 1) -> List[FilterAction]:
+    """Replace (in place) the inline schemas of the swagger identical to a definition by a reference to this
+    definition and move to the definitions the inline schemas repeated more than threshold times.
+
+    The outermost schemas are extracted first (their nested schemas are then checked in a next round
+    as, once extracted, they are counted only once)."""
+    actions = []
+    while True:
+        digests = _Digests()
+        definitions = swagger.get("definitions") or {}
+        definition_digests = {}
+        for name, definition in definitions.items():
+            if _is_candidate(definition):
+                definition_digests.setdefault(digests(definition), name)
+
+        counts = Counter()
+
+        def count(container, key, path):
+            if _is_candidate(container[key]):
+                counts[digests(container[key])] += 1
+
+        _walk_swagger(swagger, count)
+
+        repeated = {digest for digest, n in counts.items() if n > threshold}
+        if not repeated and not definition_digests.keys() & counts.keys():
+            return actions
+
+        extracted = {}
+
+        def replace(container, key, path):
+            schema = container[key]
+            if not _is_candidate(schema):
+                return
+
+            digest = digests(schema)
+            name = definition_digests.get(digest)
+            if name is not None:
+                actions.append(
+                    InlineSchemaReplacedFilterAction(
+                        path=path,
+                        reason=f"inline schema identical to 'definitions.{name}' replaced by a reference",
+                    )
+                )
+            elif digest in repeated:
+                name = extracted.get(digest)
+                if name is None:
+                    name = extracted[digest] = _definition_name(schema, definitions)
+                    swagger["definitions"] = definitions
+                    definitions[name] = schema
+                    actions.append(
+                        InlineSchemaExtractedFilterAction(
+                            path=("definitions", name),
+                            reason=f"inline schema repeated {counts[digest]} times moved to the definitions",
+                        )
+                    )
+            else:
+                return
+
+            container[key] = {"$ref": f"#/definitions/{name}"}
+
+        _walk_swagger(swagger, replace)
+
+
+def _size(swagger: Dict) -> int:
+    return len(json.dumps(swagger, separators=(",", ":"), default=str))
+
+
+def dedupe(swagger: Dict, threshold: int = 1) -> Tuple[Dict, List[FilterAction]]:
+    """
+    Deduplicate a swagger specification.
+
+    The deduplication hashes the schemas of the swagger (independently of the order of their keys) to:
+
+    - merge the identical definitions (rewriting the references to the merged definitions)
+    - replace the inline schemas identical to a definition by a reference to the definition
+    - move to the definitions the inline object schemas repeated more than threshold times
+
+    The size reduction of the swagger (as compact json) is reported as the last action.
+
+    :param swagger: the swagger spec
+    :param threshold: the number of times an inline schema can be repeated before being extracted
+    :return: deduplicated swagger, a list of actions
+    """
+    swagger = copy_swagger(swagger)
+    size_before = _size(swagger)
+
+    actions = merge_definitions(swagger)
+    actions_extract = extract_inline_schemas(swagger, threshold=threshold)
+    if actions_extract:
+        # references to the definitions may have made other definitions identical
+        actions += actions_extract + merge_definitions(swagger)
+
+    if actions:
+        size_after = _size(swagger)
+        actions.append(
+            SwaggerSizeReducedFilterAction(
+                path=(),
+                reason=f"size reduced from {size_before} to {size_after} characters "
+                f"(-{100 * (size_before - size_after) / size_before:.1f}%)",
+            )
+        )
+
+    return swagger, actions
@@ -0,0 +1,120 @@
+"""Dereferencing of a swagger (i.e. inlining of its references)"""
+from collections import Counter
+from typing import Dict, Tuple, List
+
+from oasapi.common import REFERENCE_SECTIONS, copy_swagger
+from oasapi.events import (
+    DereferenceAction,
+    ReferenceInlinedDereferenceAction,
+    RecursiveReferenceKeptDereferenceAction,
+)
+
+
+class _Dereferencer:
+    def __init__(self, swagger: Dict, shared: bool):
+        self.swagger = swagger
+        self.shared = shared
+        # (section, item) -> global item with its references inlined
+        self.resolved = {}
+        # global items being resolved
+        self.stack = []
+        # global items referring (indirectly) to themselves
+        self.recursive = set()
+        # number of times each global item has been inlined
+        self.counts = Counter()
+
+    def resolve_item(self, key: Tuple[str, str]):
+        """Return the global item with its references inlined (resolved only once)"""
+        resolved = self.resolved.get(key)
+        if resolved is None:
+            section, item = key
+            self.stack.append(key)
+            resolved = self.resolved[key] = self.walk(self.swagger[section][item])
+            self.stack.pop()
+        return resolved
+
+    def resolve_reference(self, o: Dict, reference: str):
+        """Return the object the reference refers to (or a copy of o if it is not inlined)"""
+        if not reference.startswith("#/"):
+            # not a local reference
+            return dict(o)
+
+        key = tuple(reference[2:].split("/"))
+        if (
+            len(key) != 2
+            or key[0] not in REFERENCE_SECTIONS
+            or key[1] not in self.swagger.get(key[0], {})
+        ):
+            # invalid reference, keep it as is
+            return dict(o)
+
+        if key in self.stack:
+            # recursive reference, keep it as is
+            self.recursive.add(key)
+            return dict(o)
+
+        resolved = self.resolve_item(key)
+        self.counts[key] += 1
+        return resolved if self.shared else copy_swagger(resolved)
+
+    def walk(self, o):
+        """Return a copy of o with its references inlined"""
+        if isinstance(o, dict):
+            reference = o.get("$ref")
+            if isinstance(reference, str):
+                return self.resolve_reference(o, reference)
+            return {key: self.walk(value) for key, value in o.items()}
+        elif isinstance(o, list):
+            return [self.walk(value) for value in o]
+        else:
+            return o
+
+    def run(self) -> Dict:
+        swagger = {}
+        for key, value in self.swagger.items():
+            if key in REFERENCE_SECTIONS and isinstance(value, dict):
+                swagger[key] = {item: self.resolve_item((key, item)) for item in value}
+            else:
+                swagger[key] = self.walk(value)
+        return swagger
+
+    def events(self) -> List[DereferenceAction]:
+        events = []
+        for section in REFERENCE_SECTIONS:
+            for item in self.swagger.get(section, {}):
+                key = (section, item)
+                if key in self.recursive:
+                    events.append(
+                        RecursiveReferenceKeptDereferenceAction(
+                            path=key,
+                            reason="the item refers to itself, its recursive references are kept",
+                        )
+                    )
+                if self.counts[key]:
+                    events.append(
+                        ReferenceInlinedDereferenceAction(
+                            path=key, reason=f"reference inlined {self.counts[key]} times"
+                        )
+                    )
+        return events
+
+
+def dereference(swagger: Dict, shared=True) -> Tuple[Dict, List[DereferenceAction]]:
+    """
+    Dereference a swagger specification, i.e. replace its local references by the objects they refer to.
+
+    Each global definition/response/parameter is resolved only once. If shared is True, all the references
+    to the same item are replaced by the same object (avoiding the exponential growth of the swagger
+    in memory) otherwise each reference is replaced by its own copy of the object.
+
+    The recursive references (i.e. a reference to a global item within this item) are detected and kept as is
+    (as well as the global sections to be able to resolve them). As each item is resolved only once, the items
+    resolved while resolving a recursive item keep their reference to this item.
+
+    :param swagger: the swagger spec
+    :param shared: share the objects inlined for the same global item
+    :return: dereferenced swagger, a list of actions
+    """
+    dereferencer = _Dereferencer(swagger, shared=shared)
+    swagger = dereferencer.run()
+    return swagger, dereferencer.events()
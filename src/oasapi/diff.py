@@ -0,0 +1,457 @@
+"""Structural diff between two versions of a swagger with the classification of the changes as breaking or not
+(for the clients of the old version).
+
+The identical subtrees of the two swaggers (endpoints, operations, parameters, definitions) are skipped,
+comparing their digests when the fingerprints (Merkle trees) of the swaggers are given.
+"""
+import numbers
+import reprlib
+from typing import Dict, List, Tuple, Union
+
+from oasapi.common import OPERATIONS_LOWER, _index_path
+from oasapi.events import (
+    DiffChange,
+    OperationAddedDiffChange,
+    OperationRemovedDiffChange,
+    OperationChangedDiffChange,
+    ParameterAddedDiffChange,
+    ParameterRemovedDiffChange,
+    ParameterChangedDiffChange,
+    DefinitionAddedDiffChange,
+    DefinitionRemovedDiffChange,
+    DefinitionChangedDiffChange,
+    Reason,
+)
+from oasapi.fingerprint import Fingerprint
+
+# sentinel for a missing key
+MISSING = object()
+
+# the constraints narrowing the accepted values when decreased (upper bounds) or increased (lower bounds)
+UPPER_BOUNDS = {"maximum", "maxLength", "maxItems", "maxProperties"}
+LOWER_BOUNDS = {"minimum", "minLength", "minItems", "minProperties"}
+
+# the keys which change is always breaking
+BREAKING_KEYS = {
+    "type",
+    "format",
+    "pattern",
+    "$ref",
+    "collectionFormat",
+    "allowEmptyValue",
+    "additionalProperties",
+    "allOf",
+    "uniqueItems",
+    "multipleOf",
+    "operationId",
+    "security",
+}
+
+# the keys of the schemas compared recursively
+NESTED_KEYS = {"schema", "items"}
+
+# the keys with lists of values which removals are breaking (and additions are not)
+LIST_KEYS = {"consumes", "produces", "schemes"}
+
+#: a difference found between two objects (breaking, description)
+Difference = Tuple[bool, str]
+
+
+def _format(value) -> str:
+    return "none" if value is MISSING else reprlib.repr(value)
+
+
+def compare_objects(old: Dict, new: Dict, prefix: str = "") -> List[Difference]:
+    """Return the differences between two objects (schemas, parameters, responses or operations without
+    their parameters) with, for each, if it is breaking.
+
+    The breaking differences are the ones narrowing the values accepted or changing their types
+    (e.g. type/format changed, enum values removed, maximum decreased, new required properties or parameter
+    becoming required), the removals of properties and of consumes/produces/schemes values
+    and the changes of security and of operationId.
+    """
+    if old == new:
+        return []
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return [(True, f"'{prefix.rstrip('.') or '.'}' replaced")]
+
+    differences = []
+    for key in list(old) + [key for key in new if key not in old]:
+        old_value, new_value = old.get(key, MISSING), new.get(key, MISSING)
+        if old_value == new_value:
+            continue
+        label = f"{prefix}{key}"
+
+        if key == "enum":
+            if old_value is MISSING:
+                differences.append((True, f"'{label}' added"))
+            elif new_value is MISSING:
+                differences.append((False, f"'{label}' removed"))
+            else:
+                removed = [value for value in old_value if value not in new_value]
+                added = [value for value in new_value if value not in old_value]
+                if removed:
+                    differences.append((True, f"'{label}' values {removed} removed"))
+                if added:
+                    differences.append((False, f"'{label}' values {added} added"))
+                if not removed and not added:
+                    differences.append((False, f"'{label}' values reordered"))
+        elif key in UPPER_BOUNDS or key in LOWER_BOUNDS:
+            if new_value is MISSING:
+                narrowed = False
+            elif old_value is MISSING:
+                narrowed = True
+            elif not (isinstance(old_value, numbers.Real) and isinstance(new_value, numbers.Real)):
+                # a bound that is not a number (in an invalid swagger) cannot be compared
+                differences.append(
+                    (True, f"'{label}' changed from {_format(old_value)} to {_format(new_value)}")
+                )
+                continue
+            else:
+                narrowed = new_value < old_value if key in UPPER_BOUNDS else new_value > old_value
+            differences.append(
+                (
+                    narrowed,
+                    f"'{label}' {'narrowed' if narrowed else 'widened'} "
+                    f"from {_format(old_value)} to {_format(new_value)}",
+                )
+            )
+        elif key in ("exclusiveMaximum", "exclusiveMinimum"):
+            differences.append((new_value is True, f"'{label}' changed to {_format(new_value)}"))
+        elif key == "required" and isinstance(
+            new_value if old_value is MISSING else old_value, list
+        ):
+            # required properties of a schema
+            old_required = old_value if isinstance(old_value, list) else []
+            new_required = new_value if isinstance(new_value, list) else []
+            added = [name for name in new_required if name not in old_required]
+            if added:
+                differences.append((True, f"'{label}' properties {added} added"))
+            removed = [name for name in old_required if name not in new_required]
+            if removed:
+                differences.append((False, f"'{label}' properties {removed} removed"))
+        elif key == "required":
+            # required flag of a parameter (a parameter without the flag is not required)
+            required = new_value is True
+            if required != (old_value is True):
+                differences.append(
+                    (required, "now required" if required else "not required anymore")
+                )
+        elif (
+            key in ("properties", "responses")
+            and isinstance(old_value, dict)
+            and isinstance(new_value, dict)
+        ):
+            for name in list(old_value) + [name for name in new_value if name not in old_value]:
+                if name not in new_value:
+                    # a removed property or a removed success response
+                    breaking = key == "properties" or str(name).startswith("2")
+                    differences.append((breaking, f"'{label}.{name}' removed"))
+                elif name not in old_value:
+                    differences.append((False, f"'{label}.{name}' added"))
+                else:
+                    differences += compare_objects(
+                        old_value[name], new_value[name], f"{label}.{name}."
+                    )
+        elif key in NESTED_KEYS:
+            if old_value is MISSING or new_value is MISSING:
+                differences.append(
+                    (True, f"'{label}' {'added' if old_value is MISSING else 'removed'}")
+                )
+            else:
+                differences += compare_objects(old_value, new_value, f"{label}.")
+        elif key in LIST_KEYS and isinstance(old_value, list) and isinstance(new_value, list):
+            removed = [value for value in old_value if value not in new_value]
+            if removed:
+                differences.append((True, f"'{label}' values {removed} removed"))
+            added = [value for value in new_value if value not in old_value]
+            if added:
+                differences.append((False, f"'{label}' values {added} added"))
+        elif key in BREAKING_KEYS or key in LIST_KEYS:
+            differences.append(
+                (True, f"'{label}' changed from {_format(old_value)} to {_format(new_value)}")
+            )
+        else:
+            # documentation (description, summary, example, ...) and extensions
+            differences.append((False, f"'{label}' changed"))
+
+    return differences
+
+
+def _digest(tree: Fingerprint, path):
+    """Return the digest of the node at the path (None if there is no node at the path)"""
+    try:
+        return tree[path]
+    except KeyError:
+        return None
+
+
+def _value(swagger: Dict, path):
+    """Return the value at the path (MISSING if there is no value at the path)"""
+    for key in path:
+        if not isinstance(swagger, dict):
+            return MISSING
+        swagger = swagger.get(key, MISSING)
+    return swagger
+
+
+def _same_subtrees(old_swagger: Union[Dict, Fingerprint], new_swagger: Union[Dict, Fingerprint]):
+    """Return a function telling if the subtrees at a path of the two swaggers are identical,
+    comparing the digests of the subtrees for two fingerprints and the subtrees themselves otherwise
+    (a comparison of dicts being faster than the fingerprinting of the swaggers)"""
+    if isinstance(old_swagger, Fingerprint) and isinstance(new_swagger, Fingerprint):
+        return lambda *path: _digest(old_swagger, path) == _digest(new_swagger, path)
+
+    old = old_swagger.swagger if isinstance(old_swagger, Fingerprint) else old_swagger
+    new = new_swagger.swagger if isinstance(new_swagger, Fingerprint) else new_swagger
+    return lambda *path: _value(old, path) == _value(new, path)
+
+
+def _parameters(
+    swagger: Dict, endpoint: str, verb: str
+) -> Dict[Tuple[str, str], Tuple[Tuple, Dict]]:
+    """Return the parameters of the operation (resolving the references to the global parameters
+    and overriding the parameters of the endpoint by the ones of the operation) by their (name, in)
+    with the path where they are defined"""
+    global_parameters = swagger.get("parameters") or {}
+    endpoint_value = swagger["paths"][endpoint]
+    parameters = {}
+    for base_path, parameters_list in [
+        (("paths", endpoint, "parameters"), endpoint_value.get("parameters")),
+        (("paths", endpoint, verb, "parameters"), endpoint_value[verb].get("parameters")),
+    ]:
+        for i, parameter in enumerate(parameters_list or []):
+            if not isinstance(parameter, dict):
+                continue
+            ref = parameter.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/parameters/"):
+                parameter = global_parameters.get(ref.rpartition("/")[2], parameter)
+            parameters[parameter.get("name"), parameter.get("in")] = (
+                base_path + _index_path(i),
+                parameter,
+            )
+    return parameters
+
+
+def _references(swagger: Dict, endpoint: str, verb: str):
+    """Return the names of the global parameters referred to by the operation"""
+    endpoint_value = swagger["paths"][endpoint]
+    return {
+        parameter["$ref"].rpartition("/")[2]
+        for parameters_list in [
+            endpoint_value.get("parameters"),
+            endpoint_value[verb].get("parameters"),
+        ]
+        for parameter in parameters_list or []
+        if isinstance(parameter, dict)
+        and str(parameter.get("$ref", "")).startswith("#/parameters/")
+    }
+
+
+def _changed_names(old: Dict, new: Dict, same, section: str):
+    """Return the names of the items of the section (e.g. definitions) added, removed or changed"""
+    if same(section):
+        return []
+    old_items = old.get(section) or {}
+    new_items = new.get(section) or {}
+    return [
+        name
+        for name in list(old_items) + [name for name in new_items if name not in old_items]
+        if not same(section, name)
+    ]
+
+
+def _diff_parameters(old: Dict, new: Dict, endpoint: str, verb: str) -> List[DiffChange]:
+    """Return the changes of the parameters of an operation"""
+    changes = []
+    old_parameters = _parameters(old, endpoint, verb)
+    new_parameters = _parameters(new, endpoint, verb)
+
+    for key in list(old_parameters) + [key for key in new_parameters if key not in old_parameters]:
+        name, location = key
+        path, _ = new_parameters.get(key) or old_parameters[key]
+        # the parameters of the endpoint are reported for the endpoint (once for all its operations)
+        label = (
+            f"endpoint '{endpoint}'" if len(path) == 4 else f"operation '{verb.upper()} {endpoint}'"
+        )
+        if key not in new_parameters:
+            changes.append(
+                ParameterRemovedDiffChange(
+                    path=path,
+                    reason=Reason(
+                        "the {} parameter '{}' of the {} has been removed", location, name, label
+                    ),
+                    breaking=False,
+                    parameter_name=name,
+                )
+            )
+        elif key not in old_parameters:
+            parameter = new_parameters[key][1]
+            required = parameter.get("required") is True
+            changes.append(
+                ParameterAddedDiffChange(
+                    path=path,
+                    reason=Reason(
+                        "the {} parameter '{}' of the {} has been added{}",
+                        location,
+                        name,
+                        label,
+                        " (required)" if required else "",
+                    ),
+                    breaking=required,
+                    parameter_name=name,
+                )
+            )
+        else:
+            differences = compare_objects(old_parameters[key][1], new_parameters[key][1])
+            if differences:
+                changes.append(
+                    ParameterChangedDiffChange(
+                        path=path,
+                        reason=Reason(
+                            "the {} parameter '{}' of the {} has changed: {}",
+                            location,
+                            name,
+                            label,
+                            ", ".join(description for _, description in differences),
+                        ),
+                        breaking=any(breaking for breaking, _ in differences),
+                        parameter_name=name,
+                    )
+                )
+
+    return changes
+
+
+def diff(
+    old_swagger: Union[Dict, Fingerprint], new_swagger: Union[Dict, Fingerprint]
+) -> List[DiffChange]:
+    """
+    Compare two versions of a swagger and return the changes of their operations, parameters and definitions.
+
+    Each change is classified as breaking or not for the clients of the old version: the removed operations,
+    the new required parameters, the narrowed constraints (enum values removed, maximum decreased, ...),
+    the changed types, ... are breaking.
+
+    The identical subtrees of the swaggers are skipped. When the swaggers are given as their fingerprints
+    (e.g. kept up to date with :py:meth:`Fingerprint.update`), the subtrees are compared by their digests.
+
+    :param old_swagger: the old version of the swagger (or its fingerprint)
+    :param new_swagger: the new version of the swagger (or its fingerprint)
+    :return: a list of changes
+    """
+    same = _same_subtrees(old_swagger, new_swagger)
+    if same():
+        return []
+    old = old_swagger.swagger if isinstance(old_swagger, Fingerprint) else old_swagger
+    new = new_swagger.swagger if isinstance(new_swagger, Fingerprint) else new_swagger
+
+    changes = []
+
+    # the global parameters changed impact the operations referring to them
+    changed_parameters = set(_changed_names(old, new, same, "parameters"))
+
+    old_paths, new_paths = old.get("paths") or {}, new.get("paths") or {}
+    for endpoint in list(old_paths) + [
+        endpoint for endpoint in new_paths if endpoint not in old_paths
+    ]:
+        if not changed_parameters and same("paths", endpoint):
+            continue
+
+        old_endpoint = old_paths.get(endpoint)
+        new_endpoint = new_paths.get(endpoint)
+        old_endpoint = old_endpoint if isinstance(old_endpoint, dict) else {}
+        new_endpoint = new_endpoint if isinstance(new_endpoint, dict) else {}
+        endpoint_parameters_changed = not same("paths", endpoint, "parameters")
+
+        for verb in OPERATIONS_LOWER:
+            old_operation, new_operation = old_endpoint.get(verb), new_endpoint.get(verb)
+            if old_operation is None and new_operation is None:
+                continue
+            path = ("paths", endpoint, verb)
+            label = f"{verb.upper()} {endpoint}"
+
+            if new_operation is None:
+                changes.append(
+                    OperationRemovedDiffChange(
+                        path=path,
+                        reason=Reason("the operation '{}' has been removed", label),
+                        breaking=True,
+                    )
+                )
+                continue
+            if old_operation is None:
+                changes.append(
+                    OperationAddedDiffChange(
+                        path=path,
+                        reason=Reason("the operation '{}' has been added", label),
+                        breaking=False,
+                    )
+                )
+                continue
+
+            operation_changed = not same(*path)
+            if operation_changed:
+                differences = compare_objects(
+                    {key: value for key, value in old_operation.items() if key != "parameters"},
+                    {key: value for key, value in new_operation.items() if key != "parameters"},
+                )
+                if differences:
+                    changes.append(
+                        OperationChangedDiffChange(
+                            path=path,
+                            reason=Reason(
+                                "the operation '{}' has changed: {}",
+                                label,
+                                ", ".join(description for _, description in differences),
+                            ),
+                            breaking=any(breaking for breaking, _ in differences),
+                        )
+                    )
+
+            if (
+                operation_changed
+                or endpoint_parameters_changed
+                or (
+                    changed_parameters
+                    and changed_parameters
+                    & (_references(old, endpoint, verb) | _references(new, endpoint, verb))
+                )
+            ):
+                changes += _diff_parameters(old, new, endpoint, verb)
+
+    old_definitions, new_definitions = old.get("definitions") or {}, new.get("definitions") or {}
+    for name in _changed_names(old, new, same, "definitions"):
+        path = ("definitions", name)
+        if name not in new_definitions:
+            changes.append(
+                DefinitionRemovedDiffChange(
+                    path=path,
+                    reason=Reason("the definition '{}' has been removed", name),
+                    breaking=True,
+                )
+            )
+        elif name not in old_definitions:
+            changes.append(
+                DefinitionAddedDiffChange(
+                    path=path,
+                    reason=Reason("the definition '{}' has been added", name),
+                    breaking=False,
+                )
+            )
+        else:
+            differences = compare_objects(old_definitions[name], new_definitions[name])
+            changes.append(
+                DefinitionChangedDiffChange(
+                    path=path,
+                    reason=Reason(
+                        "the definition '{}' has changed: {}",
+                        name,
+                        ", ".join(description for _, description in differences),
+                    ),
+                    breaking=any(breaking for breaking, _ in differences),
+                )
+            )
+
+    # the changes of the parameters of an endpoint are reported once (and not for each of its operations)
+    return list(dict.fromkeys(changes))
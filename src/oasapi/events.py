@@ -1,12 +1,53 @@
+import copy
+from collections.abc import MutableSet
 from typing import Iterable, Union, Dict, Tuple
 
-from attr import dataclass
+from attr import dataclass, attrib, fields
 
 #: the type of a swagger path
 SwaggerPath = Tuple[Union[int, str], ...]
 
 
-@dataclass(frozen=True)
+class Reason:
+    """A reason of an event formatted only when rendered (as ``template.format(*args)``).
+
+    The mutable args (e.g. the enum list of a parameter) are copied when the reason is created, so the reason
+    does not change if the swagger is modified afterwards.
+    It compares equal to the reasons and strings with the same formatted string.
+    """
+
+    __slots__ = ("template", "args")
+
+    def __init__(self, template: str, *args):
+        self.template = template
+        self.args = tuple(
+            copy.deepcopy(arg) if isinstance(arg, (list, dict, set)) else arg for arg in args
+        )
+
+    def __str__(self):
+        return self.template.format(*self.args)
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __eq__(self, other):
+        if isinstance(other, Reason):
+            if self.template == other.template and self.args == other.args:
+                # equal without formatting them
+                return True
+            return str(self) == str(other)
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class Event:
     """Base class for an event (an error, an action, ...).
     """
@@ -14,8 +55,9 @@ class Event:
     #: the path in the dictionary to which the even relates
     path: SwaggerPath
 
-    #: the reason of the event
-    reason: str
+    #: the reason of the event (a string or a lazily formatted :py:class:`Reason`),
+    #: not used in the hash of the event
+    reason: Union[str, Reason] = attrib(hash=False)
 
     #: the string representation of the type of event
     type: str
@@ -25,13 +67,56 @@ class Event:
         """Format a path to a JSON Path alike string"""
         return ".".join(map(str, path))
 
+    def as_dict(self) -> Dict:
+        """Return the event as a json serializable dict with the name of its class and all its fields
+        (including the fields of its subclass, e.g. operationId)"""
+        result = {"event": type(self).__name__}
+        for field in fields(type(self)):
+            value = getattr(self, field.name)
+            if field.name == "reason":
+                value = str(value)
+            result[field.name] = value
+        return result
+
+
+class EventSet(MutableSet):
+    """A set of events iterated in the order in which they were added (so that the events are reported
+    in the order they are produced, whatever the hash seed, instead of being sorted afterwards).
+
+    It compares equal to the sets with the same events and its unions keep the order of their operands.
+    """
+
+    __slots__ = ("_events",)
+
+    def __init__(self, events: Iterable[Event] = ()):
+        # a dict keeps the order of its keys
+        self._events = dict.fromkeys(events)
+
+    def __contains__(self, event):
+        return event in self._events
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, event: Event):
+        self._events[event] = None
+
+    def discard(self, event: Event):
+        self._events.pop(event, None)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self._events)!r})"
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class Action(Event):
     type: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class Error(Event):
     """Base class for an error
     """
@@ -39,22 +124,37 @@ class Error(Event):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class Warning(Event):
     type: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class FilterError(Error):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class FilterWarning(Warning):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class BundleError(Error):
+    pass
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class FleetError(Error):
+    pass
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class FleetWarning(Warning):
+    pass
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class ValidationError(Error):
     """Base class for a validation error (used in the swagger validation)
     """
@@ -62,109 +162,287 @@ class ValidationError(Error):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class FilterAction(Action):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class ValidationAction(Action):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class BundleAction(Action):
+    pass
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class DereferenceAction(Action):
+    pass
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class ReferenceNotFoundFilterError(FilterError):
     type: str = "Reference not found"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class PathsEmptyFilterError(FilterError):
     type: str = "Path is empty"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class ReferenceNotUsedFilterAction(FilterAction):
     type: str = "Reference filtered out"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class SecurityDefinitionNotUsedFilterAction(FilterAction):
     type: str = "Security definition removed"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class OAuth2ScopeNotUsedFilterAction(FilterAction):
     type: str = "Oauth2 scope removed"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class TagNotUsedFilterAction(FilterAction):
     type: str = "Tag definition removed"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class EndpointRenamedFilterAction(FilterAction):
     old_path: str
     new_path: str
     type: str = "Endpoint renamed by regexp"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class EndpointsReplacedFilterAction(FilterAction):
     new_paths: Dict
     type: str = "All paths are replaced by explicit paths from mode==DYNAMIC"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class EndpointOutByRegexFilterAction(FilterAction):
     type: str = "Endpoint filtered out by regexp"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class TagFilteredOutFilterAction(FilterAction):
     type: str = "Tag filtered out"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class EndpointOutByTagFilterAction(FilterAction):
     type: str = "Endpoint filtered out by tag"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class OperationRemovedFilterAction(FilterAction):
     type: str = "Operation removed as no filter matched."
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class OperationChangedFilterAction(FilterAction):
     type: str = "Operation was modified to match filters."
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class BasePathEndpointConflictFilterWarning(FilterWarning):
     type: str = "New basePath incompatible with endpoint path"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class EndpointOutByBasePathFilterAction(FilterAction):
     type: str = "Endpoint filtered out as incompatible with new basePath"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class EndpointPathNormalisedFilterAction(FilterAction):
     old_path: str
     new_path: str
     type: str = "Endpoint normalised for new basePath"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class BasePathRewrittenFilterAction(FilterAction):
     old_base_path: str
     new_base_path: str
     type: str = "basePath rewritten"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class DefinitionMergedFilterAction(FilterAction):
+    """A definition identical to another definition merged into it"""
+
+    type: str = "Duplicate definition merged"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class InlineSchemaExtractedFilterAction(FilterAction):
+    """An inline schema repeated in the swagger moved to the definitions"""
+
+    type: str = "Inline schema extracted"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class InlineSchemaReplacedFilterAction(FilterAction):
+    """An inline schema identical to a definition replaced by a reference to the definition"""
+
+    type: str = "Inline schema replaced by reference"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class SwaggerSizeReducedFilterAction(FilterAction):
+    """The size reduction of the swagger (as json)"""
+
+    type: str = "Swagger size reduced"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class ExternalReferenceBundledBundleAction(BundleAction):
+    """An external reference to a global item bundled in the swagger"""
+
+    type: str = "External reference bundled"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class ExternalReferenceInlinedBundleAction(BundleAction):
+    """An external reference replaced by the object it refers to"""
+
+    type: str = "External reference inlined"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class ExternalReferenceNotFoundBundleError(BundleError):
+    """An external reference that could not be resolved"""
+
+    type: str = "External reference not found"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class ExternalReferenceCycleBundleError(BundleError):
+    """An external reference to inline that refers (indirectly) to itself"""
+
+    type: str = "External reference cycle"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class ReferenceInlinedDereferenceAction(DereferenceAction):
+    """The references to a global item replaced by the item"""
+
+    type: str = "Reference inlined"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class RecursiveReferenceKeptDereferenceAction(DereferenceAction):
+    """A global item referring to itself for which the recursive references are kept"""
+
+    type: str = "Recursive reference kept"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class DuplicateOperationIdFleetError(FleetError):
+    """An operationId used by operations of several swaggers"""
+
+    #: the name of the duplicate operationId
+    operationId: str
+    type: str = "Duplicate operationId across swaggers"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class DuplicateOperationFleetError(FleetError):
+    """An operation (verb and path including the basePath) defined in several swaggers"""
+
+    type: str = "Duplicate operation across swaggers"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class ConflictingDefinitionFleetWarning(FleetWarning):
+    """A definition with the same name but a different content in several swaggers"""
+
+    type: str = "Conflicting definition across swaggers"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class DiffChange(Event):
+    """Base class for a change between two versions of a swagger"""
+
+    #: True if the change may break the clients of the old version of the swagger
+    breaking: bool
+    type: str
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class OperationAddedDiffChange(DiffChange):
+    """An operation added in the new swagger"""
+
+    type: str = "Operation added"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class OperationRemovedDiffChange(DiffChange):
+    """An operation of the old swagger removed in the new swagger"""
+
+    type: str = "Operation removed"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class OperationChangedDiffChange(DiffChange):
+    """An operation changed (outside of its parameters) in the new swagger"""
+
+    type: str = "Operation changed"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class ParameterAddedDiffChange(DiffChange):
+    """A parameter added to an operation in the new swagger"""
+
+    parameter_name: str
+    type: str = "Parameter added"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class ParameterRemovedDiffChange(DiffChange):
+    """A parameter of an operation removed in the new swagger"""
+
+    parameter_name: str
+    type: str = "Parameter removed"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class ParameterChangedDiffChange(DiffChange):
+    """A parameter of an operation changed in the new swagger"""
+
+    parameter_name: str
+    type: str = "Parameter changed"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class DefinitionAddedDiffChange(DiffChange):
+    """A definition added in the new swagger"""
+
+    type: str = "Definition added"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class DefinitionRemovedDiffChange(DiffChange):
+    """A definition of the old swagger removed in the new swagger"""
+
+    type: str = "Definition removed"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class DefinitionChangedDiffChange(DiffChange):
+    """A definition changed in the new swagger"""
+
+    type: str = "Definition changed"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class ParameterDefinitionValidationError(ValidationError):
     """An error on a parameter definition"""
 
@@ -172,42 +450,52 @@ class ParameterDefinitionValidationError(ValidationError):
     type: str = "Parameter definition error"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
+class RequestParameterValidationError(ValidationError):
+    """An error on the value of a parameter in a request (the path is the one of the parameter definition)"""
+
+    parameter_name: str
+    #: the location of the parameter (path, query, header, formData or body)
+    location: str
+    type: str = "Request parameter error"
+
+
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class ReferenceNotFoundValidationError(ValidationError):
     """An error on a reference used but not found"""
 
     type: str = "Reference not found"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class ReferenceInvalidSyntax(ValidationError):
     """An error on a reference that has not a valid syntax"""
 
     type: str = "Reference invalid syntax"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class ReferenceInvalidSection(ValidationError):
     """An error on a reference that refers to a invalid section"""
 
     type: str = "Reference invalid section"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class SecurityDefinitionNotFoundValidationError(ValidationError):
     """An error on a securityDefinition used but not found"""
 
     type: str = "Security definition not found"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class OAuth2ScopeNotFoundInSecurityDefinitionValidationError(ValidationError):
     """An error on an OAuth2 scope used but not found"""
 
     type: str = "Security scope not found"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class DuplicateOperationIdValidationError(ValidationError):
     """An error on two operations using the same operationId
     """
@@ -219,14 +507,14 @@ class DuplicateOperationIdValidationError(ValidationError):
     type: str = "Duplicate operationId"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class JsonSchemaValidationError(ValidationError):
     """An error due to an invalid schema"""
 
     type: str = "Json schema validator error"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, cache_hash=True)
 class BasePathValidationAction(ValidationAction):
     old_path: str
     new_path: str
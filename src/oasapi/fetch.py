@@ -0,0 +1,189 @@
+"""Concurrent fetching of documents over HTTP(S) with persistent (keep-alive) connections"""
+import http.client
+import io
+import logging
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Union
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+from urllib.request import Request, getproxies, proxy_bypass
+
+logger = logging.getLogger(__name__)
+
+#: statuses of the transient failures for which the request is retried
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+#: statuses of the redirections followed
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+
+class Fetcher:
+    """Fetch documents over HTTP(S) with a pool of max_workers threads.
+
+    Each thread keeps a persistent (keep-alive) connection per host. The transient failures (connection errors
+    and 429/5xx statuses) are retried up to retries times, waiting backoff, 2*backoff, 4*backoff, ... seconds
+    between the attempts. The redirections are followed.
+
+    The proxies of the environment (http_proxy, https_proxy, no_proxy) are used as with urlopen.
+    """
+
+    def __init__(
+        self, max_workers: int = 8, retries: int = 2, backoff: float = 0.5, timeout: float = 30
+    ):
+        if max_workers <= 0:
+            raise ValueError(
+                f"The max_workers of the fetcher should be positive (got {max_workers})."
+            )
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._proxies = getproxies()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close all the connections opened by the threads"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        """Return the connection of the current thread to the host (opening it if needed)"""
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+
+        connection = connections.get((scheme, netloc))
+        if connection is None:
+            host = netloc.rpartition("@")[2]
+            proxy = self._proxies.get(scheme)
+            if proxy and not proxy_bypass(host.partition(":")[0]):
+                # connect to the proxy (tunneling the https connections through it)
+                proxy_netloc = urlsplit(proxy).netloc
+                if scheme == "https":
+                    connection = http.client.HTTPSConnection(
+                        proxy_netloc, timeout=self.timeout, context=ssl.create_default_context()
+                    )
+                    connection.set_tunnel(host)
+                else:
+                    connection = http.client.HTTPConnection(proxy_netloc, timeout=self.timeout)
+                connection.oasapi_proxied = scheme == "http"
+            elif scheme == "https":
+                connection = http.client.HTTPSConnection(
+                    host, timeout=self.timeout, context=ssl.create_default_context()
+                )
+            else:
+                connection = http.client.HTTPConnection(host, timeout=self.timeout)
+            connections[scheme, netloc] = connection
+            with self._lock:
+                self._connections.append(connection)
+
+        return connection
+
+    def _drop_connection(self, scheme: str, netloc: str):
+        """Close the connection of the current thread to the host (after a failure)"""
+        connection = self._local.connections.pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def _request(self, url: str, headers: dict) -> http.client.HTTPResponse:
+        """Send a GET request on the connection to the host of the url, retrying once on a new connection
+        if a reused connection has been closed by the server"""
+        scheme, netloc, path, query, _ = urlsplit(url)
+        if scheme not in {"http", "https"}:
+            raise ValueError(f"unknown url type: '{url}'")
+        target = (path or "/") + (f"?{query}" if query else "")
+
+        for reconnect in (False, True):
+            connection = self._connection(scheme, netloc)
+            reused = connection.sock is not None
+            try:
+                connection.request(
+                    "GET",
+                    url if getattr(connection, "oasapi_proxied", False) else target,
+                    headers=headers,
+                )
+                return connection.getresponse()
+            except (http.client.HTTPException, OSError):
+                self._drop_connection(scheme, netloc)
+                if not reused or reconnect:
+                    raise
+
+    def open(self, request: Union[str, Request]) -> http.client.HTTPResponse:
+        """Send a GET request and return its response.
+
+        As with urlopen, the request can be an url or a Request (for its headers) and an HTTPError is raised for
+        the statuses that are not successful (including 304 Not Modified).
+        """
+        if isinstance(request, Request):
+            url, headers = request.full_url, dict(request.header_items())
+        else:
+            url, headers = request, {}
+        headers.setdefault("User-Agent", "oasapi")
+
+        attempt = redirects = 0
+        while True:
+            try:
+                response = self._request(url, headers)
+            except (http.client.HTTPException, OSError) as err:
+                if attempt >= self.retries:
+                    raise
+                logger.debug(f"Retrying to fetch '{url}' after the error {err!r}")
+            else:
+                if response.status < 300:
+                    return response
+
+                # read the body to release the connection for the next requests
+                body = response.read()
+                if response.status in REDIRECT_STATUSES and "Location" in response.headers:
+                    redirects += 1
+                    if redirects > MAX_REDIRECTS:
+                        raise HTTPError(
+                            url, response.status, "Too many redirections", response.headers, None
+                        )
+                    url = urljoin(url, response.headers["Location"])
+                    continue
+                if response.status not in RETRY_STATUSES or attempt >= self.retries:
+                    raise HTTPError(
+                        url, response.status, response.reason, response.headers, io.BytesIO(body)
+                    )
+                logger.debug(f"Retrying to fetch '{url}' after the status {response.status}")
+
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    def fetch(self, url: str) -> bytes:
+        """Return the body of the document at the url"""
+        with self.open(url) as response:
+            return response.read()
+
+    def fetch_all(
+        self, urls: Iterable[str], fetch: Callable[[str], Any] = None
+    ) -> List[Union[Any, Exception]]:
+        """Fetch concurrently the urls and return their results (or the exceptions raised) in the order of the urls.
+
+        The fetch function (by default :py:meth:`fetch`) is called in the threads of the pool with each url:
+        it can parse the body just downloaded (while the other documents are downloaded).
+        """
+        fetch = fetch or self.fetch
+
+        def call(url):
+            try:
+                return fetch(url)
+            except Exception as err:
+                return err
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(call, urls))
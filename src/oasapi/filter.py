@@ -1,13 +1,17 @@
-import copy
+import itertools
+import json
 import re
+import shutil
+import tempfile
 from functools import reduce
-from typing import Dict, Tuple, List, Set
+from typing import Dict, Tuple, List, Set, TextIO, Iterator
 
 import deepmerge
 from attr import dataclass
 
-from oasapi.common import get_elements, JSPATH_OPERATIONS
+from oasapi.common import get_elements, JSPATH_OPERATIONS, OPERATIONS_LOWER, copy_swagger
 from oasapi.events import FilterAction, OperationRemovedFilterAction, OperationChangedFilterAction
+from oasapi.streaming import JsonReader
 
 
 @dataclass
@@ -33,9 +37,17 @@ class FilterCondition:
                 re.compile(op.rstrip("$") + "$", re.IGNORECASE) for op in self.operations
             ]
 
+    def key(self) -> Tuple:
+        """Return a canonical and hashable form of the condition (e.g. to use it in a cache key)."""
+        return (
+            None if self.tags is None else frozenset(self.tags),
+            None if self.operations is None else tuple(self.operations),
+            None if self.security_scopes is None else frozenset(self.security_scopes),
+        )
+
 
 def filter(
-    swagger: Dict, mode="keep_only", conditions: List[FilterCondition] = None
+    swagger: Dict, mode="keep_only", conditions: List[FilterCondition] = None, dry_run=False
 ) -> Tuple[Dict, List[FilterAction]]:
     """
     Filter endpoints of a swagger specification.
@@ -53,9 +65,13 @@ def filter(
       the scopes in the security_scopes
     Any of these fields can be None to avoid matching on the field criteria.
 
+    If dry_run is True, the swagger is neither copied nor filtered: it is returned unchanged with
+    the actions that the filtering would do.
+
     :param mode:
     :param conditions:
     :param swagger: the swagger spec
+    :param dry_run: only compute the actions
     :return: filtered swagger, a set of actions
     """
     if mode != "keep_only":
@@ -64,42 +80,54 @@ def filter(
     if conditions is None:
         return swagger, []
 
-    swagger = copy.deepcopy(swagger)
+    if not dry_run:
+        swagger = copy_swagger(swagger)
 
     global_security = swagger.get("security")
+    # the filter returns only the fields of the operations it changes (without copying the operations)
     filter = generate_filter_conditions(
-        conditions, merge_matches=True, global_security=global_security
+        conditions,
+        merge_matches=True,
+        global_security=global_security,
+        security_definitions=swagger.get("securityDefinitions"),
+        compare_only=True,
     )
 
     # if global security defined, filter it also
+    inherited_security_matches = True
     if global_security is not None and filter.on_security_scopes_useful:
-        match = filter((), swagger, on_tags=False, on_operations=False)
+        match = filter((), {"security": global_security}, on_tags=False, on_operations=False)
         if match:
-            swagger = match
+            if not dry_run:
+                swagger["security"] = match["security"]
         else:
-            # TODO: as the global security does not match with the conditions
-            #       we could already remove from the paths all operations with no
-            #       security defined (optimization trick)
-            del swagger["security"]
-
-    # get operations to keep
-    operations_to_keep = {
-        path: filter(path, operation)
-        for key, operation, path in get_elements(swagger, JSPATH_OPERATIONS)
-    }
-    # update the paths
+            # as the global security does not match with the conditions, all operations
+            # inheriting it (i.e. with no security defined) can already be removed
+            inherited_security_matches = False
+            if not dry_run:
+                del swagger["security"]
+
+    # evaluate the operations to keep (without keeping the unchanged ones)
     actions = []
-    paths = swagger["paths"]
-    for path, new_value in operations_to_keep.items():
-        (_, endpoint, verb) = path
-        if new_value is not False:
-            if paths[endpoint][verb] != new_value:
+    changes = []
+    for key, operation, path in get_elements(swagger, JSPATH_OPERATIONS):
+        if inherited_security_matches or "security" in operation:
+            fields = filter(path, operation)
+        else:
+            fields = False
+
+        if fields is not False:
+            if any(
+                field not in operation or operation[field] != value
+                for field, value in fields.items()
+            ):
                 actions.append(
                     OperationChangedFilterAction(
                         path=path, reason="The operation has been modified by a filter."
                     )
                 )
-                paths[endpoint][verb] = new_value
+                # the swagger is a copy, its operation can be reused with the new fields
+                changes.append((path, {**operation, **fields}))
         else:
             actions.append(
                 OperationRemovedFilterAction(
@@ -107,19 +135,169 @@ def filter(
                     reason="The operation has been removed as it does not match any filter.",
                 )
             )
-            del paths[endpoint][verb]
+            changes.append((path, None))
+
+    # update the paths
+    if not dry_run:
+        paths = swagger["paths"]
+        for (_, endpoint, verb), new_value in changes:
+            if new_value is None:
+                del paths[endpoint][verb]
+            else:
+                paths[endpoint][verb] = new_value
 
     return swagger, actions
 
 
+def _read_security(input: TextIO) -> Tuple[List, Dict]:
+    """Read the global security and the securityDefinitions of a swagger in a JSON stream
+    (reading the other sections item by item)"""
+    sections = {}
+    reader = JsonReader(input)
+    for key, _ in reader.items():
+        if key in ("security", "securityDefinitions"):
+            sections[key], _ = reader.read()
+            if len(sections) == 2:
+                break
+        elif reader.peek() == "{":
+            for _ in reader.items():
+                reader.read()
+        else:
+            reader.read()
+    return sections.get("security"), sections.get("securityDefinitions")
+
+
+def filter_stream(
+    input: TextIO, output: TextIO, mode="keep_only", conditions: List[FilterCondition] = None
+) -> Iterator[FilterAction]:
+    """
+    Filter endpoints of a swagger specification in JSON read from the input stream and written
+    to the output stream (see :py:func:`filter` for the mode and conditions).
+
+    The actions are generated while the swagger is filtered: the swagger is written to the output
+    as the actions are iterated (e.g. with ``list(filter_stream(input, output, conditions=...))``).
+
+    The swagger is never loaded in memory as a whole: it is read and written incrementally, the sections
+    are passed through item by item with their original text and only one path item is loaded at a time
+    to filter its operations. The memory used is bounded by the largest path item (or item of a section).
+
+    When filtering on security scopes, the global security and the securityDefinitions are needed before the
+    paths and the input is read twice (a non seekable input, e.g. stdin, is first copied to a temporary file).
+
+    :param input: the text stream of the swagger (in JSON)
+    :param output: the text stream where the filtered swagger is written (in JSON)
+    :param mode:
+    :param conditions:
+    :return: an iterator over the actions
+    """
+    if mode != "keep_only":
+        raise NotImplementedError(f"The mode '{mode}' is not yet implemented.")
+
+    global_security, security_definitions = None, None
+    spool = None
+    if conditions is not None and any(
+        condition.security_scopes is not None for condition in conditions
+    ):
+        if not input.seekable():
+            spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+            shutil.copyfileobj(input, spool)
+            input = spool
+            input.seek(0)
+        start = input.tell()
+        global_security, security_definitions = _read_security(input)
+        input.seek(start)
+
+    filter = (
+        generate_filter_conditions(
+            conditions,
+            merge_matches=True,
+            global_security=global_security,
+            security_definitions=security_definitions,
+        )
+        if conditions is not None
+        else None
+    )
+
+    # if global security defined, filter it also (as in filter)
+    inherited_security_matches = True
+    new_global_security = global_security
+    if filter and global_security is not None and filter.on_security_scopes_useful:
+        match = filter((), {"security": global_security}, on_tags=False, on_operations=False)
+        if match:
+            new_global_security = match["security"]
+        else:
+            inherited_security_matches = False
+            new_global_security = None
+
+    reader = JsonReader(input)
+    output.write("{")
+    separator = ""
+    for key, key_text in reader.items():
+        if key == "security" and new_global_security is not global_security:
+            reader.read()
+            if new_global_security is not None:
+                output.write(f"{separator}{key_text}:{json.dumps(new_global_security)}")
+                separator = ","
+            continue
+
+        output.write(f"{separator}{key_text}:")
+        separator = ","
+        if reader.peek() != "{":
+            output.write(reader.read()[1])
+            continue
+
+        # pass through the objects item by item and filter the path items
+        output.write("{")
+        item_separator = ""
+        for item_key, item_key_text in reader.items():
+            item, item_text = reader.read()
+            if key == "paths" and filter and isinstance(item, dict):
+                changed = False
+                for verb in OPERATIONS_LOWER:
+                    operation = item.get(verb)
+                    if not isinstance(operation, dict):
+                        continue
+                    path = ("paths", item_key, verb)
+                    if inherited_security_matches or "security" in operation:
+                        new_value = filter(path, operation)
+                    else:
+                        new_value = False
+
+                    if new_value is False:
+                        yield OperationRemovedFilterAction(
+                            path=path,
+                            reason="The operation has been removed as it does not match any filter.",
+                        )
+                        del item[verb]
+                        changed = True
+                    elif operation != new_value:
+                        yield OperationChangedFilterAction(
+                            path=path, reason="The operation has been modified by a filter."
+                        )
+                        item[verb] = new_value
+                        changed = True
+                if changed:
+                    item_text = json.dumps(item)
+            output.write(f"{item_separator}{item_key_text}:{item_text}")
+            item_separator = ","
+        output.write("}")
+
+    output.write("}\n")
+    if spool is not None:
+        spool.close()
+
+
 def append_no_duplicate(config, path, base, nxt):
-    """ a list strategy to append only the elements not yet in the list."""
+    """a list strategy to append only the elements not yet in the list."""
     for e in nxt:
         if e not in base:
             base.append(e)
     return base
 
 
+# the fields of the operations transformed by the filter conditions
+TRANSFORMED_FIELDS = ("tags", "security")
+
 # merger object to merge dict with list in a recursive way
 # with a strategy for list to avoid duplicates
 m = deepmerge.Merger(
@@ -137,7 +315,11 @@ m = deepmerge.Merger(
 
 
 def generate_filter_conditions(
-    conditions: List[FilterCondition], merge_matches=False, global_security=None
+    conditions: List[FilterCondition],
+    merge_matches=False,
+    global_security=None,
+    security_definitions=None,
+    compare_only=False,
 ):
     """Return a function:
      - taking an operation (as a dict) as well as three flags:
@@ -167,18 +349,72 @@ def generate_filter_conditions(
       - flag_matches=True,  the resulting operation will have ["tag1","tag2"] (as both conditions matches,
         each returning its operation transformed, i.e. ["tag1"] for the first and ["tag2"] for the second,
         and the results are merged in a single operation, giving ["tag1","tag2"]
-        :param global_security:
 
+    The security scopes are interned into bit positions (starting with the scopes declared in the
+    security_definitions, if given) so that checking if the scopes of a security requirement are all
+    allowed by a condition is a bitmask operation instead of a set comparison.
+
+    With compare_only, the operation is not copied and only its fields transformed by the conditions
+    (tags and security, as new lists) are returned, e.g. {"tags": ["tag1"]} (to find the operations changed
+    or apply the changes without copying the whole operations).
+
+    :param global_security: the security applying to operations without their own security
+    :param security_definitions: the securityDefinitions of the swagger (to intern their scopes first)
+    :param compare_only: return the fields transformed instead of the operation transformed
     """
+    scope_bits = {}
+
+    def scopes_mask(scopes):
+        """Return the bitmask of the scopes, interning the scopes not yet known."""
+        mask = 0
+        for scope in scopes:
+            bit = scope_bits.get(scope)
+            if bit is None:
+                bit = scope_bits[scope] = 1 << len(scope_bits)
+            mask |= bit
+        return mask
+
+    def security_masks(security):
+        """Return for each security requirement the bitmask of all its scopes."""
+        return [
+            scopes_mask(itertools.chain.from_iterable(requirement.values()))
+            for requirement in security
+        ]
+
+    def filter_security(security, masks, condition_mask):
+        """Return the non empty security requirements with all their scopes in the condition mask
+        (i.e. with no bit of their mask outside of the condition mask)."""
+        return [
+            requirement
+            for requirement, mask in zip(security, masks)
+            if requirement and not mask & ~condition_mask
+        ]
+
+    # intern first the declared scopes to have stable bit positions
+    for sec_def in (security_definitions or {}).values():
+        scopes_mask(sec_def.get("scopes", {}))
+
+    global_masks = security_masks(global_security) if global_security is not None else None
 
     def generate_filter(condition: FilterCondition):
         """Return a function taking an operation dict and returning True/False if the operation match the condition.
 
         The condition is a dict with keys tags, operations, security_scopes"""
-
-        def filter(path: Tuple, operation: Dict, on_tags, on_security_scopes, on_operations):
-            # deep copy the operation as it will be changed
-            operation = copy.deepcopy(operation)
+        condition_mask = None
+        inherited_security = None
+        if condition.security_scopes is not None:
+            condition_mask = scopes_mask(condition.security_scopes)
+
+            # the operations inheriting the global security share the same filtered security,
+            # decide it once for all of them
+            if global_security is not None:
+                inherited_security = filter_security(global_security, global_masks, condition_mask)
+
+        def filter(
+            path: Tuple, operation: Dict, on_tags, on_security_scopes, on_operations, masks
+        ):
+            # the fields of the operation transformed by the condition (the operation itself is not changed)
+            fields = {}
 
             # check tags
             if on_tags and condition.tags is not None:
@@ -193,7 +429,7 @@ def generate_filter_conditions(
                     return False
 
                 # adapt the operation to only have the filtered tags
-                operation["tags"] = filtered_tags
+                fields["tags"] = filtered_tags
 
             # check operations
             if on_operations and condition.operations is not None:
@@ -205,37 +441,34 @@ def generate_filter_conditions(
                     return False
 
             # check security_scopes
-            if on_security_scopes and condition.security_scopes is not None:
+            if on_security_scopes and condition_mask is not None:
                 # ensure the operation requires only the condition security scopes (or is open) and filter on it
-                original_security = operation.get("security", global_security)
-
+                original_security = operation.get("security")
                 if original_security is not None:
+                    filtered_security = filter_security(original_security, masks, condition_mask)
+                elif global_security is not None:
+                    # the operation inherits the global security
+                    filtered_security = list(inherited_security)
+                else:
+                    # the operation is open
+                    filtered_security = None
+
+                if filtered_security is not None:
                     # the endpoint is secured
-                    # keep only securities with all scopes for each sec_def in the security_scopes
-                    filtered_security = [
-                        security
-                        for security in original_security
-                        if all(
-                            condition.security_scopes.issuperset(scopes)
-                            for sec_def, scopes in security.items()
-                        )
-                    ]
-                    # for each filtered security, ensure # remove sec_def with no scopes
-                    # filtered_security = [
-                    #     {sec_def: scopes for sec_def, scopes in security.items() if scopes}
-                    #     for security in filtered_security
-                    # ]
-                    # remove empty security
-                    filtered_security = [security for security in filtered_security if security]
                     if not filtered_security:
                         # no security_scopes matches with the conditions
                         return False
 
                     # adapt the operation to only have the filtered security_scopes
-                    operation["security"] = filtered_security
+                    fields["security"] = filtered_security
+
+            # the fields not transformed are kept as is (copied, as the fields may be merged in place)
+            for field in TRANSFORMED_FIELDS:
+                if field not in fields and field in operation:
+                    fields[field] = copy_swagger(operation[field])
 
             # default True
-            return operation
+            return fields
 
         return filter
 
@@ -264,21 +497,32 @@ def generate_filter_conditions(
         # check a operation to see if match any of the filter
         # first trueish filter returned if not merge_matches
         # else append them in operations that will be merged afterwards
-        operations = []
+        masks = None
+        if on_security_scopes:
+            # compute once the scopes bitmasks of the security requirements of the operation
+            security = operation.get("security")
+            if security is not None:
+                masks = security_masks(security)
+
+        matches = []
         for _filter in _filters:
-            fvalue = _filter(path, operation, on_tags, on_security_scopes, on_operations)
-            if fvalue is not False:
+            fields = _filter(path, operation, on_tags, on_security_scopes, on_operations, masks)
+            if fields is not False:
                 if merge_matches:
-                    operations.append(fvalue)
+                    matches.append(fields)
                 else:
-                    return fvalue
-
-        # if operations is not empty, it means we had some matches
-        # and that merge_matches is True => merge the operations in a single one
-        if operations:
-            return reduce(m.merge, operations)
-
-        return False
+                    break
+        else:
+            # if matches is not empty, it means we had some matches
+            # and that merge_matches is True => merge the fields transformed in a single one
+            if not matches:
+                return False
+            fields = reduce(m.merge, matches)
+
+        if compare_only:
+            return fields
+        # the operation transformed (as a copy)
+        return copy_swagger({**operation, **fields})
 
     # assign flags if useful
     filter_all.on_security_scopes_useful = on_security_scopes_useful
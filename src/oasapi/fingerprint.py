@@ -0,0 +1,231 @@
+"""Fingerprinting of a swagger as a Merkle tree (a hash per node, independent of the order of the keys)"""
+import hashlib
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Tuple
+
+from oasapi.common import OPERATIONS_LOWER
+from oasapi.events import SwaggerPath
+
+
+def _hash(content: str) -> str:
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=20).hexdigest()
+
+
+# the prefix of the digests of the dict/list children in the entries of their parent
+# (so that the digest of a subtree cannot be the encoding of a leaf, e.g. a digest made of digits)
+_NODE_TAG = "#"
+
+
+def _encode_leaf(value) -> str:
+    """Return the canonical encoding of a scalar (as json, with the integral floats encoded as ints
+    as 10.0 and 10 are the same json number)"""
+    if type(value) is str:
+        return encode_basestring_ascii(value)
+    elif value is None:
+        return "null"
+    elif value is True:
+        return "true"
+    elif value is False:
+        return "false"
+    elif isinstance(value, int):
+        return repr(value)
+    elif isinstance(value, float):
+        return repr(int(value)) if value.is_integer() else repr(value)
+    else:
+        # other scalars (e.g. dates in yaml)
+        return encode_basestring_ascii(str(value))
+
+
+class _Node:
+    """A node of the Merkle tree for a dict or a list, with the nodes of its dict/list children"""
+
+    __slots__ = ("digest", "children", "length")
+
+    def __init__(self, value):
+        # build the nodes of the children while encoding the entries (hot path, see rehash for the logic)
+        children = {}
+        entries = []
+        if isinstance(value, dict):
+            for key, child in value.items():
+                if type(child) is str:
+                    encoded = encode_basestring_ascii(child)
+                elif isinstance(child, (dict, list)):
+                    node = children[key] = _Node(child)
+                    encoded = _NODE_TAG + node.digest
+                else:
+                    encoded = _encode_leaf(child)
+                entries.append(
+                    encode_basestring_ascii(key if type(key) is str else str(key)) + ":" + encoded
+                )
+            entries.sort()
+            self.digest = _hash("{" + ",".join(entries) + "}")
+        else:
+            for i, child in enumerate(value):
+                if type(child) is str:
+                    entries.append(encode_basestring_ascii(child))
+                elif isinstance(child, (dict, list)):
+                    node = children[i] = _Node(child)
+                    entries.append(_NODE_TAG + node.digest)
+                else:
+                    entries.append(_encode_leaf(child))
+            self.digest = _hash("[" + ",".join(entries) + "]")
+        self.children = children
+        # the length of the value (to detect the items inserted/removed in a list)
+        self.length = len(value)
+
+    def rebuild_items(self, value: list, start: int):
+        """Rebuild the nodes of the items of the list from the index start (the items moved by an insertion
+        or a removal)"""
+        children = {i: node for i, node in self.children.items() if i < start}
+        for i in range(start, len(value)):
+            if isinstance(value[i], (dict, list)):
+                children[i] = _Node(value[i])
+        self.children = children
+
+    def rehash(self, value):
+        """Compute the digest of the node from the value and the digests of its children nodes"""
+        children = self.children
+        if isinstance(value, dict):
+            # keys are compared as strings (e.g. response codes 200 and '200' are the same)
+            entries = sorted(
+                encode_basestring_ascii(key if type(key) is str else str(key))
+                + ":"
+                + (_NODE_TAG + children[key].digest if key in children else _encode_leaf(child))
+                for key, child in value.items()
+            )
+            self.digest = _hash("{" + ",".join(entries) + "}")
+        else:
+            entries = [
+                _NODE_TAG + children[i].digest if i in children else _encode_leaf(child)
+                for i, child in enumerate(value)
+            ]
+            self.digest = _hash("[" + ",".join(entries) + "]")
+        self.length = len(value)
+
+
+def _index(value, key):
+    """Return the key to index the value (converting an index element like '[3]' to an int for lists)"""
+    if isinstance(value, list) and isinstance(key, str) and key.startswith("["):
+        return int(key[1:-1])
+    return key
+
+
+class Fingerprint:
+    """Merkle tree of a swagger: each dict/list of the swagger has a digest computed from the digests/values
+    of its children (independently of the order of the keys for the dicts).
+
+    The digest of any node is available by its path (with the indexes of the lists as ints or as '[i]' strings,
+    as in the events). After a change in the swagger at some path, :py:meth:`update` recomputes only the digests
+    of this path and its ancestors.
+    """
+
+    def __init__(self, swagger: Dict):
+        self.swagger = swagger
+        self.root = _Node(swagger)
+
+    @property
+    def digest(self) -> str:
+        """The digest of the whole swagger"""
+        return self.root.digest
+
+    def _resolve(self, path: SwaggerPath):
+        """Return the value and the node (None for a scalar) at the path"""
+        value, node = self.swagger, self.root
+        for key in path:
+            key = _index(value, key)
+            value = value[key]
+            node = node.children.get(key) if node is not None else None
+        return value, node
+
+    def __getitem__(self, path: SwaggerPath) -> str:
+        """Return the digest of the node at the path"""
+        try:
+            value, node = self._resolve(path)
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise KeyError(path)
+        return node.digest if node is not None else _hash(_encode_leaf(value))
+
+    def __contains__(self, path: SwaggerPath) -> bool:
+        try:
+            self[path]
+        except KeyError:
+            return False
+        return True
+
+    def update(self, *paths: SwaggerPath):
+        """Update the digests after changes of the swagger (in place) at the paths
+        (a change of the value at a path, its addition or its removal, including the insertion or
+        the removal of an item of a list, the items after it being rehashed).
+
+        The digests of the ancestors shared by several paths are recomputed only once.
+        Without paths, the whole tree is rebuilt.
+        """
+        if not paths:
+            self.root = _Node(self.swagger)
+            return
+
+        # the ancestors to rehash, by their (normalised) path
+        ancestors = {}
+        for path in paths:
+            path = tuple(path)
+            while path and path not in self:
+                # the value has been removed, update its parent
+                path = path[:-1]
+            if not path:
+                self.root = _Node(self.swagger)
+                return
+
+            # retrieve the values and nodes from the root to the parent of the path
+            value, node, keys = self.swagger, self.root, ()
+            ancestors[keys] = value, node
+            for depth, key in enumerate(path, 1):
+                key = _index(value, key)
+                if isinstance(value, list) and len(value) != node.length:
+                    # items have been inserted in/removed from the list, the items from the index
+                    # on the path have moved: rebuild their nodes
+                    node.rebuild_items(value, key)
+                    break
+                if depth == len(path):
+                    # rebuild the node at the path
+                    child = value[key]
+                    if isinstance(child, (dict, list)):
+                        node.children[key] = _Node(child)
+                    else:
+                        node.children.pop(key, None)
+                    break
+                child_node = node.children.get(key)
+                if child_node is None:
+                    # the value was a scalar and is now a dict/list (the path being inside it): build its subtree
+                    node.children[key] = _Node(value[key])
+                    break
+                value, node, keys = value[key], child_node, keys + (key,)
+                ancestors[keys] = value, node
+
+        # recompute the digests of the ancestors, from the deepest to the root
+        for keys in sorted(ancestors, key=len, reverse=True):
+            value, node = ancestors[keys]
+            node.rehash(value)
+
+    def operations(self) -> Dict[Tuple[str, str], str]:
+        """Return the digests of the operations (by (endpoint, verb))"""
+        result = {}
+        for endpoint, endpoint_value in (self.swagger.get("paths") or {}).items():
+            if not isinstance(endpoint_value, dict):
+                continue
+            for verb in OPERATIONS_LOWER:
+                if isinstance(endpoint_value.get(verb), dict):
+                    result[endpoint, verb] = self["paths", endpoint, verb]
+        return result
+
+
+def fingerprint(swagger: Dict) -> Fingerprint:
+    """
+    Fingerprint a swagger specification as a Merkle tree.
+
+    The digests are independent of the order of the keys of the dicts (and of the type of the keys,
+    e.g. response codes as int or str) so that the same swagger in json or yaml has the same fingerprint.
+
+    :param swagger: the swagger spec
+    :return: the Merkle tree of the swagger
+    """
+    return Fingerprint(swagger)
@@ -0,0 +1,290 @@
+"""Index of the operationIds, operations and definitions of a directory of swaggers (a fleet) to detect
+their collisions across the swaggers.
+
+The index is persisted in a JSON Lines file and updated incrementally: only the swaggers which files have changed
+since the last update are parsed again.
+"""
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import yaml
+
+from oasapi.common import OPERATIONS_LOWER, SWAGGER_EXTENSIONS, load_file, spec_hash
+from oasapi.events import (
+    FleetError,
+    FleetWarning,
+    DuplicateOperationIdFleetError,
+    DuplicateOperationFleetError,
+    ConflictingDefinitionFleetWarning,
+)
+
+logger = logging.getLogger(__name__)
+
+#: the version of the format of the index file (an index file with another version is rebuilt)
+INDEX_VERSION = 2
+
+#: the default name of the index file (in the directory of the swaggers)
+INDEX_FILENAME = ".oasapi-fleet.json"
+
+# regexp to match the path parameters (e.g. {petId})
+PATH_PARAMETER_RE = re.compile(r"{[^}]*}")
+
+
+def index_swagger(swagger: Dict) -> Dict:
+    """Return the entry of the index of a swagger, i.e. its operationIds, its operations
+    (as "VERB basePath/path" with the path parameters anonymised) and the hash of its definitions"""
+    operation_ids = {}
+    operations = {}
+    base_path = (swagger.get("basePath") or "").rstrip("/")
+
+    for endpoint, endpoint_value in (swagger.get("paths") or {}).items():
+        if not isinstance(endpoint_value, dict):
+            continue
+        normalised_endpoint = PATH_PARAMETER_RE.sub("{}", base_path + endpoint)
+        for verb in OPERATIONS_LOWER:
+            operation = endpoint_value.get(verb)
+            if not isinstance(operation, dict):
+                continue
+            path = ["paths", endpoint, verb]
+            operations[f"{verb.upper()} {normalised_endpoint}"] = path
+            operation_id = operation.get("operationId")
+            if isinstance(operation_id, str):
+                operation_ids[operation_id] = path + ["operationId"]
+
+    definitions = {
+        name: spec_hash(definition) for name, definition in (swagger.get("definitions") or {}).items()
+    }
+
+    return {"operationIds": operation_ids, "operations": operations, "definitions": definitions}
+
+
+class FleetIndex:
+    """Persistent index of the operationIds, operations and definitions of the swaggers of a directory.
+
+    The index maps each operationId/operation/definition name to the swaggers using it (by their file name)
+    and is updated incrementally by :py:meth:`refresh`.
+    """
+
+    def __init__(self, directory, index_path: Union[str, Path] = None):
+        self.directory = Path(directory)
+        self.index_path = Path(index_path) if index_path else self.directory / INDEX_FILENAME
+        # file name -> {"stat": [mtime, size], "operationIds": ..., "operations": ..., "definitions": ...}
+        self.entries: Dict[str, Dict] = {}
+        # inverted indexes: key -> {file name -> path (or hash for the definitions)}
+        self.operation_ids: Dict[str, Dict[str, List]] = {}
+        self.operations: Dict[str, Dict[str, List]] = {}
+        self.definitions: Dict[str, Dict[str, str]] = {}
+        #: the names of the files parsed during the last refresh
+        self.parsed: List[str] = []
+        #: the errors of the files that could not be read during the last refresh (by file name)
+        self.failures: Dict[str, str] = {}
+        # the number of records in the index file
+        self.journal_length = 0
+
+        self.load()
+
+    def load(self):
+        """Load the index from its file (if it exists and has the current version).
+
+        The index file is a journal in JSON Lines: a header with the version then records
+        with the new entry of a swagger (or its removal), the last record of a swagger being its current entry.
+        """
+        try:
+            with self.index_path.open(encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != INDEX_VERSION:
+                    logger.info(f"Index '{self.index_path}' has another version, it will be rebuilt")
+                    return
+                records = [json.loads(line) for line in f]
+        except (OSError, ValueError):
+            return
+
+        for record in records:
+            name = record["name"]
+            if name in self.entries:
+                self.remove_entry(name)
+            if "entry" in record:
+                self.add_entry(name, record["entry"])
+        self.journal_length = len(records)
+
+    def save(self, names: List[str]):
+        """Save the entries of the swaggers (or their removal) by appending them to the index file.
+
+        The index file is compacted (i.e. rewritten with only the current entries) when it has become twice
+        longer than needed."""
+        if not self.index_path.exists() or self.journal_length + len(names) > 2 * len(self.entries) + 100:
+            self.compact()
+            return
+
+        with self.index_path.open("a", encoding="utf-8") as f:
+            for name in names:
+                f.write(json.dumps(self.record(name)) + "\n")
+        self.journal_length += len(names)
+
+    def compact(self):
+        """Rewrite (atomically) the index file with only the current entries"""
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": INDEX_VERSION}) + "\n")
+            for name in self.entries:
+                f.write(json.dumps(self.record(name)) + "\n")
+        os.replace(tmp_path, self.index_path)
+        self.journal_length = len(self.entries)
+
+    def record(self, name: str) -> Dict:
+        """Return the record of the index file for the swagger"""
+        entry = self.entries.get(name)
+        return {"name": name} if entry is None else {"name": name, "entry": entry}
+
+    def add_entry(self, name: str, entry: Dict):
+        """Add the entry of a swagger to the index"""
+        self.entries[name] = entry
+        for index, key in [
+            (self.operation_ids, "operationIds"),
+            (self.operations, "operations"),
+            (self.definitions, "definitions"),
+        ]:
+            for item, value in entry.get(key, {}).items():
+                index.setdefault(item, {})[name] = value
+
+    def remove_entry(self, name: str):
+        """Remove the entry of a swagger from the index"""
+        entry = self.entries.pop(name)
+        for index, key in [
+            (self.operation_ids, "operationIds"),
+            (self.operations, "operations"),
+            (self.definitions, "definitions"),
+        ]:
+            for item in entry.get(key, {}):
+                users = index[item]
+                del users[name]
+                if not users:
+                    del index[item]
+
+    def refresh(self) -> bool:
+        """Update the index with the swaggers which files are new, have changed or have been removed
+        (and save it if updated).
+
+        :return: True if the index has been updated
+        """
+        self.parsed = []
+        self.failures = {}
+        names = set()
+        for dir_entry in os.scandir(self.directory):
+            name = dir_entry.name
+            if (
+                os.path.splitext(name)[1] not in SWAGGER_EXTENSIONS
+                or name.startswith(".")  # hidden files (as the index file)
+                or not dir_entry.is_file()
+            ):
+                continue
+
+            names.add(name)
+            entry = self.entries.get(name)
+            try:
+                stat = dir_entry.stat()
+                stat = [stat.st_mtime_ns, stat.st_size]
+                if entry is not None and entry["stat"] == stat:
+                    continue
+                new_entry = index_swagger(load_file(dir_entry.path))
+            except OSError as e:
+                # the file cannot be read (e.g. no permission or removed meanwhile), keep its previous entry
+                # (if any) and try again at the next refresh
+                logger.warning(f"Could not read the swagger '{dir_entry.path}' ({e})")
+                self.failures[name] = str(e)
+                continue
+            except (ValueError, yaml.YAMLError) as e:
+                # keep an empty entry to not parse the file again till it changes
+                logger.warning(f"Could not load the swagger '{dir_entry.path}' ({e})")
+                new_entry = {}
+            new_entry["stat"] = stat
+            self.parsed.append(name)
+
+            if entry is not None:
+                self.remove_entry(name)
+            self.add_entry(name, new_entry)
+
+        removed = [name for name in self.entries if name not in names]
+        for name in removed:
+            self.remove_entry(name)
+
+        if self.parsed or removed:
+            self.save(self.parsed + removed)
+            return True
+        return False
+
+    def collisions(self) -> List[Union[FleetError, FleetWarning]]:
+        """Return the collisions between the swaggers of the index.
+
+        For each operationId/operation used in several swaggers (and each definition name with different
+        contents), the swaggers are sorted by name and an event is reported for all of them but the first one.
+        The collisions are reported by operationId/operation/definition name (the order of the index depending
+        on the order of the files in the directory and on the past refreshes).
+        """
+        events = []
+
+        for operation_id, users in sorted(self.operation_ids.items()):
+            if len(users) > 1:
+                first, *others = sorted(users)
+                for name in others:
+                    events.append(
+                        DuplicateOperationIdFleetError(
+                            path=(name, *users[name]),
+                            reason=f"the operationId '{operation_id}' is already used in '{first}'",
+                            operationId=operation_id,
+                        )
+                    )
+
+        for operation, users in sorted(self.operations.items()):
+            if len(users) > 1:
+                first, *others = sorted(users)
+                for name in others:
+                    events.append(
+                        DuplicateOperationFleetError(
+                            path=(name, *users[name]),
+                            reason=f"the operation '{operation}' is already defined in '{first}'",
+                        )
+                    )
+
+        for definition, users in sorted(self.definitions.items()):
+            if len(set(users.values())) > 1:
+                first, *others = sorted(users)
+                for name in others:
+                    if users[name] != users[first]:
+                        events.append(
+                            ConflictingDefinitionFleetWarning(
+                                path=(name, "definitions", definition),
+                                reason=f"the definition '{definition}' is defined differently in '{first}'",
+                            )
+                        )
+
+        return events
+
+
+def fleet_check(
+    directory, index_path: Union[str, Path] = None
+) -> Tuple[FleetIndex, List[Union[FleetError, FleetWarning]]]:
+    """
+    Check the collisions across the swaggers of a directory (a fleet of swaggers).
+
+    The collisions detected are:
+
+    - operationIds used in several swaggers
+    - operations (same verb and path including the basePath, whatever the names of the path parameters)
+      defined in several swaggers
+    - definitions with the same name but different contents in several swaggers (as warnings)
+
+    The index of the swaggers is persisted in the index_path file (by default, a file .oasapi-fleet.json
+    in the directory) and only the swaggers which files have changed since the last check are parsed.
+
+    :param directory: the directory of the swaggers
+    :param index_path: the path of the index file
+    :return: the index, a list of collisions
+    """
+    index = FleetIndex(directory, index_path=index_path)
+    index.refresh()
+    return index, index.collisions()
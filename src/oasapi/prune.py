@@ -1,19 +1,10 @@
-import copy
 import itertools
 from collections import defaultdict
-from typing import Dict, Tuple, List
-
-from oasapi.common import (
-    get_elements,
-    REFERENCE_SECTIONS,
-    JSPATH_PATHS_REFERENCES,
-    JSPATH_REFERENCES,
-    JSPATH_COMPONENTS,
-    JSPATH_TAGS,
-    JSPATH_OPERATION_TAGS,
-    JSPATH_SECURITY,
-    JSPATH_ENDPOINTS,
-)
+from typing import Dict, Tuple, List, Set
+
+from attr import dataclass
+
+from oasapi.common import REFERENCE_SECTIONS, OPERATIONS_LOWER, copy_swagger
 from oasapi.events import (
     ReferenceNotUsedFilterAction,
     SecurityDefinitionNotUsedFilterAction,
@@ -24,68 +15,138 @@ from oasapi.events import (
 )
 
 
-def prune_unused_global_items(swagger):
-    """Prune the swagger (in place) of its unused global items
-    in the definitions, responses and parameters global sections"""
+@dataclass
+class SwaggerUsage:
+    """Summary of the elements used in a swagger, collected in a single traversal by :py:func:`collect_usage`"""
+
+    #: the name of the endpoints with no operations
+    empty_endpoints: List[str]
+    #: for each endpoint, the local references (as (section, item) tuples) used in the endpoint
+    endpoint_references: Dict[str, Set[Tuple[str, ...]]]
+    #: for each global item (as a (section, item) tuple), the local references used in the item
+    component_references: Dict[Tuple[str, str], Set[Tuple[str, ...]]]
+    #: the tags used by the operations
+    tags_used: Set[str]
+    #: for each security definition used (globally or by the operations), the scopes used
+    secdefs_used: Dict[str, Set[str]]
+
+
+def _collect_references(o, references: Set):
+    """Add to references the local references used in o (decomposed as tuples)"""
+    if isinstance(o, dict):
+        for key, value in o.items():
+            if key == "$ref" and isinstance(value, str):
+                if value.startswith("#/"):
+                    references.add(tuple(value[2:].split("/")))
+            else:
+                _collect_references(value, references)
+    elif isinstance(o, list):
+        for value in o:
+            _collect_references(value, references)
+
+
+def _collect_security(security, secdefs_used: Dict[str, Set[str]]):
+    """Add to secdefs_used the security definitions and scopes used in the security requirements"""
+    for requirement in security or []:
+        if isinstance(requirement, dict):
+            for sec_name, sec_scopes in requirement.items():
+                secdefs_used[sec_name].update(sec_scopes)
+
+
+def collect_usage(swagger: Dict) -> SwaggerUsage:
+    """Collect in a single traversal of the swagger the empty endpoints, the references used
+    in each endpoint and global item, the tags used and the security definitions/scopes used."""
+    empty_endpoints = []
+    endpoint_references = {}
+    tags_used = set()
+    secdefs_used = defaultdict(set)
 
-    def decompose_reference(references):
-        return set(
-            tuple(reference[2:].split("/"))
-            for _, reference, _ in references
-            if reference.startswith("#/")
-        )
+    _collect_security(swagger.get("security"), secdefs_used)
+
+    for endpoint_name, endpoint in (swagger.get("paths") or {}).items():
+        if not endpoint or len(endpoint) == 1 and "parameters" in endpoint:
+            empty_endpoints.append(endpoint_name)
 
-    # start by taking all references use in /paths
-    refs = refs_new = decompose_reference(get_elements(swagger, JSPATH_PATHS_REFERENCES))
+        endpoint_references[endpoint_name] = references = set()
+        _collect_references(endpoint, references)
 
-    while True:
-        swagger_new = {section: {} for section in REFERENCE_SECTIONS}
-        for rt, obj in refs_new:
-            # handle only local references
-            swagger_new[rt][obj] = swagger[rt][obj]
+        if isinstance(endpoint, dict):
+            for verb in OPERATIONS_LOWER:
+                operation = endpoint.get(verb)
+                if isinstance(operation, dict):
+                    tags_used.update(operation.get("tags") or [])
+                    _collect_security(operation.get("security"), secdefs_used)
 
-        refs_new = decompose_reference(get_elements(swagger_new, JSPATH_REFERENCES))
+    component_references = {}
+    for section in REFERENCE_SECTIONS:
+        for item_name, item in (swagger.get(section) or {}).items():
+            component_references[section, item_name] = references = set()
+            _collect_references(item, references)
+
+    return SwaggerUsage(
+        empty_endpoints=empty_endpoints,
+        endpoint_references=endpoint_references,
+        component_references=component_references,
+        tags_used=tags_used,
+        secdefs_used=secdefs_used,
+    )
 
-        if refs_new.issubset(refs):
-            break
 
-        refs |= refs_new
+def prune_unused_global_items(swagger, usage: SwaggerUsage = None, dry_run=False):
+    """Prune the swagger (in place) of its unused global items
+    in the definitions, responses and parameters global sections"""
+    if usage is None:
+        usage = collect_usage(swagger)
+
+    # start by taking all references used in the /paths
+    refs = set().union(*usage.endpoint_references.values())
+
+    # follow the references used in the global items till no more added
+    refs_new = list(refs)
+    while refs_new:
+        rt, obj = refs_new.pop()
+        # fails if the reference does not exist
+        for ref in usage.component_references[rt, obj]:
+            if ref not in refs:
+                refs.add(ref)
+                refs_new.append(ref)
 
     actions = []
-    for _, _, ref_path in get_elements(swagger, JSPATH_COMPONENTS):
+    for ref_path in usage.component_references:
         if ref_path not in refs:
             # the reference is not used, remove it
             rt, obj = ref_path
-            del swagger[rt][obj]
+            if not dry_run:
+                del swagger[rt][obj]
             actions.append(
                 ReferenceNotUsedFilterAction(path=(rt, obj), reason="reference not used")
             )
 
     # remove sections that are left empty
     for section in REFERENCE_SECTIONS:
-        if section in swagger and not swagger[section]:
+        if not dry_run and section in swagger and not swagger[section]:
             del swagger[section]
 
     return swagger, actions
 
 
-def prune_unused_security_definitions(swagger):
+def prune_unused_security_definitions(swagger, usage: SwaggerUsage = None, dry_run=False):
     """Prune the swagger (in place) of its unused securityDefinitions or oauth scopes"""
     if "securityDefinitions" not in swagger:
         return swagger, []
 
-    security_jspath = JSPATH_SECURITY
+    if usage is None:
+        usage = collect_usage(swagger)
 
-    # detect security definitions used and for which scope
-    secdefs_used = defaultdict(set)
-    for sec_name, sec_scopes, _ in get_elements(swagger, security_jspath):
-        secdefs_used[sec_name].update(sec_scopes)
+    # security definitions used and for which scope
+    secdefs_used = usage.secdefs_used
 
     # iterate existing securityDefinitions to check if they are used and if their scopes are used
     actions = []
     for sec_name, sec_def in swagger["securityDefinitions"].copy().items():
         if sec_name not in secdefs_used:
-            del swagger["securityDefinitions"][sec_name]
+            if not dry_run:
+                del swagger["securityDefinitions"][sec_name]
             actions.append(
                 SecurityDefinitionNotUsedFilterAction(
                     path=("securityDefinitions", sec_name), reason="security definition not used"
@@ -93,72 +154,85 @@ def prune_unused_security_definitions(swagger):
             )
 
         elif "scopes" in sec_def:
-            for scope_name, scope_def in sec_def["scopes"].copy().items():
-                if scope_name not in secdefs_used[sec_name]:
-                    del swagger["securityDefinitions"][sec_name]["scopes"][scope_name]
+            scopes_used = {}
+            for scope_name, scope_def in sec_def["scopes"].items():
+                if scope_name in secdefs_used[sec_name]:
+                    scopes_used[scope_name] = scope_def
+                else:
                     actions.append(
                         OAuth2ScopeNotUsedFilterAction(
                             path=("securityDefinitions", sec_name, "scopes", scope_name),
                             reason="oauth2 scope not used",
                         )
                     )
+            # replace the scopes (instead of deleting them) as they may be shared with other
+            # security definitions in an interned swagger
+            if not dry_run and len(scopes_used) != len(sec_def["scopes"]):
+                sec_def["scopes"] = scopes_used
 
     # remove securityDefinitions if empty
-    if not swagger["securityDefinitions"]:
+    if not dry_run and not swagger["securityDefinitions"]:
         del swagger["securityDefinitions"]
 
     return swagger, actions
 
 
-def prune_unused_tags(swagger):
+def prune_unused_tags(swagger, usage: SwaggerUsage = None, dry_run=False):
     """Prune the swagger (in place) of its unused tags"""
     if "tags" not in swagger:
         return swagger, []
 
-    tags_jspath = JSPATH_OPERATION_TAGS
+    if usage is None:
+        usage = collect_usage(swagger)
 
-    # detect security definitions used and for which scope
-    tags_used = set().union(*[tags_list for _, tags_list, _ in get_elements(swagger, tags_jspath)])
+    # tags used by the operations
+    tags_used = usage.tags_used
 
-    # iterate existing securityDefinitions to check if they are used and if their scopes are used
+    # iterate existing tags to check if they are used
     actions = []
-    for _, tag_name, (*path_before_name, path_name) in get_elements(swagger, JSPATH_TAGS):
-        if tag_name not in tags_used:
+    for i, tag in enumerate(swagger["tags"]):
+        if tag["name"] not in tags_used:
             actions.append(
                 TagNotUsedFilterAction(
-                    path=tuple(path_before_name), reason=f"tag definition for '{tag_name}' not used"
+                    path=("tags", f"[{i}]"), reason=f"tag definition for '{tag['name']}' not used"
                 )
             )
 
-    swagger["tags"] = [tag for tag in swagger["tags"] if tag["name"] in tags_used]
+    if not dry_run:
+        swagger["tags"] = [tag for tag in swagger["tags"] if tag["name"] in tags_used]
 
-    # remove tags if empty
-    if not swagger["tags"]:
-        del swagger["tags"]
+        # remove tags if empty
+        if not swagger["tags"]:
+            del swagger["tags"]
 
     return swagger, actions
 
 
-def prune_empty_paths(swagger):
-    """Prune the swagger (in place) of its empty paths (ie paths with no verb)"""
+def prune_empty_paths(swagger, usage: SwaggerUsage = None, dry_run=False):
+    """Prune the swagger (in place) of its empty paths (ie paths with no verb)
+
+    The references used by the empty paths are removed from the usage (if given)."""
+    if usage is None:
+        usage = collect_usage(swagger)
 
-    # list all operations (paths without any operation are not included
     actions = []
-    for endpoint_name, endpoint, path in get_elements(swagger, JSPATH_ENDPOINTS):
-        if not endpoint or len(endpoint) == 1 and "parameters" in endpoint:
-            # endpoint is empty, remove it
+    for endpoint_name in usage.empty_endpoints:
+        # endpoint is empty, remove it
+        if not dry_run:
             del swagger["paths"][endpoint_name]
+        usage.endpoint_references.pop(endpoint_name, None)
 
-            actions.append(
-                PathsEmptyFilterError(
-                    path=path, reason=f"path '{endpoint_name}' has no operations defined"
-                )
+        actions.append(
+            PathsEmptyFilterError(
+                path=("paths", endpoint_name),
+                reason=f"path '{endpoint_name}' has no operations defined",
             )
+        )
 
     return swagger, actions
 
 
-def prune(swagger: Dict) -> Tuple[Dict, List[FilterAction]]:
+def prune(swagger: Dict, dry_run=False) -> Tuple[Dict, List[FilterAction]]:
     """
     Prune a swagger specification.
 
@@ -169,15 +243,23 @@ def prune(swagger: Dict) -> Tuple[Dict, List[FilterAction]]:
     - unused tags
     - empty paths (i.e. endpoints with no verbs)
 
+    If dry_run is True, the swagger is neither copied nor pruned: it is returned unchanged with
+    the actions that the pruning would do.
 
     :param swagger: the swagger spec
+    :param dry_run: only compute the actions
     :return: pruned swagger, a set of actions
     """
-    swagger = copy.deepcopy(swagger)
+    if not dry_run:
+        swagger = copy_swagger(swagger)
+
+    # collect in one traversal the usage of the elements of the swagger
+    usage = collect_usage(swagger)
+
     actions = list(
         itertools.chain(
             *[
-                prune_operation(swagger)[1]
+                prune_operation(swagger, usage, dry_run=dry_run)[1]
                 for prune_operation in [
                     prune_empty_paths,
                     prune_unused_tags,
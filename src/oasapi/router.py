@@ -0,0 +1,164 @@
+"""Routing of requests (verb and path) to the operations of a swagger with a radix tree of the path templates"""
+import re
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+from attr import dataclass
+
+from oasapi.common import OPERATIONS_LOWER
+from oasapi.events import SwaggerPath
+
+# a parameter in a segment of a path template (e.g. '{petId}' or '{name}' in '{name}.json')
+PARAMETER_RE = re.compile(r"{([^{}]+)}")
+
+
+@dataclass(frozen=True, slots=True)
+class RouteMatch:
+    """The operation matched by a request"""
+
+    #: the path template of the operation (e.g. '/pets/{petId}')
+    endpoint: str
+    #: the verb of the operation (in lower case)
+    verb: str
+    #: the operation in the swagger
+    operation: Dict
+    #: the values of the path parameters in the request (by name)
+    path_parameters: Dict[str, str]
+
+    @property
+    def path(self) -> SwaggerPath:
+        """The path of the operation in the swagger"""
+        return "paths", self.endpoint, self.verb
+
+
+class _Node:
+    """A node of the radix tree for a segment of the path templates, with its children by kind of segment"""
+
+    __slots__ = ("literals", "patterns", "parameter", "routes")
+
+    def __init__(self):
+        # children for the literal segments (e.g. 'pets') by segment
+        self.literals = {}
+        # children for the segments mixing literals and parameters (e.g. '{name}.json') by regexp
+        self.patterns = {}
+        # child for the segments being a single parameter (e.g. '{petId}')
+        self.parameter = None
+        # operations of the path templates ending at the node: verb -> (endpoint, names of the parameters)
+        self.routes = {}
+
+
+def _split(path: str) -> List[str]:
+    """Return the segments of a path (ignoring the leading and trailing slashes)"""
+    path = path.strip("/")
+    return path.split("/") if path else []
+
+
+class Router:
+    """Match the requests to the operations of a swagger.
+
+    The path templates of the swagger (prefixed with its basePath) are compiled in a tree of segments:
+    a request is matched in O(number of segments of its path), trying the literal segments
+    before the segments with parameters (so '/pets/mine' is preferred to '/pets/{petId}' for GET /pets/mine).
+    """
+
+    def __init__(self, swagger: Dict):
+        self.swagger = swagger
+        self.root = _Node()
+
+        base_segments = _split(swagger.get("basePath") or "")
+        for endpoint, endpoint_value in (swagger.get("paths") or {}).items():
+            if not isinstance(endpoint_value, dict):
+                continue
+            node = self.root
+            names = []
+            for segment in base_segments + _split(endpoint):
+                segment_names = PARAMETER_RE.findall(segment)
+                if not segment_names:
+                    node = node.literals.setdefault(segment, _Node())
+                elif segment == f"{{{segment_names[0]}}}":
+                    if node.parameter is None:
+                        node.parameter = _Node()
+                    node = node.parameter
+                else:
+                    pattern = "".join(
+                        "([^/]+?)" if i % 2 else re.escape(part)
+                        for i, part in enumerate(PARAMETER_RE.split(segment))
+                    )
+                    regex = re.compile(pattern)
+                    if regex not in node.patterns:
+                        node.patterns[regex] = _Node()
+                    node = node.patterns[regex]
+                names.extend(segment_names)
+
+            for verb in OPERATIONS_LOWER:
+                if isinstance(endpoint_value.get(verb), dict):
+                    # the first path template is kept for equivalent templates
+                    node.routes.setdefault(verb, (endpoint, names))
+
+    def _lookup(self, node: _Node, segments: List[str], index: int, verb: str, values: List[str]):
+        """Return the node matching the segments from index with the verb (backtracking from the literal segments
+        to the segments with parameters if needed), appending the values of the parameters to values"""
+        if index == len(segments):
+            return node if verb in node.routes else None
+
+        segment = segments[index]
+        child = node.literals.get(segment)
+        if child is not None:
+            found = self._lookup(child, segments, index + 1, verb, values)
+            if found is not None:
+                return found
+
+        for regex, child in node.patterns.items():
+            match = regex.fullmatch(segment)
+            if match is not None:
+                groups = match.groups()
+                values.extend(groups)
+                found = self._lookup(child, segments, index + 1, verb, values)
+                if found is not None:
+                    return found
+                # the regexp of a pattern has at least one group
+                del values[-len(groups):]
+
+        if node.parameter is not None:
+            values.append(segment)
+            found = self._lookup(node.parameter, segments, index + 1, verb, values)
+            if found is not None:
+                return found
+            values.pop()
+
+        return None
+
+    def match(self, verb: str, path: str) -> Optional[RouteMatch]:
+        """Return the operation matching the request with the verb and path (None if no operation matches)
+
+        The path can include a query string (ignored) and its percent-encoded parameters are decoded."""
+        verb = verb.lower()
+        path = path.partition("?")[0]
+        values = []
+        node = self._lookup(self.root, _split(path), 0, verb, values)
+        if node is None:
+            return None
+
+        endpoint, names = node.routes[verb]
+        return RouteMatch(
+            endpoint=endpoint,
+            verb=verb,
+            operation=self.swagger["paths"][endpoint][verb],
+            path_parameters={name: unquote(value) for name, value in zip(names, values)},
+        )
+
+
+def compile(swagger: Dict) -> Router:
+    """
+    Compile the path templates of a swagger in a router matching the requests to its operations.
+
+    For instance::
+
+        router = compile(swagger)
+        match = router.match("GET", "/v2/pets/42")
+        # match.endpoint == "/pets/{petId}", match.path_parameters == {"petId": "42"}
+
+    :param swagger: the swagger spec
+    :return: the router of the swagger
+    """
+    return Router(swagger)
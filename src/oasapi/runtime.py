@@ -0,0 +1,399 @@
+"""Validation of the requests received by a service against the parameters of the operations of its swagger"""
+import numbers
+import re
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from jsonschema import Draft4Validator, RefResolver
+
+from oasapi.common import OPERATIONS_LOWER, _index_path
+from oasapi.events import Reason, RequestParameterValidationError, SwaggerPath
+from oasapi.validation import get_type_format
+
+#: the separators of the values of an array for each collectionFormat ('multi' being the repeated parameter)
+COLLECTION_SEPARATORS = {"csv": ",", "ssv": " ", "tsv": "\t", "pipes": "|", "multi": None}
+
+# the locations of the parameters (except body) in the order of the arguments of the validators
+LOCATIONS = ("path", "query", "header", "formData")
+
+# the conversions of the values received as strings to the python values of each type
+_BOOLEANS = {"true": True, "false": False}
+CONVERTERS = {"integer": int, "number": float, "boolean": _BOOLEANS.__getitem__}
+
+#: a validator of the requests of an operation, called with the path, query, header and formData parameters
+#: (mappings of the names of the parameters to their values) and the body, returning the errors of the request
+RequestValidator = Callable[..., List[RequestParameterValidationError]]
+
+
+class _InvalidValue(Exception):
+    """The error of a value of a parameter"""
+
+    def __init__(self, reason: Reason):
+        self.reason = reason
+
+
+# the check of a value returning the value converted to the type of the parameter
+# (raising _InvalidValue with the reason of the error if the value is not valid)
+_Check = Callable[[Any], Any]
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _is_count(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _has_duplicates(values: List) -> bool:
+    try:
+        return len(set(values)) != len(values)
+    except TypeError:
+        # unhashable items (e.g. arrays of arrays)
+        return any(value in values[:i] for i, value in enumerate(values))
+
+
+def _compile_constraints(param: Dict) -> Tuple[_Check, ...]:
+    """Return the checks of the constraints of the parameter (bounds, lengths, pattern and items)
+    on its values converted to its type (the constraints of invalid types are not checked)"""
+    constraints = []
+
+    maximum, minimum = param.get("maximum"), param.get("minimum")
+    if _is_number(maximum):
+        if param.get("exclusiveMaximum") is True:
+
+            def check_maximum(value):
+                if value >= maximum:
+                    raise _InvalidValue(
+                        Reason(
+                            "The value {!r} is not less than the exclusive maximum {}",
+                            value,
+                            maximum,
+                        )
+                    )
+
+        else:
+
+            def check_maximum(value):
+                if value > maximum:
+                    raise _InvalidValue(
+                        Reason("The value {!r} is greater than the maximum {}", value, maximum)
+                    )
+
+        constraints.append(check_maximum)
+    if _is_number(minimum):
+        if param.get("exclusiveMinimum") is True:
+
+            def check_minimum(value):
+                if value <= minimum:
+                    raise _InvalidValue(
+                        Reason(
+                            "The value {!r} is not greater than the exclusive minimum {}",
+                            value,
+                            minimum,
+                        )
+                    )
+
+        else:
+
+            def check_minimum(value):
+                if value < minimum:
+                    raise _InvalidValue(
+                        Reason("The value {!r} is less than the minimum {}", value, minimum)
+                    )
+
+        constraints.append(check_minimum)
+
+    max_length, min_length = param.get("maxLength"), param.get("minLength")
+    if _is_count(max_length):
+
+        def check_max_length(value):
+            if len(value) > max_length:
+                raise _InvalidValue(
+                    Reason("The value {!r} is longer than the maxLength {}", value, max_length)
+                )
+
+        constraints.append(check_max_length)
+    if _is_count(min_length):
+
+        def check_min_length(value):
+            if len(value) < min_length:
+                raise _InvalidValue(
+                    Reason("The value {!r} is shorter than the minLength {}", value, min_length)
+                )
+
+        constraints.append(check_min_length)
+
+    pattern = param.get("pattern")
+    if isinstance(pattern, str):
+        try:
+            regexp = re.compile(pattern)
+        except re.error:
+            # an invalid pattern (reported by the validation of the swagger) cannot be checked
+            regexp = None
+        if regexp is not None:
+
+            def check_pattern(value):
+                # the pattern is not anchored (as in json schema)
+                if not regexp.search(value):
+                    raise _InvalidValue(
+                        Reason("The value {!r} does not match the pattern '{}'", value, pattern)
+                    )
+
+            constraints.append(check_pattern)
+
+    max_items, min_items = param.get("maxItems"), param.get("minItems")
+    if _is_count(max_items):
+
+        def check_max_items(value):
+            if len(value) > max_items:
+                raise _InvalidValue(
+                    Reason("The value {!r} has more items than the maxItems {}", value, max_items)
+                )
+
+        constraints.append(check_max_items)
+    if _is_count(min_items):
+
+        def check_min_items(value):
+            if len(value) < min_items:
+                raise _InvalidValue(
+                    Reason("The value {!r} has less items than the minItems {}", value, min_items)
+                )
+
+        constraints.append(check_min_items)
+    if param.get("uniqueItems") is True:
+
+        def check_unique_items(value):
+            if _has_duplicates(value):
+                raise _InvalidValue(Reason("The value {!r} has duplicate items", value))
+
+        constraints.append(check_unique_items)
+
+    return tuple(constraints)
+
+
+def _compile_check(param: Dict) -> _Check:
+    """Return the check of the values of a parameter (or of the items of an array parameter).
+
+    The values received as strings are converted to the type of the parameter before being checked
+    against its type/format, enum and constraints (maximum, minLength, pattern, maxItems, uniqueItems, ...).
+    """
+    _type = param.get("type")
+    format = param.get("format")
+    enum = param.get("enum")
+
+    if _type == "array":
+        check_item = _compile_check(param.get("items") or {})
+        separator = COLLECTION_SEPARATORS.get(param.get("collectionFormat", "csv"), ",")
+        constraints = _compile_constraints(
+            {key: param.get(key) for key in ("maxItems", "minItems", "uniqueItems")}
+        )
+
+        def check_array(value):
+            if (
+                separator
+                and isinstance(value, list)
+                and len(value) == 1
+                and isinstance(value[0], str)
+            ):
+                # a parameter given once in the query string (as parsed by parse_qs)
+                value = value[0]
+            if isinstance(value, str):
+                value = value.split(separator) if separator else [value]
+            elif not isinstance(value, list):
+                raise _InvalidValue(
+                    Reason("The value {!r} is not of the expected type 'array'", value)
+                )
+            value = [check_item(item) for item in value]
+            if enum is not None and value not in enum:
+                raise _InvalidValue(
+                    Reason("The value {!r} is not one of the enum values {}", value, enum)
+                )
+            for check_constraint in constraints:
+                check_constraint(value)
+            return value
+
+        return check_array
+
+    converter = CONVERTERS.get(_type)
+    py_type, re_pattern = get_type_format(_type, format) or (object, None)
+    # a bool is an int in python but not a json number
+    numeric = _type in {"integer", "number"}
+    # the constraints applying to the type of the values
+    if numeric:
+        constraint_keys = ("maximum", "exclusiveMaximum", "minimum", "exclusiveMinimum")
+    elif _type == "string":
+        constraint_keys = ("maxLength", "minLength", "pattern")
+    else:
+        constraint_keys = ()
+    constraints = _compile_constraints({key: param.get(key) for key in constraint_keys})
+
+    def check(value):
+        if isinstance(value, list):
+            # a parameter repeated in the query string
+            value = value[0] if value else ""
+        if converter is not None and isinstance(value, str):
+            try:
+                value = converter(value)
+            except (ValueError, KeyError):
+                raise _InvalidValue(
+                    Reason("The value {!r} is not of the expected type '{}'", value, _type)
+                )
+        if not isinstance(value, py_type) or (numeric and isinstance(value, bool)):
+            raise _InvalidValue(
+                Reason("The value {!r} is not of the expected type '{}'", value, _type)
+            )
+        if re_pattern is not None and not re_pattern.match(value):
+            raise _InvalidValue(
+                Reason("The value '{}' does not conform to the string format '{}'", value, format)
+            )
+        if enum is not None and value not in enum:
+            raise _InvalidValue(
+                Reason("The value {!r} is not one of the enum values {}", value, enum)
+            )
+        for check_constraint in constraints:
+            check_constraint(value)
+        return value
+
+    return check
+
+
+def _compile_body_check(schema: Dict, resolver: RefResolver) -> Callable[[Any], Optional[Reason]]:
+    """Return the check of the body against its schema (the references being resolved in the swagger)"""
+    validator = Draft4Validator(schema, resolver=resolver)
+
+    def check_body(body):
+        error = next(validator.iter_errors(body), None)
+        if error is None:
+            return None
+        location = ".".join(map(str, error.absolute_path))
+        return Reason(
+            "The body does not conform to its schema at '{}': {}", location, error.message
+        )
+
+    return check_body
+
+
+def _operation_parameters(
+    swagger: Dict, endpoint: str, verb: str
+) -> Dict[Tuple[str, str], Tuple[SwaggerPath, Dict]]:
+    """Return the parameters of the operation by their (name, in) with the path where they are defined
+    (the references to the global parameters being resolved and the parameters of the endpoint being
+    overridden by the ones of the operation)"""
+    global_parameters = swagger.get("parameters") or {}
+    endpoint_value = swagger["paths"][endpoint]
+    parameters = {}
+    for base_path, parameters_list in [
+        (("paths", endpoint, "parameters"), endpoint_value.get("parameters")),
+        (("paths", endpoint, verb, "parameters"), endpoint_value[verb].get("parameters")),
+    ]:
+        for i, param in enumerate(parameters_list or []):
+            if not isinstance(param, dict):
+                continue
+            path = base_path + _index_path(i)
+            ref = param.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/parameters/"):
+                name = ref.rpartition("/")[2]
+                if name not in global_parameters:
+                    continue
+                path, param = ("parameters", name), global_parameters[name]
+            parameters[param.get("name"), param.get("in")] = (path, param)
+    return parameters
+
+
+def _compile_operation(
+    swagger: Dict, endpoint: str, verb: str, resolver: RefResolver
+) -> RequestValidator:
+    """Return the validator of the requests of the operation"""
+    checks = []
+    body_check = None
+    for (name, location), (path, param) in _operation_parameters(swagger, endpoint, verb).items():
+        required = bool(param.get("required", False))
+        if location == "body":
+            body_check = (
+                name,
+                required,
+                _compile_body_check(param.get("schema") or {}, resolver),
+                path,
+            )
+        elif location in LOCATIONS:
+            checks.append(
+                (LOCATIONS.index(location), location, name, required, _compile_check(param), path)
+            )
+    checks = tuple(checks)
+
+    def validate(
+        path: Mapping = None,
+        query: Mapping = None,
+        headers: Mapping = None,
+        form: Mapping = None,
+        body: Any = None,
+    ) -> List[RequestParameterValidationError]:
+        sources = (path, query, headers, form)
+        events = []
+        for index, location, name, required, check, param_path in checks:
+            source = sources[index]
+            value = None if source is None else source.get(name)
+            if value is None:
+                if required:
+                    reason = Reason("The required {} parameter '{}' is missing", location, name)
+                else:
+                    continue
+            else:
+                try:
+                    check(value)
+                except _InvalidValue as e:
+                    reason = e.reason
+                else:
+                    continue
+            events.append(
+                RequestParameterValidationError(
+                    path=param_path, reason=reason, parameter_name=name, location=location
+                )
+            )
+
+        if body_check is not None:
+            name, required, check, param_path = body_check
+            if body is None:
+                reason = Reason("The required body is missing") if required else None
+            else:
+                reason = check(body)
+            if reason is not None:
+                events.append(
+                    RequestParameterValidationError(
+                        path=param_path, reason=reason, parameter_name=name, location="body"
+                    )
+                )
+
+        return events
+
+    return validate
+
+
+def compile_request_validator(swagger: Dict) -> Dict[Tuple[str, str], RequestValidator]:
+    """
+    Compile a validator of the requests for each operation of the swagger.
+
+    The parameters of each operation (including the parameters of its endpoint and the global parameters
+    it refers to) are resolved once and their checks (type/format, enum, required and the constraints as
+    maximum, maxLength, pattern or maxItems) are bound in the validator.
+    A validator is called with the parameters of a request by location and returns the errors of the request
+    (an empty list if the request is valid)::
+
+        validators = compile_request_validator(swagger)
+        errors = validators["/pet/{petId}", "get"](path={"petId": "42"}, query={}, headers=request.headers)
+
+    The values of the path, query, header and formData parameters can be the strings received (converted
+    to the type of the parameter before being checked) or python values. The headers should be
+    a case insensitive mapping (as the headers of http.server) or use the names of the swagger.
+
+    :param swagger: the swagger spec
+    :return: the validators of the operations by (endpoint, verb)
+    """
+    resolver = RefResolver.from_schema(swagger)
+    return {
+        (endpoint, verb): _compile_operation(swagger, endpoint, verb, resolver)
+        for endpoint, endpoint_value in (swagger.get("paths") or {}).items()
+        if isinstance(endpoint_value, dict)
+        for verb in OPERATIONS_LOWER
+        if isinstance(endpoint_value.get(verb), dict)
+    }
@@ -0,0 +1,295 @@
+"""HTTP service serving filtered/pruned views of a directory of swaggers kept in memory"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from http import HTTPStatus
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import yaml
+from attr import dataclass
+
+from oasapi.cache import FilterCache, LRUCache
+from oasapi.common import spec_hash, load_file, Interner, YAML_DUMPER, SWAGGER_EXTENSIONS
+from oasapi.filter import FilterCondition
+from oasapi.prune import prune
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {"json": "application/json", "yaml": "application/x-yaml"}
+
+
+@dataclass
+class StoredSwagger:
+    """A swagger loaded from a file of the store"""
+
+    swagger: Dict
+    #: the hash of the content of the swagger (see :py:func:`oasapi.common.spec_hash`)
+    swagger_hash: str
+    #: the (mtime, size) of the file when loaded
+    stat: Tuple[int, int]
+
+
+@dataclass
+class Rendered:
+    """A view of a swagger serialized and ready to be served"""
+
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    #: the ETag of the gzip version (an entity distinct from the identity version)
+    gzip_etag: str
+    content_type: str
+
+
+class SwaggerStore:
+    """Keep in memory the swaggers of a directory, reloading them when their files change.
+
+    The swaggers are named by the name of their file without the extension.
+    The directory is checked for changes at most every reload_interval seconds.
+    If an interner is given, the swaggers are interned with it to share their identical strings and leaf objects
+    (the leaf objects of the swaggers reloaded or removed are released from the interner).
+    """
+
+    def __init__(self, directory, reload_interval: float = 1.0, interner: Interner = None):
+        self.directory = Path(directory)
+        self.reload_interval = reload_interval
+        self.interner = interner
+        self.swaggers: Dict[str, StoredSwagger] = {}
+        self._last_refresh = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self, force=True):
+        """Reload the swaggers which files have changed, are new or have been removed.
+
+        If not force, the directory is checked only if not done since reload_interval seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                not force
+                and self._last_refresh is not None
+                and now - self._last_refresh < self.reload_interval
+            ):
+                return
+            self._last_refresh = now
+
+            swaggers = {}
+            for entry in os.scandir(self.directory):
+                path = Path(entry.path)
+                if not entry.is_file() or path.suffix not in SWAGGER_EXTENSIONS:
+                    continue
+
+                stat = entry.stat()
+                stat = (stat.st_mtime_ns, stat.st_size)
+                stored = self.swaggers.get(path.stem)
+                if stored is None or stored.stat != stat:
+                    try:
+                        swagger = load_file(path, interner=self.interner)
+                    except (ValueError, yaml.YAMLError) as e:
+                        logger.warning(f"Could not load the swagger '{path}' ({e})")
+                        continue
+                    if "swagger" not in swagger or not isinstance(swagger.get("paths"), dict):
+                        logger.warning(f"The file '{path}' is not a swagger (no swagger/paths), skipped")
+                        continue
+                    logger.info(f"Swagger '{path}' loaded")
+                    stored = StoredSwagger(
+                        swagger=swagger, swagger_hash=spec_hash(swagger), stat=stat
+                    )
+                swaggers[path.stem] = stored
+
+            if self.interner is not None and any(
+                swaggers.get(name) is not stored for name, stored in self.swaggers.items()
+            ):
+                # free the leaf objects only used by the swaggers reloaded or removed
+                self.interner.retain(stored.swagger for stored in swaggers.values())
+            self.swaggers = swaggers
+
+    def get(self, name) -> StoredSwagger:
+        """Return the stored swagger with the given name (or None if it does not exist)"""
+        self.refresh(force=False)
+        return self.swaggers.get(name)
+
+    def names(self) -> List[str]:
+        """Return the sorted names of the stored swaggers"""
+        self.refresh(force=False)
+        return sorted(self.swaggers)
+
+
+class NoAliasDumper(YAML_DUMPER):
+    """Dumper writing in full the objects shared in the swagger (e.g. by an :py:class:`Interner`)"""
+
+    def ignore_aliases(self, data):
+        return True
+
+
+def render(swagger: Dict, format: str) -> Rendered:
+    """Serialize the swagger in the format (json or yaml) with its gzip version and ETag"""
+    if format == "json":
+        body = json.dumps(swagger, indent=2).encode("utf-8")
+    else:
+        body = yaml.dump(swagger, sort_keys=False, Dumper=NoAliasDumper).encode("utf-8")
+
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return Rendered(
+        body=body,
+        gzip_body=gzip.compress(body),
+        etag=f'"{digest}"',
+        gzip_etag=f'"{digest}-gzip"',
+        content_type=CONTENT_TYPES[format],
+    )
+
+
+class SwaggerServer(ThreadingMixIn, HTTPServer):
+    """HTTP server answering to:
+
+    - ``GET /specs``: the list of the names of the swaggers
+    - ``GET /specs/{name}?tag=..&path=..&scope=..&prune=1&format=json|yaml``: the swagger filtered on
+      the tags, paths and security scopes given (see :py:meth:`oasapi.filter`), pruned if prune=1
+      (see :py:meth:`oasapi.prune`) and rendered in json (default) or yaml.
+
+    The responses are cached (including their gzip version and their ETags) and are invalidated when
+    the swagger files change. The views are rendered concurrently (a view being rendered once by
+    the threads requesting it at the same time).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, store: SwaggerStore, cache_size: int = 256):
+        super().__init__(server_address, SwaggerRequestHandler)
+        self.store = store
+        self.filter_cache = FilterCache(maxsize=cache_size)
+        self.rendered_cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        # key of the views being rendered -> lock held while rendering it
+        self._rendering = {}
+
+    def get_rendered(self, name: str, query: Dict) -> Rendered:
+        """Return the rendered view of the swagger name for the query (None if the swagger does not exist)"""
+        stored = self.store.get(name)
+        if stored is None:
+            return None
+
+        tags, paths, scopes = query.get("tag"), query.get("path"), query.get("scope")
+        conditions = None
+        if tags or paths or scopes:
+            try:
+                conditions = [FilterCondition(tags=tags, operations=paths, security_scopes=scopes)]
+            except re.error as e:
+                raise ValueError(f"the path {e.pattern!r} is not a valid regexp ({e})")
+        do_prune = query.get("prune", ["0"])[-1] in {"1", "true"}
+        format = query.get("format", ["json"])[-1]
+        if format not in CONTENT_TYPES:
+            raise ValueError(f"the format '{format}' should be one of {sorted(CONTENT_TYPES)}")
+
+        key = (
+            stored.swagger_hash,
+            None if conditions is None else tuple(condition.key() for condition in conditions),
+            do_prune,
+            format,
+        )
+        with self._lock:
+            rendered = self.rendered_cache.get(key)
+            if rendered is not None:
+                return rendered
+            rendering_lock = self._rendering.setdefault(key, threading.Lock())
+
+        try:
+            with rendering_lock:
+                with self._lock:
+                    # the view may have been rendered by another thread in the meantime
+                    rendered = self.rendered_cache.get(key, _count=False)
+                if rendered is None:
+                    swagger, _ = self.filter_cache.filter(
+                        stored.swagger, conditions=conditions, swagger_hash=stored.swagger_hash
+                    )
+                    if do_prune:
+                        swagger, _ = prune(swagger)
+                    rendered = render(swagger, format)
+                    with self._lock:
+                        self.rendered_cache.set(key, rendered)
+        finally:
+            with self._lock:
+                self._rendering.pop(key, None)
+
+        return rendered
+
+
+class SwaggerRequestHandler(BaseHTTPRequestHandler):
+    server: SwaggerServer
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+
+        if parts == ["specs"]:
+            body = json.dumps(self.server.store.names()).encode("utf-8")
+            return self.send_body(HTTPStatus.OK, body, content_type=CONTENT_TYPES["json"])
+
+        if len(parts) != 2 or parts[0] != "specs":
+            return self.send_error(HTTPStatus.NOT_FOUND)
+
+        try:
+            rendered = self.server.get_rendered(parts[1], parse_qs(url.query))
+        except ValueError as e:
+            return self.send_error(HTTPStatus.BAD_REQUEST, str(e))
+
+        if rendered is None:
+            return self.send_error(HTTPStatus.NOT_FOUND, f"swagger '{parts[1]}' not found")
+
+        # the response depends on the Accept-Encoding (with an ETag per encoding)
+        headers = {"Vary": "Accept-Encoding"}
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            headers.update({"ETag": rendered.gzip_etag, "Content-Encoding": "gzip"})
+            body = rendered.gzip_body
+        else:
+            headers["ETag"] = rendered.etag
+            body = rendered.body
+
+        if headers["ETag"] in {
+            etag.strip() for etag in self.headers.get("If-None-Match", "").split(",")
+        }:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", headers["ETag"])
+            self.send_header("Vary", headers["Vary"])
+            self.end_headers()
+            return
+
+        self.send_body(HTTPStatus.OK, body, content_type=rendered.content_type, headers=headers)
+
+    def send_body(self, status, body: bytes, content_type: str, headers: Dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+
+def make_server(
+    directory,
+    host="127.0.0.1",
+    port=8000,
+    reload_interval: float = 1.0,
+    cache_size: int = 256,
+    intern: bool = False,
+) -> SwaggerServer:
+    """Return a server (not yet started) for the swaggers in the directory
+    (interning the swaggers with a shared :py:class:`Interner` if intern is True)"""
+    store = SwaggerStore(
+        directory, reload_interval=reload_interval, interner=Interner() if intern else None
+    )
+    return SwaggerServer((host, port), store, cache_size=cache_size)
@@ -0,0 +1,105 @@
+"""Incremental reading of a JSON document from a stream (without loading the whole document in memory)."""
+import json
+import re
+from typing import Any, Iterator, TextIO, Tuple
+
+#: the size of the chunks read from the stream
+CHUNK_SIZE = 2 ** 20
+
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+
+
+class JsonReader:
+    """Pull parser reading a JSON document incrementally from a text stream.
+
+    The objects are iterated key by key with :py:meth:`items` and the values are read one by one with
+    :py:meth:`read` (which returns the value with its original text), so that only the value being
+    read (and a chunk of the stream) is kept in memory.
+
+    For instance, to copy the definitions of a swagger one by one::
+
+        reader = JsonReader(stream)
+        for key, _ in reader.items():
+            if key == "definitions":
+                for name, _ in reader.items():
+                    definition, text = reader.read()
+            else:
+                reader.read()
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = None):
+        self.stream = stream
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        """Read more characters from the stream in the buffer (dropping the characters already parsed)
+
+        :return: False if the end of the stream is reached
+        """
+        chunk = self.stream.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        pos = self.pos
+        self.buffer = self.buffer[pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip the whitespaces and return the next character ('' at the end of the stream)"""
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, char: str):
+        """Consume the next character that must be char"""
+        if self.peek() != char:
+            raise ValueError(f"Expecting '{char}' in the JSON document, found '{self.peek()}'")
+        self.pos += 1
+
+    def read(self) -> Tuple[Any, str]:
+        """Read the next value and return it with its text"""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # the value may continue in the next chunks
+                if not self._fill(size):
+                    raise
+            else:
+                # a number at the end of the buffer may continue in the next chunks
+                if end < len(self.buffer) or not self._fill(size):
+                    start = self.pos
+                    text = self.buffer[start:end]
+                    self.pos = end
+                    return value, text
+            # read larger chunks to parse a large value a limited number of times
+            size *= 2
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over the keys (with their text) of the object starting at the current position.
+
+        The value of a key must be consumed (with :py:meth:`read` or :py:meth:`items`) before
+        iterating to the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key, text = self.read()
+            self.expect(":")
+            yield key, text
+            if self.peek() == "}":
+                self.pos += 1
+                return
+            self.expect(",")
@@ -1,5 +1,6 @@
 import logging
 import time
+import tracemalloc
 
 log_timer = logging.getLogger(f"{__name__}.timer")
 
@@ -17,3 +18,19 @@ class Timer:
         self.end = time.perf_counter()
         self.interval = self.end - self.start
         log_timer.info(f"'{self.name}' ran in {self.interval:.2f} seconds")
+
+
+class MemoryTracker:
+    """Track the peak of memory allocated by python (through tracemalloc) while running a code block"""
+
+    def __init__(self, name=None):
+        self.name = "<anonymous code block>" if name is None else name
+
+    def __enter__(self):
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, *args):
+        _, self.peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        log_timer.info(f"'{self.name}' allocated at peak {self.peak / 2 ** 20:.2f} MB")
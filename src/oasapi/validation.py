@@ -7,7 +7,7 @@ import numbers
 import re
 from itertools import groupby
 from pathlib import Path
-from typing import Set, Dict, Tuple, List
+from typing import AbstractSet, Dict, Tuple, List, Optional, Pattern
 
 from jsonschema import Draft4Validator
 
@@ -29,6 +29,8 @@ from .events import (
     ValidationError,
     ReferenceInvalidSyntax,
     ReferenceInvalidSection,
+    Reason,
+    EventSet,
 )
 
 
@@ -39,7 +41,7 @@ def check_security(swagger: Dict):
     :param swagger:
     :return:
     """
-    events = set()
+    events = EventSet()
 
     secdefs = swagger.get("securityDefinitions", {})
 
@@ -52,7 +54,7 @@ def check_security(swagger: Dict):
         if secdef is None:
             events.add(
                 SecurityDefinitionNotFoundValidationError(
-                    path=path, reason=f"securityDefinitions '{sec_key}' does not exist"
+                    path=path, reason=Reason("securityDefinitions '{}' does not exist", sec_key)
                 )
             )
         else:
@@ -68,13 +70,59 @@ def check_security(swagger: Dict):
                     events.add(
                         OAuth2ScopeNotFoundInSecurityDefinitionValidationError(
                             path=path + (scope,),
-                            reason=f"scope {scope} is not declared in the scopes of the securityDefinitions '{sec_key}'",
+                            reason=Reason(
+                                "scope {} is not declared in the scopes of the securityDefinitions '{}'",
+                                scope,
+                                sec_key,
+                            ),
                         )
                     )
 
     return events
 
 
+# the python type (or the regexp for the strings) of the values of each type/format
+# https://github.com/OAI/OpenAPI-Specification/blob/master/versions/2.0.md#data-types
+TYPE_FORMATS = {
+    ("string", None): str,
+    ("string", "byte"): re.compile(
+        r"^(?:[A-Za-z0-9+/\s]{4})*(?:[A-Za-z0-9+/\s]{2}==|[A-Za-z0-9+/\s]{3}=)?$"
+    ),
+    ("string", "binary"): str,
+    ("string", "date"): re.compile(r"^([0-9]+)-(0[1-9]|1[012])-(0[1-9]|[12][0-9]|3[01])$"),
+    ("string", "dateTime"): re.compile(
+        r"^([0-9]+)-(0[1-9]|1[012])-(0[1-9]|[12][0-9]|3[01])"  # date
+        r"[Tt]"
+        r"([01][0-9]|2[0-3]):([0-5][0-9]):([0-5][0-9]|60)(\.[0-9]+)?"  # time
+        r"(([Zz])|([+|\-]([01][0-9]|2[0-3]):[0-5][0-9]))$"  # offset
+    ),
+    ("string", "password"): str,
+    ("integer", None): numbers.Integral,
+    ("integer", "int32"): numbers.Integral,
+    ("integer", "int64"): numbers.Integral,
+    ("number", None): numbers.Real,
+    ("number", "float"): numbers.Real,
+    ("number", "double"): numbers.Real,
+    ("boolean", None): bool,
+    ("array", None): list,
+}
+
+
+def get_type_format(_type: str, format: str = None) -> Optional[Tuple[type, Optional[Pattern]]]:
+    """Return the python type and the regexp (None if any value of the type is valid) of the values
+    of the type/format (None if the type is not a documented type).
+
+    A format that is not documented for the type is freeform (only the type is checked)."""
+    regexp_or_type = TYPE_FORMATS.get((_type, format)) or TYPE_FORMATS.get((_type, None))
+    if regexp_or_type is None:
+        return None
+    if isinstance(regexp_or_type, type):
+        # regexp_or_type is a standard python type
+        return regexp_or_type, None
+    # regexp_or_type is a regexp expression on strings
+    return str, regexp_or_type
+
+
 def _check_parameter(param: Dict, path_param):
     """Check a parameter structure
 
@@ -83,7 +131,7 @@ def _check_parameter(param: Dict, path_param):
     - type/format and default
     - enum
     """
-    events = set()
+    events = EventSet()
 
     name = param.get("name", "unnamed-parameter")
     required = param.get("required", False)
@@ -91,6 +139,8 @@ def _check_parameter(param: Dict, path_param):
     _type = param.get("type")
     format = param.get("format")
     enum = param.get("enum")
+    # path shared by the events on the default value
+    path_default = path_param + ("default",)
 
     # check if required=True and default are both given
     if required and default is not None:
@@ -118,69 +168,37 @@ def _check_parameter(param: Dict, path_param):
             events.add(
                 ParameterDefinitionValidationError(
                     path=path_param + ("enum",),
-                    reason=f"The enum values {enum} contains duplicate values",
+                    reason=Reason("The enum values {} contains duplicate values", enum),
                     parameter_name=name,
                 )
             )
         if default is not None and default not in enum:
             events.add(
                 ParameterDefinitionValidationError(
-                    path=path_param + ("default",),
-                    reason=f"The default value {repr(default)} is not one of the enum values {enum}",
+                    path=path_default,
+                    reason=Reason(
+                        "The default value {!r} is not one of the enum values {}", default, enum
+                    ),
                     parameter_name=name,
                 )
             )
 
     # check type/format & default value in accordance with type/format
-    # https://github.com/OAI/OpenAPI-Specification/blob/master/versions/2.0.md#data-types
-    map_type2subtypes_pythontype = {
-        ("string", None): str,
-        ("string", "byte"): re.compile(
-            r"^(?:[A-Za-z0-9+/\s]{4})*(?:[A-Za-z0-9+/\s]{2}==|[A-Za-z0-9+/\s]{3}=)?$"
-        ),
-        ("string", "binary"): str,
-        ("string", "date"): re.compile(r"^([0-9]+)-(0[1-9]|1[012])-(0[1-9]|[12][0-9]|3[01])$"),
-        ("string", "dateTime"): re.compile(
-            r"^([0-9]+)-(0[1-9]|1[012])-(0[1-9]|[12][0-9]|3[01])"  # date
-            r"[Tt]"
-            r"([01][0-9]|2[0-3]):([0-5][0-9]):([0-5][0-9]|60)(\.[0-9]+)?"  # time
-            r"(([Zz])|([+|\-]([01][0-9]|2[0-3]):[0-5][0-9]))$"  # offset
-        ),
-        ("string", "password"): str,
-        ("integer", None): numbers.Integral,
-        ("integer", "int32"): numbers.Integral,
-        ("integer", "int64"): numbers.Integral,
-        ("number", None): numbers.Real,
-        ("number", "float"): numbers.Real,
-        ("number", "double"): numbers.Real,
-        ("boolean", None): bool,
-        ("array", None): list,
-    }
     if default is not None and _type:
-        regexp_or_type = map_type2subtypes_pythontype.get((_type, format))
-        # if no match with both _type, format, check if match only on _type (format being freeform)
-        if not regexp_or_type:
-            regexp_or_type = map_type2subtypes_pythontype.get((_type, None))
+        type_format = get_type_format(_type, format)
 
-        if regexp_or_type:
+        if type_format:
             # the type & format matches one of the Swagger Specifications documented type & format combinations
             # we can check the default format
-
-            # decompose regexp_or_type into type and RE expression
-            if isinstance(regexp_or_type, type):
-                # regexp_or_type is a standard python type
-                re_pattern = None
-                py_type = regexp_or_type
-            else:
-                # regexp_or_type is a regexp expression
-                re_pattern = regexp_or_type
-                py_type = str
+            py_type, re_pattern = type_format
 
             if not isinstance(default, py_type):
                 events.add(
                     ParameterDefinitionValidationError(
-                        path=path_param + ("default",),
-                        reason=f"The default value {repr(default)} is not of the expected type '{_type}'",
+                        path=path_default,
+                        reason=Reason(
+                            "The default value {!r} is not of the expected type '{}'", default, _type
+                        ),
                         parameter_name=name,
                     )
                 )
@@ -190,8 +208,12 @@ def _check_parameter(param: Dict, path_param):
                 if not (isinstance(default, str) and re_pattern.match(default)):
                     events.add(
                         ParameterDefinitionValidationError(
-                            path=path_param + ("default",),
-                            reason=f"The default value '{default}' does not conform to the string format '{format}'",
+                            path=path_default,
+                            reason=Reason(
+                                "The default value '{}' does not conform to the string format '{}'",
+                                default,
+                                format,
+                            ),
                             parameter_name=name,
                         )
                     )
@@ -208,7 +230,7 @@ def check_parameters(swagger: Dict):
     :param swagger:
     :return:
     """
-    events = set()
+    events = EventSet()
 
     parameters_jspath = JSPATH_PARAMETERS
 
@@ -234,7 +256,7 @@ def check_references(swagger: Dict):
     :param swagger:
     :return:
     """
-    events = set()
+    events = EventSet()
 
     ref_jspath = JSPATH_REFERENCES
 
@@ -247,7 +269,8 @@ def check_references(swagger: Dict):
             except ValueError:
                 events.add(
                     ReferenceInvalidSyntax(
-                        path=path, reason=f"reference {reference} not of the form '#/section/item'"
+                        path=path,
+                        reason=Reason("reference {} not of the form '#/section/item'", reference),
                     )
                 )
                 continue
@@ -256,7 +279,11 @@ def check_references(swagger: Dict):
                 events.add(
                     ReferenceInvalidSection(
                         path=path,
-                        reason=f"Reference {reference} not referring to one of the sections {REFERENCE_SECTIONS}",
+                        reason=Reason(
+                            "Reference {} not referring to one of the sections {}",
+                            reference,
+                            REFERENCE_SECTIONS,
+                        ),
                     )
                 )
 
@@ -266,7 +293,7 @@ def check_references(swagger: Dict):
             except KeyError:
                 events.add(
                     ReferenceNotFoundValidationError(
-                        path=path, reason=f"reference '#/{rt}/{obj}' does not exist"
+                        path=path, reason=Reason("reference '#/{}/{}' does not exist", rt, obj)
                     )
                 )
 
@@ -275,7 +302,7 @@ def check_references(swagger: Dict):
 
 def detect_duplicate_operationId(swagger: Dict):
     """Return list of Action with duplicate operationIds"""
-    events = set()
+    events = EventSet()
 
     # retrieve all operationIds
     operationId_jspath = JSPATH_OPERATIONID
@@ -302,7 +329,7 @@ def detect_duplicate_operationId(swagger: Dict):
     return events
 
 
-def check_schema(swagger: Dict) -> Set[ValidationError]:
+def check_schema(swagger: Dict) -> AbstractSet[ValidationError]:
     """Check swagger is compliant with schema"""
     # validate the json schema of the swagger_lib
     schema = json.load((Path(__file__).parent / "schemas" / "schema_swagger.json").open())
@@ -314,10 +341,10 @@ def check_schema(swagger: Dict) -> Set[ValidationError]:
             if isinstance(k, int):
                 value[str(k)] = value.pop(k)
 
-    return {
+    return EventSet(
         JsonSchemaValidationError(path=tuple(error.absolute_path), reason=error.message)
         for error in v.iter_errors(swagger)
-    }
+    )
 
 
 def validate(swagger: Dict) -> Tuple[Dict, List[ValidationError]]:
@@ -333,7 +360,7 @@ def validate(swagger: Dict) -> Tuple[Dict, List[ValidationError]]:
     - consistency of parameters (default value vs type)
 
     :param swagger: the swagger spec
-    :return: a set of errors
+    :return: a set of errors (in the order of the checks and of the swagger)
     """
 
     errors = (
@@ -0,0 +1,51 @@
+import io
+
+import pytest
+import yaml
+from test_common import SWAGGER_SAMPLES_PATH
+
+import oasapi.binary
+from oasapi.binary import detect_binary_format, dump_binary, load_binary
+
+
+@pytest.mark.parametrize("format", ["msgpack", "cbor"])
+def test_binary_roundtrip(format):
+    pytest.importorskip({"msgpack": "msgpack", "cbor": "cbor2"}[format])
+    swagger = yaml.safe_load((SWAGGER_SAMPLES_PATH / "swagger_petstore.yaml").read_text())
+    shared = {"type": "string"}
+    swagger["definitions"]["Shared"] = {"properties": {"a": shared, "b": shared, "c": 1.0}}
+    swagger["paths"]["/pet/{petId}"]["get"]["responses"][201] = {"description": "Created"}
+
+    stream = io.BytesIO()
+    dump_binary(swagger, stream, format)
+    content = stream.getvalue()
+    assert detect_binary_format(content) == format
+
+    loaded = load_binary(content)
+    assert loaded == swagger
+    assert type(loaded) is dict
+    # integer response codes are kept as is (json would convert them to strings)
+    assert 201 in loaded["paths"]["/pet/{petId}"]["get"]["responses"]
+    assert type(loaded["definitions"]["Shared"]["properties"]["c"]) is float
+    # the objects shared in the swagger are not shared in the loaded swagger
+    properties = loaded["definitions"]["Shared"]["properties"]
+    assert properties["a"] is not properties["b"]
+
+
+def test_detect_binary_format():
+    assert detect_binary_format(b'{"swagger": "2.0"}') is None
+    assert detect_binary_format(b"swagger: '2.0'") is None
+    assert detect_binary_format("é: 1".encode("utf-8")) is None
+    assert detect_binary_format(b"") is None
+    assert detect_binary_format(b"\x81\xa7swagger") == "msgpack"
+    assert detect_binary_format(b"\xa1\x67swagger") == "cbor"
+
+
+def test_binary_missing(monkeypatch):
+    monkeypatch.setattr(oasapi.binary, "msgpack", None)
+    with pytest.raises(ImportError):
+        dump_binary({}, io.BytesIO(), "msgpack")
+    with pytest.raises(ImportError):
+        load_binary(b"\x80")
+    with pytest.raises(ValueError):
+        load_binary(b"{}")
@@ -0,0 +1,210 @@
+import os
+import textwrap
+
+import pytest
+import yaml
+
+from oasapi.bundle import bundle, DocumentCache, split_reference
+from oasapi.events import (
+    ExternalReferenceBundledBundleAction,
+    ExternalReferenceInlinedBundleAction,
+    ExternalReferenceNotFoundBundleError,
+    ExternalReferenceCycleBundleError,
+)
+from oasapi.validation import validate
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(content))
+    return path
+
+
+@pytest.fixture
+def swagger_path(tmp_path):
+    write(
+        tmp_path / "common" / "errors.yaml",
+        """
+        definitions:
+          Error:
+            type: object
+            properties:
+              code: {type: integer}
+              details: {$ref: "#/definitions/Details"}
+          Details:
+            type: array
+            items: {$ref: "./types.yaml#/definitions/Message"}
+        """,
+    )
+    write(
+        tmp_path / "common" / "types.yaml",
+        """
+        definitions:
+          Message: {type: string}
+          Pet: {type: string, description: a pet from another file}
+        """,
+    )
+    write(
+        tmp_path / "paths" / "pets.yaml",
+        """
+        get:
+          responses:
+            200:
+              description: OK
+              schema: {$ref: "../common/types.yaml#/definitions/Pet"}
+            default:
+              description: Error
+              schema: {$ref: "../common/errors.yaml#/definitions/Error"}
+        """,
+    )
+    return write(
+        tmp_path / "swagger.yaml",
+        """
+        swagger: '2.0'
+        info: {title: my api, version: v1.0}
+        paths:
+          /pets: {$ref: "paths/pets.yaml"}
+          /pet:
+            get:
+              responses:
+                200:
+                  description: OK
+                  schema: {$ref: "#/definitions/Pet"}
+                default:
+                  description: Error
+                  schema: {$ref: "common/errors.yaml#/definitions/Error"}
+        definitions:
+          Pet: {type: object}
+        """,
+    )
+
+
+def test_split_reference():
+    assert split_reference("file.yaml#/definitions/Error") == ("file.yaml", ("definitions", "Error"))
+    assert split_reference("#/definitions/a~1b~0c") == ("", ("definitions", "a/b~c"))
+    assert split_reference("file.yaml") == ("file.yaml", ())
+
+
+def test_bundle(swagger_path):
+    swagger = yaml.safe_load(swagger_path.read_text())
+    swagger_bundled, events = bundle(swagger, swagger_path)
+
+    assert swagger_bundled["paths"]["/pets"]["get"]["responses"][200]["schema"] == {
+        "$ref": "#/definitions/types_Pet"
+    }
+    assert swagger_bundled["paths"]["/pet"]["get"]["responses"]["default"]["schema"] == {
+        "$ref": "#/definitions/Error"
+    }
+    assert swagger_bundled["definitions"] == {
+        "Pet": {"type": "object"},
+        "Error": {
+            "type": "object",
+            "properties": {
+                "code": {"type": "integer"},
+                "details": {"$ref": "#/definitions/Details"},
+            },
+        },
+        "Details": {"type": "array", "items": {"$ref": "#/definitions/Message"}},
+        "Message": {"type": "string"},
+        "types_Pet": {"type": "string", "description": "a pet from another file"},
+    }
+    assert validate(swagger_bundled)[1] == set()
+
+    assert events == [
+        ExternalReferenceInlinedBundleAction(
+            path=("paths", "/pets"), reason="reference 'paths/pets.yaml' inlined"
+        ),
+        ExternalReferenceBundledBundleAction(
+            path=("paths", "/pets", "get", "responses", 200, "schema"),
+            reason="reference '../common/types.yaml#/definitions/Pet' bundled as '#/definitions/types_Pet'",
+        ),
+        ExternalReferenceBundledBundleAction(
+            path=("paths", "/pets", "get", "responses", "default", "schema"),
+            reason="reference '../common/errors.yaml#/definitions/Error' bundled as '#/definitions/Error'",
+        ),
+        ExternalReferenceBundledBundleAction(
+            path=("definitions", "Error", "properties", "details"),
+            reason="reference '#/definitions/Details' bundled as '#/definitions/Details'",
+        ),
+        ExternalReferenceBundledBundleAction(
+            path=("definitions", "Details", "items"),
+            reason="reference './types.yaml#/definitions/Message' bundled as '#/definitions/Message'",
+        ),
+    ]
+
+    # the original swagger is unchanged
+    assert swagger == yaml.safe_load(swagger_path.read_text())
+
+
+def test_bundle_errors(tmp_path):
+    write(tmp_path / "self.yaml", "type: object\nitems: {$ref: 'self.yaml'}")
+    swagger = {
+        "definitions": {
+            "a": {"$ref": "missing.yaml#/definitions/a"},
+            "b": {"$ref": "self.yaml#/definitions/missing"},
+            "c": {"$ref": "self.yaml"},
+            "d": {"$ref": "http://example.com/swagger.json#/definitions/d"},
+        }
+    }
+    swagger_bundled, events = bundle(swagger, tmp_path / "swagger.yaml")
+
+    assert swagger_bundled["definitions"]["c"] == {"type": "object", "items": {"$ref": "self.yaml"}}
+    assert events == [
+        ExternalReferenceNotFoundBundleError(
+            path=("definitions", "a"),
+            reason="reference 'missing.yaml#/definitions/a' could not be resolved",
+        ),
+        ExternalReferenceNotFoundBundleError(
+            path=("definitions", "b"),
+            reason="reference 'self.yaml#/definitions/missing' could not be resolved",
+        ),
+        ExternalReferenceInlinedBundleAction(
+            path=("definitions", "c"), reason="reference 'self.yaml' inlined"
+        ),
+        ExternalReferenceCycleBundleError(
+            path=("definitions", "c", "items"), reason="reference 'self.yaml' refers to itself"
+        ),
+    ]
+
+
+def test_bundle_items_processed_once(tmp_path):
+    write(tmp_path / "common" / "c.json", '{"definitions": {"A": {"$ref": "missing.json#/definitions/B"}}}')
+    # a file with the same name in the directory of the swagger must not be used for the reference of c.json
+    write(tmp_path / "missing.json", '{"definitions": {"B": {"type": "string"}}}')
+    swagger = {
+        "paths": {"/a": {"get": {"responses": {"200": {"schema": {"$ref": "common/c.json#/definitions/A"}}}}}},
+        "definitions": {"Local": {"type": "string"}},
+    }
+    swagger_bundled, events = bundle(swagger, tmp_path / "swagger.json")
+
+    assert swagger_bundled["definitions"] == {
+        "Local": {"type": "string"},
+        "A": {"$ref": "missing.json#/definitions/B"},
+    }
+    assert events == [
+        ExternalReferenceBundledBundleAction(
+            path=("paths", "/a", "get", "responses", "200", "schema"),
+            reason="reference 'common/c.json#/definitions/A' bundled as '#/definitions/A'",
+        ),
+        ExternalReferenceNotFoundBundleError(
+            path=("definitions", "A"),
+            reason="reference 'missing.json#/definitions/B' could not be resolved",
+        ),
+    ]
+
+
+def test_document_cache(tmp_path):
+    path = write(tmp_path / "doc.yaml", "a: 1")
+    cache = DocumentCache()
+
+    document = cache.load(path)
+    assert document == {"a": 1}
+    assert cache.load(str(path)) is document
+
+    write(path, "a: 2")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.load(path) == {"a": 2}
+
+    cache.clear()
+    assert cache.load(path) == {"a": 2}
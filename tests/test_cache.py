@@ -0,0 +1,277 @@
+import copy
+import datetime
+import marshal
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+import yaml
+
+import oasapi.cache
+from oasapi.cache import LRUCache, FilterCache, CacheStats, HttpCache, ParseCache
+from oasapi.common import spec_hash, Interner
+from oasapi.filter import FilterCondition, filter
+
+swagger_str = """
+swagger: '2.0'
+info:
+  version: v1.0
+  title: my api
+paths:
+  /foo:
+    get:
+      tags: [tag1, tag2]
+      responses:
+        200:
+          description: OK
+    post:
+      tags: [tag2]
+"""
+
+
+@pytest.fixture(scope="function")
+def swagger():
+    return yaml.safe_load(swagger_str)
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_spec_hash(swagger):
+    swagger_reordered = dict(reversed(list(copy.deepcopy(swagger).items())))
+
+    assert spec_hash(swagger) == spec_hash(swagger_reordered)
+
+    swagger_reordered["paths"]["/foo"]["get"]["responses"]["200"] = {"description": "OK"}
+    assert spec_hash(swagger) != spec_hash(swagger_reordered)
+
+
+def test_spec_hash_types():
+    # the keys and values are hashed with their type
+    assert spec_hash({200: {"description": "OK"}}) != spec_hash({"200": {"description": "OK"}})
+    assert spec_hash({200: "OK", "201": "Created"}) != spec_hash({"200": "OK", "201": "Created"})
+    assert spec_hash({"\x00int:200": "OK"}) != spec_hash({200: "OK"})
+    assert spec_hash({"date": datetime.date(2020, 1, 1)}) != spec_hash({"date": "2020-01-01"})
+    assert spec_hash({200: datetime.date(2020, 1, 1)}) == spec_hash({200: datetime.date(2020, 1, 1)})
+
+
+def test_filter_condition_key():
+    assert (
+        FilterCondition(tags=["a", "b"], security_scopes=["read"]).key()
+        == FilterCondition(tags=["b", "a"], security_scopes={"read"}).key()
+    )
+    assert (
+        FilterCondition(operations=["GET /foo", "POST /foo"]).key()
+        != FilterCondition(operations=["POST /foo", "GET /foo"]).key()
+    )
+    assert FilterCondition().key() == (None, None, None)
+    hash(FilterCondition(tags=["a"], operations=["GET /foo"], security_scopes=["read"]).key())
+
+
+def test_lru_cache_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    # "b" is the least recently used
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    assert cache.stats == CacheStats(hits=3, misses=1, evictions=1, expirations=0)
+
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+def test_lru_cache_ttl():
+    timer = FakeTimer()
+    cache = LRUCache(maxsize=2, ttl=10, timer=timer)
+    cache.set("a", 1)
+
+    timer.now = 9
+    assert cache.get("a") == 1
+
+    timer.now = 10
+    assert cache.get("a", "expired") == "expired"
+    assert len(cache) == 0
+    assert cache.stats == CacheStats(hits=1, misses=1, evictions=0, expirations=1)
+
+
+def test_filter_cache(swagger):
+    cache = FilterCache(maxsize=2)
+
+    result = cache.filter(swagger, conditions=[FilterCondition(tags=["tag1"])])
+    assert result == filter(swagger, conditions=[FilterCondition(tags=["tag1"])])
+    assert cache.stats == CacheStats(misses=1)
+
+    # same content and same canonical conditions
+    assert (
+        cache.filter(copy.deepcopy(swagger), conditions=[FilterCondition(tags={"tag1"})])
+        is result
+    )
+    assert (
+        cache.filter(
+            swagger, swagger_hash=spec_hash(swagger), conditions=[FilterCondition(tags=["tag1"])]
+        )
+        is result
+    )
+    assert cache.stats == CacheStats(hits=2, misses=1)
+
+    # different conditions
+    cache.filter(swagger, conditions=[FilterCondition(tags=["tag2"])])
+    cache.filter(swagger, conditions=None)
+    assert cache.stats == CacheStats(hits=2, misses=3, evictions=1)
+
+    cache.clear()
+    cache.filter(swagger, conditions=None)
+    assert cache.stats == CacheStats(hits=2, misses=4, evictions=1)
+
+
+@pytest.fixture
+def http_server():
+    """HTTP server serving a document with validators and recording the headers of the requests"""
+    document = {"body": b"v1", "etag": '"1"', "last_modified": "Mon, 02 Mar 2020 10:00:00 GMT"}
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(dict(self.headers))
+            validators = {self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")}
+            if validators & {document["etag"], document["last_modified"]} - {None}:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            for header, key in [("ETag", "etag"), ("Last-Modified", "last_modified")]:
+                if document[key]:
+                    self.send_header(header, document[key])
+            self.send_header("Content-Length", str(len(document["body"])))
+            self.end_headers()
+            self.wfile.write(document["body"])
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}/swagger.json", document, requests
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("validator", ["etag", "last_modified"])
+def test_http_cache(http_server, tmp_path, validator):
+    url, document, requests = http_server
+    document["etag" if validator == "last_modified" else "last_modified"] = None
+    cache = HttpCache(tmp_path / "cache")
+
+    assert cache.fetch(url) == b"v1"
+    assert cache.stats == CacheStats(misses=1)
+    assert "If-None-Match" not in requests[-1] and "If-Modified-Since" not in requests[-1]
+
+    # revalidated with a conditional request, also by another instance sharing the directory
+    assert cache.fetch(url) == b"v1"
+    assert HttpCache(tmp_path / "cache").fetch(url) == b"v1"
+    assert cache.stats == CacheStats(hits=1, misses=1, revalidations=1)
+    assert {"If-None-Match", "If-Modified-Since"} & set(requests[-1])
+
+    # the document changes
+    document.update(body=b"v2", etag='"2"' if document["etag"] else None)
+    document.update(last_modified="Tue, 03 Mar 2020 10:00:00 GMT" if document["last_modified"] else None)
+    assert cache.fetch(url) == b"v2"
+    assert cache.stats == CacheStats(hits=1, misses=2, revalidations=1)
+
+    # offline, the cached copy is used without request
+    nb_requests = len(requests)
+    offline_cache = HttpCache(tmp_path / "cache", offline=True)
+    assert offline_cache.fetch(url) == b"v2"
+    with pytest.raises(LookupError):
+        offline_cache.fetch(url + "?other")
+    assert offline_cache.stats == CacheStats(hits=1, misses=1)
+    assert len(requests) == nb_requests
+
+
+def test_http_cache_concurrent(http_server, tmp_path):
+    url, document, requests = http_server
+    cache = HttpCache(tmp_path / "cache")
+
+    # the same url fetched by several threads (each writing its own temporary file)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.fetch(url))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [b"v1"] * 8
+    # a single entry with the body and its validators, no temporary file left
+    assert [path.suffix for path in (tmp_path / "cache").iterdir()] == [".entry"]
+    assert HttpCache(tmp_path / "cache", offline=True).fetch(url) == b"v1"
+
+
+def test_parse_cache(tmp_path, monkeypatch):
+    cache = ParseCache(tmp_path / "cache")
+    parsed = []
+    monkeypatch.setattr(
+        oasapi.cache, "parse_swagger", lambda content: parsed.append(content) or yaml.safe_load(content)
+    )
+
+    assert cache.parse(swagger_str) == yaml.safe_load(swagger_str)
+    # a warm parse (also by another instance sharing the directory) skips the parsing
+    assert cache.parse(swagger_str) == yaml.safe_load(swagger_str)
+    assert ParseCache(tmp_path / "cache").parse(swagger_str) == yaml.safe_load(swagger_str)
+    assert parsed == [swagger_str]
+    assert cache.stats == CacheStats(hits=1, misses=1)
+
+    # the shared objects are interned after loading
+    content = "{a: {type: string}, b: {type: string}}"
+    swagger = cache.parse(content, interner=Interner())
+    assert swagger["a"] is swagger["b"]
+
+    # a changed content is parsed again
+    assert cache.parse(swagger_str + "  /bar: {}\n")["paths"]["/bar"] == {}
+    assert len(parsed) == 3
+
+    # a corrupted file is ignored
+    for path in (tmp_path / "cache").iterdir():
+        path.write_bytes(b"corrupted")
+    assert cache.parse(swagger_str) == yaml.safe_load(swagger_str)
+    assert len(parsed) == 4
+
+    # a corrupted file removed concurrently
+    loads = marshal.loads
+
+    def loads_removed(data):
+        for path in (tmp_path / "cache").iterdir():
+            path.unlink()
+        raise ValueError("bad marshal data")
+
+    monkeypatch.setattr(oasapi.cache.marshal, "loads", loads_removed)
+    assert cache.parse(swagger_str) == yaml.safe_load(swagger_str)
+    monkeypatch.setattr(oasapi.cache.marshal, "loads", loads)
+    assert len(parsed) == 5
+
+    # the swaggers with objects not supported by marshal are not cached
+    assert cache.parse("{date: 2020-03-03}") == cache.parse("{date: 2020-03-03}")
+    assert len(parsed) == 7
+
+
+def test_parse_cache_eviction(tmp_path):
+    cache = ParseCache(tmp_path, max_size=1000)
+    contents = [f"x: {i}\ndescription: {'a' * 300}\n" for i in range(5)]
+    for content in contents:
+        cache.parse(content)
+    assert len(list(tmp_path.iterdir())) == 3
+    assert cache.stats == CacheStats(misses=5, evictions=2)
@@ -1,12 +1,50 @@
+import bz2
+import gzip
 import json
+import os
+import subprocess
+import sys
+import threading
 from pathlib import Path
 
 import pytest
+import yaml
 from click.testing import CliRunner
 from test_common import SWAGGER_SAMPLES_PATH
 
-from oasapi.cli import main, validate, prune, filter
-from oasapi.cli.common import shorten_text
+import oasapi
+from oasapi.cli import (
+    main,
+    validate,
+    prune,
+    filter,
+    filter_stream,
+    bundle,
+    flatten,
+    dedupe,
+    fleet_check,
+    fingerprint,
+    diff,
+)
+from oasapi.cli.common import shorten_text, compile_template, action_sort_key
+from oasapi.events import ReferenceNotUsedFilterAction, TagNotUsedFilterAction
+from oasapi.filter import FilterCondition
+from oasapi.server import make_server
+
+
+def test_compile_template():
+    format_message = compile_template("{len(actions)} actions with '{name}'", "actions", "name")
+    assert format_message([1, 2], "foo") == "2 actions with 'foo'"
+
+
+def test_action_sort_key():
+    actions = [
+        TagNotUsedFilterAction(path=("tags", "[0]"), reason="tag not used"),
+        ReferenceNotUsedFilterAction(path=("responses", 200), reason="reference not used"),
+        ReferenceNotUsedFilterAction(path=("definitions", "b"), reason="reference not used"),
+        ReferenceNotUsedFilterAction(path=("definitions", "a"), reason="reference not used"),
+    ]
+    assert sorted(actions, key=action_sort_key) == [actions[3], actions[2], actions[1], actions[0]]
 
 
 def test_shorten_text():
@@ -24,12 +62,31 @@ command_help_messages = [
   These are common operations offered by the oasapi library
 
 Options:
-  --help  Show this message and exit.
+  --cache-dir DIRECTORY           Directory where the swaggers downloaded over
+                                  HTTP are cached (and revalidated with their
+                                  ETag/Last-Modified).
+  --offline                       Use the copies cached in --cache-dir of the
+                                  swaggers instead of downloading them.
+  --parse-cache-dir DIRECTORY     Directory where the parsed swaggers are cached
+                                  (to skip the parsing of unchanged swaggers).
+  --parse-cache-size INTEGER RANGE
+                                  Maximum size (in MB) of the --parse-cache-dir
+                                  (the least recently used swaggers are
+                                  evicted).  [default: 256]
+  --help                          Show this message and exit.
 
 Commands:
-  filter    Filter the SWAGGER operations based on tags, operation path or...
-  prune     Prune from the SWAGGER unused global...
-  validate  Validate the SWAGGER according to the specs.
+  bundle         Bundle in a single swagger the SWAGGER split across several...
+  dedupe         Deduplicate the SWAGGER by merging its identical definitions...
+  diff           Compare the OLD and NEW versions of a swagger and report the...
+  filter         Filter the SWAGGER operations based on tags, operation path...
+  filter-stream  Filter the SWAGGER operations based on tags, operation path...
+  flatten        Flatten the SWAGGER by replacing its references by the...
+  fleet-check    Check the collisions of operationIds, operations and...
+  hash           Print the hash of each SWAGGER and the hashes of its...
+  prune          Prune from the SWAGGER unused global...
+  serve          Serve over HTTP the swaggers of the DIRECTORY.
+  validate       Validate the SWAGGER according to the specs.
 """,
     ),
     (
@@ -38,14 +95,20 @@ Commands:
 
   Validate the SWAGGER according to the specs.
 
-  SWAGGER is the path to the swagger file, in json or yaml format. It can be a
-  file path, an URL or a dash (-) for the stdin
+  SWAGGER is the path to the swagger file, in json or yaml format (possibly
+  compressed). It can be a file path, an URL or a dash (-) for the stdin
 
 Options:
-  -v, --verbose          Make the operation more talkative
-  -s, --silent           Do not print the oasapi messages to stderr
-  -o, --output FILENAME  Path to write the resulting swagger ('-' for stdout)
-  --help                 Show this message and exit.
+  -v, --verbose                   Make the operation more talkative
+  -s, --silent                    Do not print the oasapi messages to stderr
+  -o, --output FILENAME           Path to write the resulting swagger ('-' for
+                                  stdout, .gz/.bz2/.zst to compress it)
+  --output-format [json|yaml|msgpack|cbor]
+                                  Format of the resulting swagger (by default,
+                                  from the extension of --output)
+  --format [text|jsonl|sarif]     Format of the events reported (jsonl and sarif
+                                  are written to stdout)  [default: text]
+  --help                          Show this message and exit.
 """,
     ),
     (
@@ -55,14 +118,21 @@ Options:
   Prune from the SWAGGER unused global definitions/responses/parameters,
   unused securityDefinition/scopes, unused tags and unused paths.
 
-  SWAGGER is the path to the swagger file, in json or yaml format. It can be a
-  file path, an URL or a dash (-) for the stdin
+  SWAGGER is the path to the swagger file, in json or yaml format (possibly
+  compressed). It can be a file path, an URL or a dash (-) for the stdin
 
 Options:
-  -v, --verbose          Make the operation more talkative
-  -s, --silent           Do not print the oasapi messages to stderr
-  -o, --output FILENAME  Path to write the resulting swagger ('-' for stdout)
-  --help                 Show this message and exit.
+  -v, --verbose                   Make the operation more talkative
+  -s, --silent                    Do not print the oasapi messages to stderr
+  -o, --output FILENAME           Path to write the resulting swagger ('-' for
+                                  stdout, .gz/.bz2/.zst to compress it)
+  --output-format [json|yaml|msgpack|cbor]
+                                  Format of the resulting swagger (by default,
+                                  from the extension of --output)
+  --format [text|jsonl|sarif]     Format of the events reported (jsonl and sarif
+                                  are written to stdout)  [default: text]
+  --report-only                   Only report the changes (no swagger built)
+  --help                          Show this message and exit.
 """,
     ),
     (
@@ -72,18 +142,24 @@ Options:
   Filter the SWAGGER operations based on tags, operation path or security
   scopes.
 
-  SWAGGER is the path to the swagger file, in json or yaml format. It can be a
-  file path, an URL or a dash (-) for the stdin
+  SWAGGER is the path to the swagger file, in json or yaml format (possibly
+  compressed). It can be a file path, an URL or a dash (-) for the stdin
 
 Options:
-  -v, --verbose               Make the operation more talkative
-  -s, --silent                Do not print the oasapi messages to stderr
-  -o, --output FILENAME       Path to write the resulting swagger ('-' for
-                              stdout)
-  -t, --tag TEXT              A tag to keep
-  -p, --path TEXT             A path to keep
-  -sc, --security-scope TEXT  A security scope to keep
-  --help                      Show this message and exit.
+  -v, --verbose                   Make the operation more talkative
+  -s, --silent                    Do not print the oasapi messages to stderr
+  -o, --output FILENAME           Path to write the resulting swagger ('-' for
+                                  stdout, .gz/.bz2/.zst to compress it)
+  --output-format [json|yaml|msgpack|cbor]
+                                  Format of the resulting swagger (by default,
+                                  from the extension of --output)
+  --format [text|jsonl|sarif]     Format of the events reported (jsonl and sarif
+                                  are written to stdout)  [default: text]
+  --report-only                   Only report the changes (no swagger built)
+  -t, --tag TEXT                  A tag to keep
+  -p, --path TEXT                 A path to keep
+  -sc, --security-scope TEXT      A security scope to keep
+  --help                          Show this message and exit.
 """,
     ),
 ]
@@ -290,8 +366,8 @@ def test_prune_output_bad_file_extension():
         result.output
         == """Usage: prune [OPTIONS] SWAGGER
 
-Error: Invalid value for "-o" / "--output": the extension of the file is 'nonsense' while it should be one of ['json', 'yaml', 'yml']
-"""
+Error: Invalid value for "-o" / "--output": the extension of the file is 'nonsense' """
+        "while it should be one of ['json', 'yaml', 'yml', 'msgpack', 'cbor']\n"
     )
     assert result.exit_code == 2
 
@@ -342,3 +418,478 @@ paths:
 """
     )
     assert result.exit_code == 0
+
+
+@pytest.mark.parametrize(
+    "command,arguments,message",
+    [
+        (
+            prune,
+            [],
+            """The swagger has been pruned of 1 elements:
+- Reference filtered out @ 'definitions.unused' -> reference not used
+""",
+        ),
+        (
+            filter,
+            ["-t", "mytag"],
+            """The swagger has filtered or removed the following 1 operations:
+- Operation removed as no filter matched. @ 'paths./foo.get' -> The operation has been removed as it does not match any filter.
+""",
+        ),
+    ],
+)
+def test_report_only(command, arguments, message):
+    runner = CliRunner()
+    swagger = dict(
+        swagger="2.0",
+        info=dict(title="my API", version="v1.0"),
+        paths={"/foo": dict(get=dict(tags=["othertag"]))},
+        definitions={"unused": {}},
+    )
+
+    result = runner.invoke(command, ["-", "--report-only"] + arguments, input=json.dumps(swagger))
+    assert result.output == message
+    assert result.exit_code == 0
+
+    result = runner.invoke(
+        command, ["-", "--report-only", "-o", "-"] + arguments, input=json.dumps(swagger)
+    )
+    assert "Error: --output cannot be used with --report-only" in result.output
+    assert result.exit_code == 2
+
+
+def test_bundle_file(tmp_path):
+    (tmp_path / "common").mkdir()
+    (tmp_path / "common" / "errors.yaml").write_text("definitions:\n  Error: {type: object}\n")
+    swagger = dict(
+        swagger="2.0",
+        info=dict(title="my API", version="v1.0"),
+        paths={
+            "/foo": {
+                "get": {
+                    "responses": {
+                        "default": {
+                            "description": "Error",
+                            "schema": {"$ref": "common/errors.yaml#/definitions/Error"},
+                        }
+                    }
+                }
+            }
+        },
+    )
+    (tmp_path / "swagger.json").write_text(json.dumps(swagger))
+
+    runner = CliRunner()
+    result = runner.invoke(bundle, [str(tmp_path / "swagger.json"), "-o", "-"])
+
+    assert result.exit_code == 0
+    assert result.output.endswith(
+        "definitions:\n"
+        "  Error:\n"
+        "    type: object\n"
+        "The swagger has been bundled with the following 1 external references:\n"
+        "- External reference bundled @ 'paths./foo.get.responses.default.schema' -> "
+        "reference 'common/errors.yaml#/definitions/Error' bundled as '#/definitions/Error'\n"
+    )
+
+
+@pytest.mark.parametrize("memory", [True, False])
+def test_flatten(memory):
+    runner = CliRunner()
+    swagger = dict(
+        swagger="2.0",
+        info=dict(title="my API", version="v1.0"),
+        paths={"/foo": {"get": {"responses": {"200": {"$ref": "#/responses/ok"}}}}},
+        responses={"ok": {"description": "OK"}},
+    )
+
+    result = runner.invoke(
+        flatten, ["-", "-o", "-", "--no-shared"] + (["--memory"] if memory else []), input=json.dumps(swagger)
+    )
+
+    assert result.exit_code == 0
+    assert "Peak memory allocated while flattening: " in result.output if memory else True
+    assert result.output.endswith(
+        """/foo:
+    get:
+      responses:
+        '200':
+          description: OK
+responses:
+  ok:
+    description: OK
+The swagger has been flattened with the following 1 references inlined or kept:
+- Reference inlined @ 'responses.ok' -> reference inlined 1 times
+"""
+    )
+
+
+def test_dedupe():
+    runner = CliRunner()
+    schema = {"type": "object", "properties": {"a": {"type": "string"}}}
+    swagger = dict(
+        swagger="2.0",
+        info=dict(title="my API", version="v1.0"),
+        paths={
+            "/foo": {"get": {"responses": {"200": {"description": "OK", "schema": schema}}}},
+            "/bar": {"get": {"responses": {"200": {"description": "OK", "schema": schema}}}},
+        },
+    )
+
+    result = runner.invoke(dedupe, ["-", "-o", "-"], input=json.dumps(swagger))
+    assert result.exit_code == 0
+    assert "$ref: '#/definitions/Schema1'" in result.output
+    assert "- Inline schema extracted @ 'definitions.Schema1' -> inline schema repeated 2 times" in result.output
+
+    result = runner.invoke(dedupe, ["-", "--threshold", "2"], input=json.dumps(swagger))
+    assert result.exit_code == 0
+    assert result.output == "The swagger has no duplicated definitions or inline schemas.\n"
+
+
+@pytest.mark.parametrize("output_format", ["jsonl", "sarif"])
+def test_format(output_format):
+    runner = CliRunner(mix_stderr=False)
+    swagger = dict(
+        swagger="2.0",
+        info=dict(title="my API", version="v1.0"),
+        paths={"/foo": {"get": {"operationId": "op", "responses": {"200": {"$ref": "#/responses/ok"}}}}},
+    )
+
+    result = runner.invoke(validate, ["-", "--format", output_format], input=json.dumps(swagger))
+
+    assert result.exit_code == 1
+    assert result.stderr == "The swagger is not valid. Following 1 errors have been detected:\n"
+    event = {
+        "event": "ReferenceNotFoundValidationError",
+        "path": ["paths", "/foo", "get", "responses", "200", "$ref"],
+        "reason": "reference '#/responses/ok' does not exist",
+        "type": "Reference not found",
+    }
+    if output_format == "jsonl":
+        assert [json.loads(line) for line in result.stdout.splitlines()] == [event]
+    else:
+        sarif = json.loads(result.stdout)
+        assert sarif["version"] == "2.1.0"
+        assert sarif["runs"][0]["tool"]["driver"]["name"] == "oasapi"
+        assert sarif["runs"][0]["results"] == [
+            {
+                "ruleId": "ReferenceNotFoundValidationError",
+                "level": "error",
+                "message": {"text": "reference '#/responses/ok' does not exist"},
+                "locations": [
+                    {
+                        "physicalLocation": {"artifactLocation": {"uri": "[stdin]"}},
+                        "logicalLocations": [
+                            {"fullyQualifiedName": "paths./foo.get.responses.200.$ref"}
+                        ],
+                    }
+                ],
+                "properties": event,
+            }
+        ]
+
+    # no events
+    del swagger["paths"]["/foo"]["get"]["responses"]["200"]["$ref"]
+    swagger["paths"]["/foo"]["get"]["responses"]["200"]["description"] = "OK"
+    result = runner.invoke(validate, ["-", "--format", output_format], input=json.dumps(swagger))
+    assert result.exit_code == 0
+    assert result.stderr == "The swagger is valid.\n"
+    if output_format == "jsonl":
+        assert result.stdout == ""
+    else:
+        assert json.loads(result.stdout)["runs"][0]["results"] == []
+
+    # stdout is used by the events
+    result = runner.invoke(prune, ["-", "--format", output_format, "-o", "-"], input=json.dumps(swagger))
+    assert result.exit_code == 2
+    assert f"--output cannot be stdout with --format {output_format}" in result.stderr
+
+
+@pytest.mark.parametrize("output_format", ["jsonl", "sarif"])
+def test_format_stable(output_format):
+    # the order of the events of validate must not depend on the hash seed
+    outputs = set()
+    for seed in ["1", "2", "3"]:
+        result = subprocess.run(
+            [sys.executable, "-m", "oasapi", "validate", "--format", output_format, "-s"]
+            + [str(SWAGGER_SAMPLES_PATH / "swagger_petstore_with_errors.json")],
+            stdout=subprocess.PIPE,
+            env=dict(os.environ, PYTHONHASHSEED=seed),
+        )
+        assert result.returncode == 1
+        outputs.add(result.stdout)
+    assert len(outputs) == 1
+
+    if output_format == "jsonl":
+        # in the order the events are produced
+        events = [json.loads(line) for line in outputs.pop().splitlines()]
+        swagger = json.loads((SWAGGER_SAMPLES_PATH / "swagger_petstore_with_errors.json").read_text())
+        _, errors = oasapi.validate(swagger)
+        assert len(events) > 1
+        assert events == [json.loads(json.dumps(error.as_dict(), default=str)) for error in errors]
+
+
+def test_fleet_check(tmp_path):
+    runner = CliRunner()
+    swagger = dict(
+        swagger="2.0",
+        info=dict(title="my API", version="v1.0"),
+        paths={"/foo": {"get": {"operationId": "op", "responses": {"200": {"description": "OK"}}}}},
+    )
+    (tmp_path / "a.json").write_text(json.dumps(swagger))
+
+    result = runner.invoke(fleet_check, [str(tmp_path)])
+    assert result.exit_code == 0
+    assert result.output == "No collisions detected across the 1 swaggers.\n"
+
+    (tmp_path / "b.json").write_text(json.dumps(swagger))
+    result = runner.invoke(fleet_check, [str(tmp_path), "--index", str(tmp_path / "index.jsonl")])
+    assert result.exit_code == 1
+    assert result.output == (
+        "- Duplicate operation across swaggers @ 'b.json.paths./foo.get' -> "
+        "the operation 'GET /foo' is already defined in 'a.json'\n"
+        "- Duplicate operationId across swaggers @ 'b.json.paths./foo.get.operationId' -> "
+        "the operationId 'op' is already used in 'a.json'\n"
+        "Following 2 collisions have been detected across the 2 swaggers.\n"
+    )
+    assert (tmp_path / "index.jsonl").exists()
+
+
+@pytest.mark.parametrize("output_format", ["text", "json"])
+def test_hash(output_format):
+    runner = CliRunner()
+    swagger = dict(
+        swagger="2.0",
+        info=dict(title="my API", version="v1.0"),
+        paths={
+            "/foo": {
+                "get": {"responses": {"200": {"description": "OK"}}},
+                "post": {"responses": {"201": {"description": "Created"}}},
+            }
+        },
+    )
+    tree = oasapi.fingerprint(swagger)
+
+    result = runner.invoke(fingerprint, ["-", "--format", output_format], input=json.dumps(swagger))
+    assert result.exit_code == 0
+    if output_format == "json":
+        assert json.loads(result.output) == {
+            "root": tree.digest,
+            "operations": {
+                "GET /foo": tree["paths", "/foo", "get"],
+                "POST /foo": tree["paths", "/foo", "post"],
+            },
+        }
+    else:
+        assert result.output == (
+            f"{tree.digest}  [stdin]\n"
+            f"{tree['paths', '/foo', 'get']}  GET /foo\n"
+            f"{tree['paths', '/foo', 'post']}  POST /foo\n"
+        )
+
+
+def test_diff(tmp_path):
+    runner = CliRunner()
+    swagger = dict(
+        swagger="2.0",
+        info=dict(title="my API", version="v1.0"),
+        paths={"/foo": {"get": {"responses": {"200": {"description": "OK"}}}}},
+    )
+    (tmp_path / "old.json").write_text(json.dumps(swagger))
+
+    result = runner.invoke(diff, [str(tmp_path / "old.json"), "-"], input=json.dumps(swagger))
+    assert result.exit_code == 0
+    assert result.output == "The swaggers have no changes.\n"
+
+    swagger["paths"]["/bar"] = swagger["paths"].pop("/foo")
+    result = runner.invoke(diff, [str(tmp_path / "old.json"), "-"], input=json.dumps(swagger))
+    assert result.exit_code == 1
+    assert result.output == (
+        "- Operation added @ 'paths./bar.get' -> the operation 'GET /bar' has been added\n"
+        "- [breaking] Operation removed @ 'paths./foo.get' -> "
+        "the operation 'GET /foo' has been removed\n"
+        "Following 2 changes (1 breaking) have been detected.\n"
+    )
+
+    result = runner.invoke(
+        diff, [str(tmp_path / "old.json"), "-", "--format", "sarif", "-s"], input=json.dumps(swagger)
+    )
+    assert result.exit_code == 1
+    # in the order of the changes (the removal found in the old swagger first)
+    assert [result["level"] for result in json.loads(result.output)["runs"][0]["results"]] == [
+        "error",
+        "note",
+    ]
+
+
+def test_filter_stream(tmp_path):
+    runner = CliRunner()
+    swagger_path = SWAGGER_SAMPLES_PATH / "swagger_petstore.json"
+    output_path = tmp_path / "output.json"
+
+    result = runner.invoke(filter, [str(swagger_path), "-t", "store", "-o", str(output_path)])
+    expected_output = result.output
+    expected_swagger = json.loads(output_path.read_text())
+
+    result = runner.invoke(filter_stream, [str(swagger_path), "-t", "store", "-o", str(output_path)])
+    assert result.exit_code == 0
+    assert json.loads(output_path.read_text()) == expected_swagger
+    # the actions are the same (but in the order of the swagger)
+    assert sorted(result.output.splitlines()[:-1]) == expected_output.splitlines()[1:]
+    assert result.output.splitlines()[-1] == (
+        "The swagger has filtered or removed the above 16 operations."
+    )
+
+    result = runner.invoke(filter_stream, ["-", "-t", "store"], input='{"paths": {}}')
+    assert result.exit_code == 0
+    assert result.output == '{"paths":{}}\nThe swagger is unchanged after filtering.\n'
+
+    result = runner.invoke(filter_stream, ["-", "-t", "store"], input='{"paths": [')
+    assert result.exit_code == 1
+    assert "Could not parse the json swagger" in result.output
+
+
+def test_compressed_files(tmp_path):
+    runner = CliRunner()
+    content = (SWAGGER_SAMPLES_PATH / "swagger_petstore.json").read_text()
+    swagger_path = tmp_path / "swagger.json.gz"
+    swagger_path.write_bytes(gzip.compress(content.encode("utf-8")))
+
+    result = runner.invoke(validate, [str(swagger_path)])
+    assert result.exit_code == 0
+    assert result.output == "The swagger is valid.\n"
+
+    result = runner.invoke(
+        filter,
+        ["-", "-t", "store", "-o", str(tmp_path / "output.yaml.bz2")],
+        input=gzip.compress(content.encode("utf-8")),
+    )
+    assert result.exit_code == 0
+    output = yaml.safe_load(bz2.decompress((tmp_path / "output.yaml.bz2").read_bytes()))
+    expected, _ = oasapi.filter(
+        json.loads(content), conditions=[FilterCondition(tags=["store"])]
+    )
+    assert output == expected
+
+    result = runner.invoke(
+        filter_stream, [str(swagger_path), "-t", "store", "-o", str(tmp_path / "output.json.gz")]
+    )
+    assert result.exit_code == 0
+    assert json.loads(gzip.decompress((tmp_path / "output.json.gz").read_bytes())) == output
+
+    result = runner.invoke(validate, ["-"], input=gzip.compress(content.encode("utf-8"))[:100])
+    assert result.exit_code == 1
+    assert "Could not read the swagger from '[stdin]'" in result.output
+
+
+@pytest.mark.parametrize("format", ["msgpack", "cbor"])
+def test_binary_output(tmp_path, format):
+    pytest.importorskip({"msgpack": "msgpack", "cbor": "cbor2"}[format])
+    runner = CliRunner()
+    swagger_path = str(SWAGGER_SAMPLES_PATH / "swagger_petstore.yaml")
+    output_path = str(tmp_path / f"output.{format}.gz")
+
+    result = runner.invoke(filter, [swagger_path, "-t", "store", "-o", output_path])
+    assert result.exit_code == 0
+    result = runner.invoke(filter, [output_path, "-o", str(tmp_path / "output.yaml")])
+    assert result.exit_code == 0
+    assert result.output == "The swagger is unchanged after filtering.\n"
+    expected, _ = oasapi.filter(
+        yaml.safe_load(Path(swagger_path).read_text()), conditions=[FilterCondition(tags=["store"])]
+    )
+    assert yaml.safe_load((tmp_path / "output.yaml").read_text()) == expected
+
+    # from stdin to stdout
+    result = runner.invoke(
+        prune,
+        ["-", "-s", "-o", "-", "--output-format", format],
+        input=gzip.decompress(Path(output_path).read_bytes()),
+    )
+    assert result.exit_code == 0
+    assert oasapi.binary.load_binary(result.stdout_bytes) == oasapi.prune(expected)[0]
+
+
+def test_parse_cache_dir(tmp_path, monkeypatch):
+    runner = CliRunner()
+    swagger_path = str(SWAGGER_SAMPLES_PATH / "swagger_petstore.yaml")
+    options = ["--parse-cache-dir", str(tmp_path / "cache")]
+    parsed = []
+    parse_swagger = oasapi.cache.parse_swagger
+    monkeypatch.setattr(
+        oasapi.cache, "parse_swagger", lambda content: parsed.append(1) or parse_swagger(content)
+    )
+
+    for command in ["validate", "prune", "validate"]:
+        result = runner.invoke(main, options + [command, swagger_path])
+        assert result.exit_code == 0
+    # the swagger has been parsed only once for all the commands
+    assert len(parsed) == 1
+
+
+@pytest.fixture
+def specs_server(tmp_path):
+    """oasapi server serving the petstore swagger at the url {base_url}/specs/petstore"""
+    (tmp_path / "specs").mkdir()
+    (tmp_path / "specs" / "petstore.json").write_text(
+        (SWAGGER_SAMPLES_PATH / "swagger_petstore.json").read_text()
+    )
+    server = make_server(tmp_path / "specs", port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield server, f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_cache_dir(tmp_path, specs_server):
+    runner = CliRunner()
+    server, base_url = specs_server
+    url = f"{base_url}/specs/petstore"
+    cache_dir = str(tmp_path / "cache")
+
+    for _ in range(2):
+        result = runner.invoke(main, ["--cache-dir", cache_dir, "validate", url])
+        assert result.exit_code == 0
+        assert result.output == "The swagger is valid.\n"
+
+    # the server is stopped, the cached copy is used
+    server.shutdown()
+    result = runner.invoke(main, ["--cache-dir", cache_dir, "--offline", "validate", url])
+    assert result.exit_code == 0
+    assert result.output == "The swagger is valid.\n"
+
+    result = runner.invoke(
+        main, ["--cache-dir", cache_dir, "--offline", "validate", url + "?tag=pet"]
+    )
+    assert result.exit_code == 1
+    assert "is not in the cache" in result.output
+
+    result = runner.invoke(main, ["--offline", "validate", url])
+    assert result.exit_code == 2
+    assert "--offline requires a --cache-dir" in result.output
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_hash_urls(tmp_path, specs_server, cache):
+    runner = CliRunner()
+    _, base_url = specs_server
+    urls = [f"{base_url}/specs/petstore?tag={tag}" for tag in ["pet", "store", "user"]]
+    swagger_path = str(SWAGGER_SAMPLES_PATH / "swagger_petstore.json")
+    options = ["--cache-dir", str(tmp_path / "cache")] if cache else []
+
+    result = runner.invoke(main, options + ["hash", "--format", "json", swagger_path] + urls)
+    assert result.exit_code == 0
+    hashes = json.loads(result.output)
+    assert list(hashes) == [swagger_path] + urls
+    # the operations of the filtered swaggers are the ones of the full swagger
+    for url in urls:
+        for operation, digest in hashes[url]["operations"].items():
+            assert hashes[swagger_path]["operations"][operation] == digest
+
+    result = runner.invoke(main, options + ["hash", f"{base_url}/specs/unknown"] + urls)
+    assert result.exit_code == 1
+    assert result.output == (
+        f"Error: Error when downloading {base_url}/specs/unknown : swagger 'unknown' not found (404)\n"
+    )
@@ -1,11 +1,15 @@
+import io
+import json
 import logging
+import sys
 import time
 from pathlib import Path
 
 import pytest
 import yaml
 
-from oasapi.common import commonprefix
+import oasapi.common
+from oasapi.common import commonprefix, copy_swagger, Interner, parse_swagger, write_swagger
 from oasapi.timer import Timer
 
 SWAGGER_SAMPLES_PATH = Path(__file__).parent.parent / "docs" / "samples"
@@ -161,16 +165,16 @@ paths:
 @pytest.mark.parametrize(
     "name,level,log_message",
     [
-        ("my block", logging.INFO, "INFO     oasapi.timer.timer:timer.py:19 'my block' ran in"),
+        ("my block", logging.INFO, "INFO     oasapi.timer.timer:timer.py:20 'my block' ran in"),
         (
             None,
             logging.INFO,
-            "INFO     oasapi.timer.timer:timer.py:19 '<anonymous code block>' ran in",
+            "INFO     oasapi.timer.timer:timer.py:20 '<anonymous code block>' ran in",
         ),
         (
             None,
             logging.DEBUG,
-            "INFO     oasapi.timer.timer:timer.py:19 '<anonymous code block>' ran in",
+            "INFO     oasapi.timer.timer:timer.py:20 '<anonymous code block>' ran in",
         ),
         (None, logging.ERROR, ""),
     ],
@@ -182,3 +186,94 @@ def test_time(name, level, log_message, caplog):
     # assert time interval is close to 1s (+/- 1s)
     assert abs(t.interval - 1) <= 1
     assert log_message in caplog.text
+
+
+def test_interner():
+    interner = Interner(max_length=10)
+    content = """{
+        "a": {"type": "string", "description": "a long description"},
+        "b": {"type": "string", "description": "a long description"},
+        "c": {"type": "integer", "enum": [1, 2]},
+        "d": {"type": "integer", "enum": [1.0, 2]},
+        "e": {"type": "integer", "enum": [true, 2]},
+        "f": [{"type": "string"}, {"type": "string"}]
+    }"""
+    swagger = parse_swagger(content, interner=interner)
+    swagger_other = parse_swagger(content, interner=interner)
+
+    assert swagger == parse_swagger(content)
+    assert swagger is not swagger_other
+
+    # leaf objects are shared within and across the swaggers
+    assert swagger["a"] is swagger["b"] is swagger_other["a"]
+    assert swagger["f"][0] is swagger["f"][1]
+    assert swagger["f"] is not swagger_other["f"]
+    # values equal but of different types are not shared
+    assert swagger["c"]["enum"] is not swagger["d"]["enum"]
+    assert swagger["c"]["enum"] is not swagger["e"]["enum"]
+    assert swagger["d"]["enum"][0] == 1.0 and isinstance(swagger["d"]["enum"][0], float)
+
+    # only the short strings are interned
+    assert swagger["c"]["type"] is sys.intern("".join(["inte", "ger"]))
+    assert swagger["a"]["description"] is not sys.intern("".join(["a long ", "description"]))
+
+
+def test_interner_retain():
+    interner = Interner()
+    swagger = parse_swagger('{"a": {"type": "string"}, "b": [{"type": "integer"}]}', interner=interner)
+    swagger_other = parse_swagger('{"c": {"type": "boolean"}, "d": {"type": "string"}}', interner=interner)
+    assert len(interner.leaves) == 3
+
+    interner.retain([swagger])
+    assert sorted(leaf["type"] for leaf in interner.leaves.values()) == ["integer", "string"]
+    # the leaf objects kept are still shared with the swaggers interned afterwards
+    swagger_new = parse_swagger('{"e": {"type": "string"}, "f": {"type": "boolean"}}', interner=interner)
+    assert swagger_new["e"] is swagger["a"]
+    assert swagger_new["f"] is not swagger_other["c"]
+
+
+def test_interner_copy():
+    interner = Interner()
+    content = """{
+        "definitions": {},
+        "a": {"type": "string"},
+        "b": {"type": "string"},
+        "c": {"tags": []},
+        "d": {"tags": []}
+    }"""
+    swagger = parse_swagger(content, interner=interner)
+    swagger_other = parse_swagger(content, interner=interner)
+
+    # the empty dicts/lists are not shared
+    assert swagger["definitions"] is not swagger_other["definitions"]
+    assert swagger["c"]["tags"] is not swagger["d"]["tags"]
+    assert swagger["a"] is swagger_other["a"]
+
+    # a change of a copy in place changes only one location of the copy and not the other swaggers
+    copied = copy_swagger(swagger)
+    assert copied == swagger
+    copied["definitions"].setdefault("Pet", {})
+    copied["a"]["format"] = "date"
+    copied["c"]["tags"].append("pet")
+    assert copied["b"] == {"type": "string"}
+    assert copied["d"] == {"tags": []}
+    assert swagger == swagger_other == parse_swagger(content)
+
+
+@pytest.mark.parametrize("buffer_size", [7, 2 ** 20])
+def test_write_swagger(buffer_size, monkeypatch):
+    monkeypatch.setattr(oasapi.common, "WRITE_BUFFER_SIZE", buffer_size)
+    shared = {"type": "string"}
+    swagger = {"swagger": "2.0", "paths": {"/b": {}, "/a": {}}, "x": [shared, shared, 1.5, None]}
+
+    output = io.StringIO()
+    write_swagger(swagger, output, "json")
+    assert output.getvalue() == json.dumps(swagger, indent=2)
+
+    output = io.StringIO()
+    write_swagger(swagger, output, "yaml")
+    assert output.getvalue() == yaml.dump(swagger, sort_keys=False)
+    assert list(yaml.safe_load(output.getvalue())["paths"]) == ["/b", "/a"]
+
+    with pytest.raises(ValueError):
+        write_swagger(swagger, io.StringIO(), "xml")
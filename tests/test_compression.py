@@ -0,0 +1,60 @@
+import bz2
+import gzip
+import io
+
+import pytest
+
+import oasapi.compression
+from oasapi.compression import open_compressed, open_decompressed, split_compression
+
+CONTENT = '{"swagger": "2.0", "info": {"title": "café"}}\n' * 100
+
+
+def test_split_compression():
+    assert split_compression("swagger.json.gz") == ("swagger.json", "gz")
+    assert split_compression("swagger.yaml.zst") == ("swagger.yaml", "zst")
+    assert split_compression("swagger.json") == ("swagger.json", None)
+    assert split_compression("gz") == ("gz", None)
+
+
+@pytest.mark.parametrize("compression", ["gz", "bz2", "zst", None])
+def test_compressed_roundtrip(tmp_path, compression):
+    if compression == "zst":
+        pytest.importorskip("zstandard")
+    path = tmp_path / f"swagger.json.{compression}"
+
+    if compression is None:
+        path.write_text(CONTENT, encoding="utf-8")
+    else:
+        with open_compressed(path, compression) as f:
+            f.write(CONTENT)
+        assert path.read_bytes() != CONTENT.encode("utf-8")
+
+    # the compression is detected from the content
+    with open(path, "rb") as f:
+        assert open_decompressed(f).read().decode("utf-8") == CONTENT
+
+    # from a stream without peek (e.g. an http response)
+    class Stream(io.RawIOBase):
+        def __init__(self, content):
+            self.content = io.BytesIO(content)
+
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            return self.content.readinto(buffer)
+
+    assert open_decompressed(Stream(path.read_bytes())).read().decode("utf-8") == CONTENT
+
+
+def test_zstandard_missing(monkeypatch):
+    monkeypatch.setattr(oasapi.compression, "zstandard", None)
+    with pytest.raises(ImportError):
+        open_decompressed(io.BytesIO(b"\x28\xb5\x2f\xfd..."))
+    with pytest.raises(ValueError):
+        open_compressed("swagger.json.xz", "xz")
+
+    # gzip/bzip2 do not need it
+    assert open_decompressed(io.BytesIO(gzip.compress(b"{}"))).read() == b"{}"
+    assert open_decompressed(io.BytesIO(bz2.compress(b"{}"))).read() == b"{}"
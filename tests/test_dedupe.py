@@ -0,0 +1,202 @@
+import yaml
+
+from oasapi.dedupe import dedupe, merge_definitions, extract_inline_schemas
+from oasapi.events import (
+    DefinitionMergedFilterAction,
+    InlineSchemaExtractedFilterAction,
+    InlineSchemaReplacedFilterAction,
+    SwaggerSizeReducedFilterAction,
+)
+
+swagger_str = """
+swagger: '2.0'
+info:
+  version: v1.0
+  title: my api
+paths:
+  /pets:
+    get:
+      responses:
+        200:
+          description: OK
+          schema:
+            type: array
+            items:
+              $ref: "#/definitions/Pet"
+        default:
+          description: Error
+          schema:
+            type: object
+            properties:
+              code: {type: integer}
+              message: {type: string}
+  /owners:
+    get:
+      responses:
+        200:
+          description: OK
+          schema:
+            $ref: "#/definitions/Owner"
+        default:
+          description: Error
+          schema:
+            properties:
+              message: {type: string}
+              code: {type: integer}
+            type: object
+    post:
+      parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          properties:
+            name: {type: string}
+      responses:
+        default:
+          description: Error
+          schema:
+            type: object
+            properties:
+              code: {type: integer}
+              message: {type: string}
+definitions:
+  Pet:
+    type: object
+    properties:
+      owner: {$ref: "#/definitions/Person"}
+  Animal:
+    type: object
+    properties:
+      owner: {$ref: "#/definitions/Owner"}
+  Person:
+    type: object
+    properties:
+      name: {type: string}
+  Owner:
+    properties:
+      name: {type: string}
+    type: object
+"""
+
+
+def test_merge_definitions():
+    swagger = yaml.safe_load(swagger_str)
+
+    actions = merge_definitions(swagger)
+
+    # Owner identical to Person, then Animal identical to Pet once Owner merged
+    assert actions == [
+        DefinitionMergedFilterAction(
+            path=("definitions", "Owner"),
+            reason="definition identical to 'definitions.Person' merged into it",
+        ),
+        DefinitionMergedFilterAction(
+            path=("definitions", "Animal"),
+            reason="definition identical to 'definitions.Pet' merged into it",
+        ),
+    ]
+    assert list(swagger["definitions"]) == ["Pet", "Person"]
+    assert swagger["paths"]["/owners"]["get"]["responses"][200]["schema"] == {
+        "$ref": "#/definitions/Person"
+    }
+
+
+def test_extract_inline_schemas():
+    swagger = yaml.safe_load(swagger_str)
+
+    actions = extract_inline_schemas(swagger, threshold=2)
+
+    assert actions == [
+        InlineSchemaExtractedFilterAction(
+            path=("definitions", "Schema5"),
+            reason="inline schema repeated 3 times moved to the definitions",
+        ),
+        # replaced by a reference to the existing Person definition
+        InlineSchemaReplacedFilterAction(
+            path=("paths", "/owners", "post", "parameters", "[0]", "schema"),
+            reason="inline schema identical to 'definitions.Person' replaced by a reference",
+        ),
+    ]
+    assert swagger["definitions"]["Schema5"] == {
+        "type": "object",
+        "properties": {"code": {"type": "integer"}, "message": {"type": "string"}},
+    }
+    for endpoint in ["/pets", "/owners"]:
+        assert swagger["paths"][endpoint]["get"]["responses"]["default"]["schema"] == {
+            "$ref": "#/definitions/Schema5"
+        }
+
+    # not repeated enough to be extracted
+    swagger = yaml.safe_load(swagger_str)
+    actions = extract_inline_schemas(swagger, threshold=3)
+    assert [action.type for action in actions] == ["Inline schema replaced by reference"]
+
+
+def test_extract_inline_schemas_outermost_first():
+    inner = {"type": "object", "properties": {"x": {"type": "integer"}}}
+    outer = {"type": "object", "title": "Outer", "properties": {"a": inner, "b": inner}}
+    swagger = {
+        "paths": {
+            "/foo": {
+                "get": {"responses": {200: {"schema": outer}, 400: {"schema": outer}}},
+                "post": {"responses": {200: {"schema": {"type": "array", "items": inner}}}},
+            }
+        }
+    }
+    swagger = yaml.safe_load(yaml.safe_dump(swagger))
+
+    actions = extract_inline_schemas(swagger)
+
+    assert actions == [
+        InlineSchemaExtractedFilterAction(
+            path=("definitions", "Outer"),
+            reason="inline schema repeated 2 times moved to the definitions",
+        ),
+        InlineSchemaExtractedFilterAction(
+            path=("definitions", "Schema2"),
+            reason="inline schema repeated 5 times moved to the definitions",
+        ),
+        # in a next round, the nested schemas of the extracted Outer are replaced
+        InlineSchemaReplacedFilterAction(
+            path=("definitions", "Outer", "properties", "a"),
+            reason="inline schema identical to 'definitions.Schema2' replaced by a reference",
+        ),
+        InlineSchemaReplacedFilterAction(
+            path=("definitions", "Outer", "properties", "b"),
+            reason="inline schema identical to 'definitions.Schema2' replaced by a reference",
+        ),
+    ]
+    assert swagger["definitions"] == {
+        "Outer": {
+            "type": "object",
+            "title": "Outer",
+            "properties": {
+                "a": {"$ref": "#/definitions/Schema2"},
+                "b": {"$ref": "#/definitions/Schema2"},
+            },
+        },
+        "Schema2": inner,
+    }
+
+
+def test_dedupe():
+    swagger = yaml.safe_load(swagger_str)
+
+    swagger_deduped, actions = dedupe(swagger)
+
+    assert [action.type for action in actions] == [
+        "Duplicate definition merged",
+        "Duplicate definition merged",
+        "Inline schema extracted",
+        "Inline schema replaced by reference",
+        "Swagger size reduced",
+    ]
+    assert isinstance(actions[-1], SwaggerSizeReducedFilterAction)
+    assert actions[-1].reason.startswith("size reduced from ")
+
+    # the original swagger is unchanged
+    assert swagger == yaml.safe_load(swagger_str)
+
+    # nothing more to deduplicate
+    assert dedupe(swagger_deduped) == (swagger_deduped, [])
@@ -0,0 +1,133 @@
+import yaml
+
+from oasapi.dereference import dereference
+from oasapi.events import ReferenceInlinedDereferenceAction, RecursiveReferenceKeptDereferenceAction
+
+swagger_str = """
+swagger: '2.0'
+info:
+  version: v1.0
+  title: my api
+paths:
+  /foo:
+    parameters:
+    - $ref: "#/parameters/p"
+    get:
+      responses:
+        200:
+          description: OK
+          schema:
+            $ref: "#/definitions/Pet"
+        404:
+          $ref: "#/responses/NotFound"
+        500:
+          $ref: "#/responses/Invalid"
+parameters:
+  p: {in: query, name: p, type: string}
+responses:
+  NotFound:
+    description: Not found
+    schema:
+      $ref: "#/definitions/Error"
+definitions:
+  Pet:
+    type: object
+    properties:
+      owner: {$ref: "#/definitions/Person"}
+      error: {$ref: "#/definitions/Error"}
+  Person:
+    type: object
+    properties:
+      pets:
+        type: array
+        items: {$ref: "#/definitions/Pet"}
+  Error:
+    type: object
+    properties:
+      external: {$ref: "other.yaml#/definitions/Error"}
+"""
+
+
+def test_dereference():
+    swagger = yaml.safe_load(swagger_str)
+    swagger_dereferenced, actions = dereference(swagger)
+
+    error = {"type": "object", "properties": {"external": {"$ref": "other.yaml#/definitions/Error"}}}
+    person = {
+        "type": "object",
+        "properties": {"pets": {"type": "array", "items": {"$ref": "#/definitions/Pet"}}},
+    }
+    pet = {"type": "object", "properties": {"owner": person, "error": error}}
+
+    endpoint = swagger_dereferenced["paths"]["/foo"]
+    assert endpoint["parameters"] == [{"in": "query", "name": "p", "type": "string"}]
+    assert endpoint["get"]["responses"] == {
+        200: {"description": "OK", "schema": pet},
+        404: {"description": "Not found", "schema": error},
+        500: {"$ref": "#/responses/Invalid"},
+    }
+    assert swagger_dereferenced["definitions"] == {
+        "Pet": pet,
+        # resolved while resolving Pet, its recursive reference to Pet is kept
+        "Person": person,
+        "Error": error,
+    }
+
+    # inlined objects are shared
+    assert endpoint["get"]["responses"][404]["schema"] is swagger_dereferenced["definitions"]["Error"]
+    assert endpoint["get"]["responses"][200]["schema"]["properties"]["error"] is (
+        swagger_dereferenced["definitions"]["Error"]
+    )
+
+    assert actions == [
+        RecursiveReferenceKeptDereferenceAction(
+            path=("definitions", "Pet"),
+            reason="the item refers to itself, its recursive references are kept",
+        ),
+        ReferenceInlinedDereferenceAction(
+            path=("definitions", "Pet"), reason="reference inlined 1 times"
+        ),
+        ReferenceInlinedDereferenceAction(
+            path=("definitions", "Person"), reason="reference inlined 1 times"
+        ),
+        ReferenceInlinedDereferenceAction(
+            path=("definitions", "Error"), reason="reference inlined 2 times"
+        ),
+        ReferenceInlinedDereferenceAction(
+            path=("responses", "NotFound"), reason="reference inlined 1 times"
+        ),
+        ReferenceInlinedDereferenceAction(
+            path=("parameters", "p"), reason="reference inlined 1 times"
+        ),
+    ]
+
+    # the original swagger is unchanged
+    assert swagger == yaml.safe_load(swagger_str)
+
+
+def test_dereference_not_shared():
+    swagger = yaml.safe_load(swagger_str)
+    swagger_dereferenced, actions = dereference(swagger, shared=False)
+    swagger_shared, actions_shared = dereference(swagger, shared=True)
+
+    assert swagger_dereferenced == swagger_shared
+    assert actions == actions_shared
+    assert swagger_dereferenced["paths"]["/foo"]["get"]["responses"][404]["schema"] is not (
+        swagger_dereferenced["definitions"]["Error"]
+    )
+
+
+def test_dereference_shared_grows_linearly():
+    # each definition refers twice to the previous one, fully copying them would need 2**50 objects
+    definitions = {"d0": {"type": "string"}}
+    for i in range(1, 50):
+        ref = {"$ref": f"#/definitions/d{i - 1}"}
+        definitions[f"d{i}"] = {"type": "object", "properties": {"a": ref, "b": dict(ref)}}
+    swagger = {"paths": {"/foo": {"get": {"parameters": [{"$ref": "#/definitions/d49"}]}}}}
+    swagger["definitions"] = definitions
+
+    swagger_dereferenced, actions = dereference(swagger)
+
+    d49 = swagger_dereferenced["paths"]["/foo"]["get"]["parameters"][0]
+    assert d49["properties"]["a"] is d49["properties"]["b"]
+    assert len(actions) == 50
@@ -0,0 +1,252 @@
+import copy
+
+import pytest
+import yaml
+
+from oasapi.diff import diff, compare_objects
+from oasapi.events import (
+    OperationAddedDiffChange,
+    OperationRemovedDiffChange,
+    OperationChangedDiffChange,
+    ParameterAddedDiffChange,
+    ParameterRemovedDiffChange,
+    ParameterChangedDiffChange,
+    DefinitionAddedDiffChange,
+    DefinitionRemovedDiffChange,
+    DefinitionChangedDiffChange,
+)
+from oasapi.fingerprint import fingerprint
+
+swagger_str = """
+swagger: '2.0'
+info:
+  version: v1.0
+  title: my api
+paths:
+  /pets:
+    parameters:
+      - $ref: "#/parameters/Limit"
+    get:
+      produces: [application/json, application/xml]
+      parameters:
+        - name: status
+          in: query
+          type: string
+          enum: [available, pending, sold]
+      responses:
+        200:
+          description: OK
+          schema:
+            type: array
+            items:
+              $ref: "#/definitions/Pet"
+    post:
+      parameters:
+        - name: pet
+          in: body
+          schema:
+            $ref: "#/definitions/Pet"
+      responses:
+        201:
+          description: Created
+  /owners:
+    get:
+      responses:
+        200:
+          description: OK
+parameters:
+  Limit:
+    name: limit
+    in: query
+    type: integer
+    maximum: 100
+definitions:
+  Pet:
+    type: object
+    required: [name]
+    properties:
+      name: {type: string}
+      tag: {type: string}
+"""
+
+
+@pytest.fixture
+def old():
+    return yaml.safe_load(swagger_str)
+
+
+@pytest.fixture
+def new(old):
+    return copy.deepcopy(old)
+
+
+def test_diff_no_changes(old, new):
+    assert diff(old, new) == []
+    # the order of the keys does not matter
+    new["paths"] = dict(reversed(list(new["paths"].items())))
+    assert diff(fingerprint(old), fingerprint(new)) == []
+
+
+def test_diff_operations(old, new):
+    del new["paths"]["/owners"]
+    new["paths"]["/pets"]["delete"] = {"responses": {"204": {"description": "Deleted"}}}
+    new["paths"]["/pets"]["get"]["produces"] = ["application/json"]
+    new["paths"]["/pets"]["post"]["responses"][201]["description"] = "The pet created"
+
+    assert diff(old, new) == [
+        OperationChangedDiffChange(
+            path=("paths", "/pets", "get"),
+            reason="the operation 'GET /pets' has changed: "
+            "'produces' values ['application/xml'] removed",
+            breaking=True,
+        ),
+        OperationChangedDiffChange(
+            path=("paths", "/pets", "post"),
+            reason="the operation 'POST /pets' has changed: " "'responses.201.description' changed",
+            breaking=False,
+        ),
+        OperationAddedDiffChange(
+            path=("paths", "/pets", "delete"),
+            reason="the operation 'DELETE /pets' has been added",
+            breaking=False,
+        ),
+        OperationRemovedDiffChange(
+            path=("paths", "/owners", "get"),
+            reason="the operation 'GET /owners' has been removed",
+            breaking=True,
+        ),
+    ]
+
+
+def test_diff_parameters(old, new):
+    get = new["paths"]["/pets"]["get"]
+    get["parameters"][0]["enum"].remove("sold")
+    get["parameters"].append({"name": "name", "in": "query", "type": "string", "required": True})
+    get["parameters"].append({"name": "tag", "in": "query", "type": "string"})
+    new["paths"]["/pets"]["post"]["parameters"] = []
+
+    changes = diff(old, new)
+    # the same changes are found comparing the digests of the fingerprints
+    assert diff(fingerprint(old), fingerprint(new)) == changes
+    assert changes == [
+        ParameterChangedDiffChange(
+            path=("paths", "/pets", "get", "parameters", "[0]"),
+            reason="the query parameter 'status' of the operation 'GET /pets' has changed: "
+            "'enum' values ['sold'] removed",
+            breaking=True,
+            parameter_name="status",
+        ),
+        ParameterAddedDiffChange(
+            path=("paths", "/pets", "get", "parameters", "[1]"),
+            reason="the query parameter 'name' of the operation 'GET /pets' has been added (required)",
+            breaking=True,
+            parameter_name="name",
+        ),
+        ParameterAddedDiffChange(
+            path=("paths", "/pets", "get", "parameters", "[2]"),
+            reason="the query parameter 'tag' of the operation 'GET /pets' has been added",
+            breaking=False,
+            parameter_name="tag",
+        ),
+        ParameterRemovedDiffChange(
+            path=("paths", "/pets", "post", "parameters", "[0]"),
+            reason="the body parameter 'pet' of the operation 'POST /pets' has been removed",
+            breaking=False,
+            parameter_name="pet",
+        ),
+    ]
+
+
+def test_diff_global_parameters(old, new):
+    # a change of a global parameter is reported once for the endpoint referring to it
+    new["parameters"]["Limit"]["maximum"] = 50
+    new["parameters"]["Limit"]["required"] = True
+
+    assert diff(fingerprint(old), new) == diff(fingerprint(old), fingerprint(new))
+    assert diff(old, new) == [
+        ParameterChangedDiffChange(
+            path=("paths", "/pets", "parameters", "[0]"),
+            reason="the query parameter 'limit' of the endpoint '/pets' has changed: "
+            "'maximum' narrowed from 100 to 50, now required",
+            breaking=True,
+            parameter_name="limit",
+        ),
+    ]
+
+
+def test_diff_definitions(old, new):
+    new["definitions"]["Pet"]["properties"]["tag"]["maxLength"] = 10
+    new["definitions"]["Pet"]["required"].append("tag")
+    new["definitions"]["Owner"] = {"type": "object"}
+    new["definitions"]["Error"] = {"type": "string"}
+    old["definitions"]["Error"] = {"type": "object"}
+    old["definitions"]["Category"] = {"type": "object"}
+
+    changes = diff(old, new)
+    assert diff(fingerprint(old), fingerprint(new)) == changes
+    assert changes == [
+        DefinitionChangedDiffChange(
+            path=("definitions", "Pet"),
+            reason="the definition 'Pet' has changed: 'required' properties ['tag'] added, "
+            "'properties.tag.maxLength' narrowed from none to 10",
+            breaking=True,
+        ),
+        DefinitionChangedDiffChange(
+            path=("definitions", "Error"),
+            reason="the definition 'Error' has changed: 'type' changed from 'object' to 'string'",
+            breaking=True,
+        ),
+        DefinitionRemovedDiffChange(
+            path=("definitions", "Category"),
+            reason="the definition 'Category' has been removed",
+            breaking=True,
+        ),
+        DefinitionAddedDiffChange(
+            path=("definitions", "Owner"),
+            reason="the definition 'Owner' has been added",
+            breaking=False,
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "old, new, expected",
+    [
+        ({"maximum": 10}, {"maximum": 20}, [(False, "'maximum' widened from 10 to 20")]),
+        ({"minLength": 1}, {}, [(False, "'minLength' widened from 1 to none")]),
+        ({"minLength": 1}, {"minLength": 2}, [(True, "'minLength' narrowed from 1 to 2")]),
+        ({}, {"enum": ["a"]}, [(True, "'enum' added")]),
+        ({"enum": ["a"]}, {"enum": ["a", "b"]}, [(False, "'enum' values ['b'] added")]),
+        ({"required": True}, {"required": False}, [(False, "not required anymore")]),
+        ({}, {"required": True}, [(True, "now required")]),
+        # a missing required flag is False
+        ({}, {"required": False}, []),
+        ({"required": False}, {}, []),
+        # a bound that is not a number
+        ({"maximum": 3}, {"maximum": "x"}, [(True, "'maximum' changed from 3 to 'x'")]),
+        ({"minLength": "1"}, {"minLength": 2}, [(True, "'minLength' changed from '1' to 2")]),
+        ({"items": {"type": "string"}}, {}, [(True, "'items' removed")]),
+        (
+            {"properties": {"a": {"type": "string"}}},
+            {"properties": {"b": {"type": "string"}}},
+            [(True, "'properties.a' removed"), (False, "'properties.b' added")],
+        ),
+        (
+            {"responses": {"200": {}, "404": {}}},
+            {"responses": {"201": {}}},
+            [
+                (True, "'responses.200' removed"),
+                (False, "'responses.404' removed"),
+                (False, "'responses.201' added"),
+            ],
+        ),
+        (
+            {"security": []},
+            {"security": [{"oauth": []}]},
+            [(True, "'security' changed from [] to [{'oauth': []}]")],
+        ),
+        ({"x-extension": 1}, {"x-extension": 2}, [(False, "'x-extension' changed")]),
+    ],
+)
+def test_compare_objects(old, new, expected):
+    assert compare_objects(old, new) == expected
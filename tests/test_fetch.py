@@ -0,0 +1,94 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import Request
+
+import pytest
+
+from oasapi.fetch import Fetcher
+
+
+@pytest.fixture
+def http_server():
+    """HTTP/1.1 server serving /swagger<i>.json (with failures on /flaky, a redirection on /redirect)
+    and recording the requests by client port (i.e. by connection)"""
+    requests = []
+    failures = {"/flaky": 2}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            requests.append((self.client_address[1], self.path, self.headers))
+            if failures.get(self.path):
+                failures[self.path] -= 1
+                status, headers, body = 503, {}, b"unavailable"
+            elif self.path == "/redirect":
+                status, headers, body = 302, {"Location": "/swagger0.json"}, b""
+            elif self.path.startswith("/swagger") or self.path == "/flaky":
+                status, headers, body = 200, {}, f'{{"path": "{self.path}"}}'.encode()
+            else:
+                status, headers, body = 404, {}, b"not found"
+            self.send_response(status)
+            for header, value in headers.items():
+                self.send_header(header, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_keep_alive(http_server):
+    base_url, requests = http_server
+    with Fetcher(max_workers=1) as fetcher:
+        for i in range(3):
+            assert (
+                fetcher.fetch(f"{base_url}/swagger{i}.json")
+                == f'{{"path": "/swagger{i}.json"}}'.encode()
+            )
+        # conditional requests (as sent by the HttpCache) raise an HTTPError like urlopen
+        with pytest.raises(HTTPError) as excinfo:
+            fetcher.open(Request(f"{base_url}/unknown", headers={"If-None-Match": '"1"'}))
+        assert excinfo.value.code == 404
+
+    # a single connection has been used
+    assert len({port for port, _, _ in requests}) == 1
+    assert requests[-1][2]["If-None-Match"] == '"1"'
+
+
+def test_fetch_retry_redirect(http_server):
+    base_url, requests = http_server
+    with Fetcher(retries=2, backoff=0.01) as fetcher:
+        assert fetcher.fetch(f"{base_url}/flaky") == b'{"path": "/flaky"}'
+        assert [path for _, path, _ in requests] == ["/flaky"] * 3
+        assert fetcher.fetch(f"{base_url}/redirect") == b'{"path": "/swagger0.json"}'
+
+    with Fetcher(retries=0) as fetcher:
+        with pytest.raises(ValueError):
+            fetcher.fetch("ftp://localhost/swagger.json")
+        with pytest.raises(OSError):
+            # nothing listening on port 1
+            fetcher.fetch("http://127.0.0.1:1/swagger.json")
+
+
+def test_fetch_all(http_server):
+    base_url, requests = http_server
+    urls = [f"{base_url}/swagger{i}.json" for i in range(20)] + [f"{base_url}/unknown"]
+
+    with Fetcher(max_workers=4, retries=0) as fetcher:
+        results = fetcher.fetch_all(urls, lambda url: fetcher.fetch(url).decode())
+
+    assert results[:-1] == [f'{{"path": "/swagger{i}.json"}}' for i in range(20)]
+    assert isinstance(results[-1], HTTPError)
+    # at most one connection per worker
+    assert len({port for port, _, _ in requests}) <= 4
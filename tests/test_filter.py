@@ -1,10 +1,20 @@
 import copy
+import importlib
+import io
+import json
 
 import pytest
 import yaml
 
+from oasapi.common import copy_swagger
 from oasapi.events import OperationChangedFilterAction, OperationRemovedFilterAction
-from oasapi.filter import filter, FilterCondition, resolve_security, generate_filter_conditions
+from oasapi.filter import (
+    filter,
+    filter_stream,
+    FilterCondition,
+    resolve_security,
+    generate_filter_conditions,
+)
 
 swagger_str = """
 swagger: '2.0'
@@ -442,7 +452,20 @@ conditions = [
 
 
 @pytest.mark.parametrize("conditions,expected_swagger, expected_actions", conditions)
-def test_filtering_conditions(swagger, conditions, expected_swagger, expected_actions):
+def test_filtering_conditions(swagger, conditions, expected_swagger, expected_actions, monkeypatch):
+    swagger_original = copy.deepcopy(swagger)
+    # the dry run copies only the (small) fields transformed (tags and security lists), not the operations
+    copied = []
+    # (the module is shadowed by the function filter in the oasapi package)
+    module = importlib.import_module("oasapi.filter")
+    monkeypatch.setattr(module, "copy_swagger", lambda o: copied.append(o) or copy_swagger(o))
+    swagger_dry_run, actions = filter(swagger, conditions=conditions, dry_run=True)
+    monkeypatch.undo()
+    assert all(isinstance(o, list) for o in copied)
+    assert swagger_dry_run is swagger
+    assert swagger == swagger_original
+    assert actions == expected_actions
+
     swagger_filtered, actions = filter(swagger, mode="keep_only", conditions=conditions)
 
     assert swagger_filtered == expected_swagger
@@ -451,6 +474,48 @@ def test_filtering_conditions(swagger, conditions, expected_swagger, expected_ac
     assert actions == expected_actions
 
 
+class NonSeekableStringIO(io.StringIO):
+    """A text stream that is not seekable (as stdin)"""
+
+    def seekable(self):
+        return False
+
+
+@pytest.mark.parametrize("conditions,expected_swagger, expected_actions", conditions)
+@pytest.mark.parametrize("seekable", [True, False])
+def test_filter_stream(
+    swagger, conditions, expected_swagger, expected_actions, seekable, monkeypatch
+):
+    # read the swagger by small chunks to have values split across chunks
+    monkeypatch.setattr("oasapi.streaming.CHUNK_SIZE", 7)
+    input = (io.StringIO if seekable else NonSeekableStringIO)(json.dumps(swagger, indent=2))
+    output = io.StringIO()
+
+    actions = filter_stream(input, output, mode="keep_only", conditions=conditions)
+    assert output.getvalue() == ""
+    assert list(actions) == expected_actions
+    assert json.loads(output.getvalue()) == expected_swagger
+
+
+def test_filter_stream_pass_through(swagger):
+    # the sections are copied with their original text
+    content = (
+        '{"swagger":"2.0", "info": {"title": "my api", "x-value": 1.50},\n"paths": {}, "tags": []}'
+    )
+    output = io.StringIO()
+    assert list(filter_stream(io.StringIO(content), output)) == []
+    assert (
+        output.getvalue()
+        == '{"swagger":"2.0","info":{"title":"my api","x-value":1.50},"paths":{},"tags":[]}\n'
+    )
+
+    with pytest.raises(NotImplementedError, match="The mode 'remove' is not yet implemented."):
+        list(filter_stream(io.StringIO(content), output, mode="remove"))
+
+    with pytest.raises(ValueError):
+        list(filter_stream(io.StringIO('{"paths": {"/foo": [}}'), io.StringIO()))
+
+
 @pytest.mark.parametrize("remove_global_security", [True, False])
 def test_filtering_conditions_no_global_security(swagger, remove_global_security):
     # with no global security, some endpoints are open and should not be filtered
@@ -535,3 +600,59 @@ def test_filtering_mode():
 
     with pytest.raises(NotImplementedError, match="The mode 'remove' is not yet implemented."):
         filter({"paths": {}}, mode="remove", conditions=[])
+
+
+def test_generate_filter_conditions_security_definitions_scopes():
+    security_definitions = {
+        "oauth": {"type": "oauth2", "scopes": {f"scope{i}": "" for i in range(300)}},
+        "api_key": {"type": "apiKey"},
+    }
+    filter = generate_filter_conditions(
+        [FilterCondition(security_scopes=["scope1", "scope299", "undeclared"])],
+        security_definitions=security_definitions,
+    )
+
+    assert not filter((), dict(security=[{"oauth": ["scope1", "scope2"]}]))
+    assert not filter((), dict(security=[{"oauth": ["scope1", "other-undeclared"]}]))
+    assert filter((), dict(security=[{"oauth": ["scope299", "undeclared"]}])) == {
+        "security": [{"oauth": ["scope299", "undeclared"]}]
+    }
+    assert filter(
+        (), dict(security=[{"oauth": ["scope2"]}, {"oauth": ["scope1"], "api_key": []}, {}])
+    ) == {"security": [{"oauth": ["scope1"], "api_key": []}]}
+
+
+def test_generate_filter_conditions_security_inherited():
+    filter = generate_filter_conditions(
+        [FilterCondition(security_scopes=["read"])],
+        global_security=[{"oauth": ["read", "write"]}, {"oauth": ["read"]}],
+    )
+
+    # operations without security inherit the global security (filtered once per condition)
+    assert filter((), dict(tags=["tag1"])) == dict(tags=["tag1"], security=[{"oauth": ["read"]}])
+    assert filter((), {}) == dict(security=[{"oauth": ["read"]}])
+    assert filter((), {})["security"] is not filter((), {})["security"]
+
+    # operations with security ignore the global security
+    assert not filter((), dict(security=[{"oauth": ["write"]}]))
+
+
+def test_filtering_global_security_not_matching_drops_inherited(swagger):
+    swagger["paths"]["/bar"] = {
+        "get": {"tags": ["tag1"]},
+        "post": {"security": [{"sec1": ["admin"]}]},
+    }
+
+    swagger_filtered, actions = filter(
+        swagger, conditions=[FilterCondition(security_scopes=["admin"])]
+    )
+
+    assert "security" not in swagger_filtered
+    assert swagger_filtered["paths"]["/bar"] == {"post": {"security": [{"sec1": ["admin"]}]}}
+    assert (
+        OperationRemovedFilterAction(
+            path=("paths", "/bar", "get"),
+            reason="The operation has been removed as it does not match any filter.",
+        )
+        in actions
+    )
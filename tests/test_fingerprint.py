@@ -0,0 +1,178 @@
+import copy
+import importlib
+
+import pytest
+import yaml
+
+from oasapi.fingerprint import fingerprint
+
+swagger_str = """
+swagger: '2.0'
+info:
+  version: v1.0
+  title: my api
+paths:
+  /pets:
+    get:
+      parameters:
+        - name: limit
+          in: query
+          type: integer
+          maximum: 100
+        - name: tag
+          in: query
+          type: string
+      responses:
+        200:
+          description: OK
+          schema:
+            type: array
+            items:
+              $ref: "#/definitions/Pet"
+    delete:
+      responses:
+        204:
+          description: Deleted
+  /owners:
+    get:
+      responses:
+        200:
+          description: OK
+definitions:
+  Pet:
+    type: object
+    properties:
+      name: {type: string}
+"""
+
+
+@pytest.fixture
+def swagger():
+    return yaml.safe_load(swagger_str)
+
+
+def test_fingerprint_canonical(swagger):
+    tree = fingerprint(swagger)
+
+    # same swagger with the keys in another order, response codes as str and integral numbers as float
+    other = copy.deepcopy(swagger)
+    other["paths"] = dict(reversed(list(other["paths"].items())))
+    other["paths"]["/pets"]["get"]["responses"] = {
+        "200": other["paths"]["/pets"]["get"]["responses"][200]
+    }
+    other["paths"]["/pets"]["get"]["parameters"][0]["maximum"] = 100.0
+    assert fingerprint(other).digest == tree.digest
+
+    # the order of the lists matters
+    other["paths"]["/pets"]["get"]["parameters"].reverse()
+    assert fingerprint(other).digest != tree.digest
+
+
+def test_fingerprint_lookup(swagger):
+    tree = fingerprint(swagger)
+
+    assert len(tree.digest) == 40
+    assert tree[()] == tree.digest
+    # the same digests for the same contents
+    assert tree["paths", "/owners", "get"] == fingerprint(swagger["paths"]["/owners"]["get"]).digest
+    # indexes as int or as in the events
+    assert tree["paths", "/pets", "get", "parameters", 1] == tree[
+        "paths", "/pets", "get", "parameters", "[1]"
+    ]
+    assert tree["paths", "/pets", "get", "parameters", "[0]", "name"] != tree[
+        "paths", "/pets", "get", "parameters", "[1]", "name"
+    ]
+    assert ("paths", "/pets", "get", "parameters", "[1]") in tree
+    assert ("paths", "/pets", "post") not in tree
+    with pytest.raises(KeyError):
+        tree["paths", "/pets", "get", "parameters", "[2]"]
+
+    assert tree.operations() == {
+        ("/pets", "get"): tree["paths", "/pets", "get"],
+        ("/pets", "delete"): tree["paths", "/pets", "delete"],
+        ("/owners", "get"): tree["paths", "/owners", "get"],
+    }
+
+
+def test_fingerprint_update(swagger):
+    tree = fingerprint(swagger)
+    operations = tree.operations()
+
+    # change of a scalar
+    swagger["paths"]["/pets"]["get"]["parameters"][0]["maximum"] = 10
+    tree.update(("paths", "/pets", "get", "parameters", "[0]", "maximum"))
+    assert tree.digest == fingerprint(swagger).digest
+    new_operations = tree.operations()
+    assert new_operations[("/pets", "get")] != operations[("/pets", "get")]
+    assert new_operations[("/owners", "get")] == operations[("/owners", "get")]
+
+    # several changes: addition of a dict, removal of an item of a list and of a key
+    swagger["paths"]["/pets"]["post"] = {"responses": {"201": {"description": "Created"}}}
+    del swagger["paths"]["/pets"]["get"]["parameters"][0]
+    del swagger["definitions"]["Pet"]["properties"]
+    tree.update(
+        ("paths", "/pets", "post"),
+        ("paths", "/pets", "get", "parameters", 0),
+        ("definitions", "Pet", "properties"),
+    )
+    assert tree.digest == fingerprint(swagger).digest
+    # the digest of a scalar is the same wherever it is
+    assert tree["paths", "/pets", "get", "parameters", 0, "name"] == fingerprint({"x": "tag"})["x",]
+
+    # rebuild of the whole tree
+    swagger.clear()
+    tree.update()
+    assert tree.digest == fingerprint({}).digest
+
+
+def test_fingerprint_update_scalar_to_dict():
+    swagger = {"info": {"contact": "x"}}
+    tree = fingerprint(swagger)
+
+    # the path of a key added in a value that was a scalar
+    swagger["info"]["contact"] = {"name": "n"}
+    tree.update(("info", "contact", "name"))
+    assert tree.digest == fingerprint(swagger).digest
+    assert tree["info", "contact"] == fingerprint(swagger)["info", "contact"]
+
+
+def test_fingerprint_node_leaf_collision(monkeypatch):
+    # digests made only of digits, that would be encoded as the integer leaves without a tag
+    # (the module is shadowed by the function fingerprint in the oasapi package)
+    module = importlib.import_module("oasapi.fingerprint")
+    hash = module._hash
+    monkeypatch.setattr(module, "_hash", lambda content: str(int(hash(content), 16)))
+    empty = int(fingerprint({}).digest)
+
+    assert fingerprint({"a": {}}).digest != fingerprint({"a": empty}).digest
+    assert fingerprint([{}]).digest != fingerprint([empty]).digest
+
+
+PARAMETERS = ("paths", "/pets", "get", "parameters")
+
+
+@pytest.mark.parametrize(
+    "change,path",
+    [
+        (lambda parameters: parameters.insert(0, {"name": "new", "in": "query"}), (0,)),
+        (lambda parameters: parameters.insert(1, {"name": "new", "in": "query"}), (1,)),
+        (lambda parameters: parameters.append({"name": "new", "in": "query"}), (2,)),
+        (lambda parameters: parameters.pop(0), (0,)),
+        (lambda parameters: parameters.pop(1), (1,)),
+        # the path of a change inside the item inserted
+        (lambda parameters: parameters.insert(0, {"name": "new", "in": "query"}), (0, "name")),
+        (lambda parameters: parameters.insert(0, "scalar"), ("[0]",)),
+    ],
+)
+def test_fingerprint_update_list(swagger, change, path):
+    tree = fingerprint(swagger)
+    parameters = swagger["paths"]["/pets"]["get"]["parameters"]
+
+    change(parameters)
+    tree.update(PARAMETERS + path)
+
+    fresh = fingerprint(swagger)
+    assert tree.digest == fresh.digest
+    # the items after the insertion/removal are rehashed at their new indexes
+    for i in range(len(parameters)):
+        assert tree[PARAMETERS + (i,)] == fresh[PARAMETERS + (i,)]
@@ -0,0 +1,174 @@
+import json
+import os
+
+import pytest
+
+import oasapi.fleet
+from oasapi.events import (
+    DuplicateOperationIdFleetError,
+    DuplicateOperationFleetError,
+    ConflictingDefinitionFleetWarning,
+)
+from oasapi.fleet import fleet_check, FleetIndex, index_swagger, INDEX_FILENAME
+
+
+def make_swagger(base_path, paths, definitions=None):
+    return {
+        "swagger": "2.0",
+        "info": {"title": "my api", "version": "v1.0"},
+        "basePath": base_path,
+        "paths": {
+            path: {
+                verb: {"operationId": operation_id, "responses": {"200": {"description": "OK"}}}
+                for verb, operation_id in operations.items()
+            }
+            for path, operations in paths.items()
+        },
+        "definitions": definitions or {},
+    }
+
+
+@pytest.fixture
+def fleet_dir(tmp_path):
+    (tmp_path / "a.json").write_text(
+        json.dumps(
+            make_swagger(
+                "/api",
+                {"/pets/{petId}": {"get": "getPet"}, "/owners": {"get": "listOwners"}},
+                {"Pet": {"type": "object"}, "Error": {"type": "string"}},
+            )
+        )
+    )
+    (tmp_path / "b.json").write_text(
+        json.dumps(
+            make_swagger(
+                "/api/",
+                {"/pets/{id}": {"get": "getAnimal"}, "/cars": {"get": "getPet"}},
+                {"Pet": {"type": "string"}, "Error": {"type": "string"}},
+            )
+        )
+    )
+    (tmp_path / "c.json").write_text(
+        json.dumps(make_swagger("/other", {"/pets/{id}": {"get": "getOther"}}))
+    )
+    (tmp_path / "invalid.json").write_text("[")
+    (tmp_path / "notes.txt").write_text("not a swagger")
+    return tmp_path
+
+
+def test_index_swagger():
+    swagger = make_swagger("/api/", {"/pets/{petId}": {"get": "getPet", "delete": "deletePet"}})
+    swagger["definitions"] = {"Pet": {"type": "object"}}
+
+    entry = index_swagger(swagger)
+
+    assert entry["operationIds"] == {
+        "getPet": ["paths", "/pets/{petId}", "get", "operationId"],
+        "deletePet": ["paths", "/pets/{petId}", "delete", "operationId"],
+    }
+    assert entry["operations"] == {
+        "GET /api/pets/{}": ["paths", "/pets/{petId}", "get"],
+        "DELETE /api/pets/{}": ["paths", "/pets/{petId}", "delete"],
+    }
+    assert list(entry["definitions"]) == ["Pet"]
+
+
+def test_fleet_check(fleet_dir):
+    index, events = fleet_check(fleet_dir)
+
+    assert sorted(index.entries) == ["a.json", "b.json", "c.json", "invalid.json"]
+    assert sorted(index.parsed) == ["a.json", "b.json", "c.json", "invalid.json"]
+    assert events == [
+        DuplicateOperationIdFleetError(
+            path=("b.json", "paths", "/cars", "get", "operationId"),
+            reason="the operationId 'getPet' is already used in 'a.json'",
+            operationId="getPet",
+        ),
+        DuplicateOperationFleetError(
+            path=("b.json", "paths", "/pets/{id}", "get"),
+            reason="the operation 'GET /api/pets/{}' is already defined in 'a.json'",
+        ),
+        ConflictingDefinitionFleetWarning(
+            path=("b.json", "definitions", "Pet"),
+            reason="the definition 'Pet' is defined differently in 'a.json'",
+        ),
+    ]
+    assert (fleet_dir / INDEX_FILENAME).exists()
+
+
+def test_fleet_check_incremental(fleet_dir):
+    fleet_check(fleet_dir)
+
+    # nothing changed, nothing parsed
+    index, events = fleet_check(fleet_dir)
+    assert index.parsed == []
+    assert len(events) == 3
+
+    # one swagger changed, only this one is parsed
+    (fleet_dir / "b.json").write_text(
+        json.dumps(make_swagger("/api", {"/cars": {"get": "getCar"}}, {"Pet": {"type": "object"}}))
+    )
+    os.utime(fleet_dir / "b.json", ns=(1, 1))
+    assert index.refresh()
+    assert index.parsed == ["b.json"]
+    assert index.collisions() == []
+    assert not index.refresh()
+
+    # one swagger removed
+    (fleet_dir / "a.json").unlink()
+    assert index.refresh()
+    assert sorted(index.entries) == ["b.json", "c.json", "invalid.json"]
+    assert "getPet" not in index.operation_ids
+
+    # the index reloaded from its file is the same
+    index_reloaded = FleetIndex(fleet_dir)
+    assert index_reloaded.entries == index.entries
+    assert index_reloaded.operations == index.operations
+    assert index_reloaded.journal_length == 6
+
+
+def test_fleet_index_compact(fleet_dir, tmp_path_factory):
+    index_path = tmp_path_factory.mktemp("index") / "index.jsonl"
+    index = FleetIndex(fleet_dir, index_path=index_path)
+    index.refresh()
+
+    for i in range(120):
+        os.utime(fleet_dir / "c.json", ns=(i, i))
+        index.refresh()
+
+    # the journal has been compacted
+    assert index.journal_length < 110
+    assert len(index_path.read_text().splitlines()) == index.journal_length + 1
+    assert FleetIndex(fleet_dir, index_path=index_path).entries == index.entries
+
+    # an index with another version is ignored
+    index_path.write_text(json.dumps({"version": 0}) + "\n")
+    assert FleetIndex(fleet_dir, index_path=index_path).entries == {}
+
+
+def test_fleet_check_unreadable(fleet_dir, monkeypatch):
+    index = FleetIndex(fleet_dir)
+    index.refresh()
+
+    # an unreadable file does not abort the refresh, its previous entry is kept
+    load_file = oasapi.fleet.load_file
+
+    def load_file_unreadable(path):
+        if os.path.basename(path) == "a.json":
+            raise PermissionError(13, "Permission denied")
+        return load_file(path)
+
+    monkeypatch.setattr(oasapi.fleet, "load_file", load_file_unreadable)
+    for name in ["a.json", "c.json"]:
+        os.utime(fleet_dir / name, ns=(1, 1))
+    assert index.refresh()
+    assert index.parsed == ["c.json"]
+    assert list(index.failures) == ["a.json"]
+    assert "Permission denied" in index.failures["a.json"]
+    assert "getPet" in index.operation_ids
+
+    # the file is read again at the next refresh
+    monkeypatch.setattr(oasapi.fleet, "load_file", load_file)
+    assert index.refresh()
+    assert index.parsed == ["a.json"]
+    assert index.failures == {}
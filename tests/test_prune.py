@@ -15,6 +15,7 @@ from oasapi.prune import (
     prune_unused_tags,
     prune,
     prune_empty_paths,
+    collect_usage,
 )
 
 
@@ -315,7 +316,13 @@ definitions:
   one: {}
 """
     swagger = yaml.safe_load(swagger_str)
+    swagger_original = copy.deepcopy(swagger)
+    swagger_dry_run, actions_dry_run = prune(swagger, dry_run=True)
+    assert swagger_dry_run is swagger
+    assert swagger == swagger_original
+
     swagger_pruned, actions = prune(swagger)
+    assert actions == actions_dry_run
 
     assert swagger != swagger_pruned
     assert swagger_pruned == {
@@ -365,3 +372,75 @@ definitions:
             type="Oauth2 scope removed",
         ),
     ]
+
+
+def test_collect_usage():
+    swagger_str = """
+swagger: '2.0'
+paths:
+  /foo:
+    parameters:
+    - $ref: "#/parameters/p1"
+    get:
+      tags: [one, two]
+      security:
+      - oauth: [read]
+      responses:
+        200:
+          $ref: "#/responses/r1"
+  /empty:
+    parameters:
+    - $ref: "#/parameters/p2"
+  /other: {}
+security:
+- oauth: [write]
+- basic: []
+parameters:
+  p1: {in: query, name: p1, type: string}
+  p2: {in: query, name: p2, type: string}
+responses:
+  r1:
+    description: OK
+    schema:
+      $ref: "#/definitions/d1"
+definitions:
+  d1:
+    properties:
+      external: {$ref: "other.yaml#/definitions/d2"}
+"""
+    usage = collect_usage(yaml.safe_load(swagger_str))
+
+    assert usage.empty_endpoints == ["/empty", "/other"]
+    assert usage.endpoint_references == {
+        "/foo": {("parameters", "p1"), ("responses", "r1")},
+        "/empty": {("parameters", "p2")},
+        "/other": set(),
+    }
+    assert usage.component_references == {
+        ("parameters", "p1"): set(),
+        ("parameters", "p2"): set(),
+        ("responses", "r1"): {("definitions", "d1")},
+        ("definitions", "d1"): set(),
+    }
+    assert usage.tags_used == {"one", "two"}
+    assert usage.secdefs_used == {"oauth": {"read", "write"}, "basic": set()}
+
+
+def test_prune_shared_scopes():
+    # scopes shared by two security definitions (as in an interned swagger)
+    scopes = {"read": "read", "write": "write"}
+    swagger = {
+        "paths": {"/foo": {"get": {"security": [{"oauth1": ["read"]}, {"oauth2": ["write"]}]}}},
+        "securityDefinitions": {
+            "oauth1": {"type": "oauth2", "scopes": scopes},
+            "oauth2": {"type": "oauth2", "scopes": scopes},
+        },
+    }
+
+    swagger_pruned, actions = prune(swagger)
+
+    assert swagger_pruned["securityDefinitions"] == {
+        "oauth1": {"type": "oauth2", "scopes": {"read": "read"}},
+        "oauth2": {"type": "oauth2", "scopes": {"write": "write"}},
+    }
+    assert scopes == {"read": "read", "write": "write"}
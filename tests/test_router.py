@@ -0,0 +1,89 @@
+import pytest
+import yaml
+from test_common import SWAGGER_SAMPLES_PATH
+
+from oasapi.router import compile
+
+swagger_str = """
+swagger: '2.0'
+basePath: /v1
+paths:
+  /users:
+    get: {operationId: listUsers}
+    post: {operationId: createUser}
+  /users/me:
+    get: {operationId: getMe}
+  /users/{userId}:
+    get: {operationId: getUser}
+    delete: {operationId: deleteUser}
+  /users/{id}/orders/{orderId}:
+    get: {operationId: getOrder}
+  /users/me/orders:
+    get: {operationId: getMyOrders}
+  /files/{name}.{extension}:
+    get: {operationId: getFile}
+  /files/{path}:
+    get: {operationId: getPath}
+  /:
+    get: {operationId: root}
+  x-extension: {}
+"""
+
+
+@pytest.fixture
+def router():
+    return compile(yaml.safe_load(swagger_str))
+
+
+@pytest.mark.parametrize(
+    "verb,path,operation_id,path_parameters",
+    [
+        ("GET", "/v1/users", "listUsers", {}),
+        ("post", "/v1/users/", "createUser", {}),
+        # the literal segments are preferred
+        ("GET", "/v1/users/me", "getMe", {}),
+        ("GET", "/v1/users/42", "getUser", {"userId": "42"}),
+        # no DELETE on /users/me, falls back to /users/{userId}
+        ("DELETE", "/v1/users/me", "deleteUser", {"userId": "me"}),
+        ("GET", "/v1/users/me/orders", "getMyOrders", {}),
+        # backtrack from the literal segment 'me'
+        ("GET", "/v1/users/me/orders/7?expand=1", "getOrder", {"id": "me", "orderId": "7"}),
+        ("GET", "/v1/files/report.json", "getFile", {"name": "report", "extension": "json"}),
+        ("GET", "/v1/files/README", "getPath", {"path": "README"}),
+        ("GET", "/v1/files/a%20b.txt", "getFile", {"name": "a b", "extension": "txt"}),
+        ("GET", "/v1", "root", {}),
+        ("GET", "/v1/", "root", {}),
+    ],
+)
+def test_router_match(router, verb, path, operation_id, path_parameters):
+    match = router.match(verb, path)
+    assert match.operation["operationId"] == operation_id
+    assert match.path_parameters == path_parameters
+    assert router.swagger["paths"][match.endpoint][match.verb] is match.operation
+    assert match.path == ("paths", match.endpoint, match.verb)
+
+
+@pytest.mark.parametrize(
+    "verb,path",
+    [
+        ("GET", "/users"),  # without the basePath
+        ("PUT", "/v1/users"),
+        ("GET", "/v1/users/42/orders"),
+        ("GET", "/v1/unknown"),
+        ("GET", "/v1/users/42/orders/7/items"),
+    ],
+)
+def test_router_no_match(router, verb, path):
+    assert router.match(verb, path) is None
+
+
+def test_router_petstore():
+    swagger = yaml.safe_load((SWAGGER_SAMPLES_PATH / "swagger_petstore.yaml").read_text())
+    router = compile(swagger)
+
+    match = router.match("GET", "/v2/pet/findByStatus?status=sold")
+    assert match.operation["operationId"] == "findPetsByStatus"
+    match = router.match("POST", "/v2/pet/12/uploadImage")
+    assert match.operation["operationId"] == "uploadFile"
+    assert match.path_parameters == {"petId": "12"}
+    assert compile({}).match("GET", "/") is None
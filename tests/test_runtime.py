@@ -0,0 +1,253 @@
+import pytest
+import yaml
+
+from oasapi.events import RequestParameterValidationError
+from oasapi.runtime import compile_request_validator
+
+swagger_str = """
+swagger: '2.0'
+parameters:
+  Limit:
+    name: limit
+    in: query
+    type: integer
+    format: int32
+paths:
+  /pets:
+    parameters:
+      - name: X-Request-Id
+        in: header
+        type: string
+        required: true
+    get:
+      parameters:
+        - $ref: '#/parameters/Limit'
+        - name: status
+          in: query
+          type: array
+          items: {type: string, enum: [available, sold]}
+          collectionFormat: csv
+        - name: tags
+          in: query
+          type: array
+          items: {type: string}
+          collectionFormat: multi
+        - name: since
+          in: query
+          type: string
+          format: date
+        - name: cute
+          in: query
+          type: boolean
+        - name: ids
+          in: query
+          type: array
+          items: {type: integer}
+          enum: [[1, 2], [3]]
+        - name: weight
+          in: query
+          type: number
+        - name: n
+          in: query
+          type: integer
+          minimum: 1
+          maximum: 3
+        - name: ratio
+          in: query
+          type: number
+          minimum: 0
+          exclusiveMinimum: true
+          maximum: 1
+          exclusiveMaximum: true
+        - name: code
+          in: query
+          type: string
+          minLength: 2
+          maxLength: 3
+          pattern: '^[A-Z]+$'
+        - name: colors
+          in: query
+          type: array
+          items: {type: string, maxLength: 5}
+          minItems: 1
+          maxItems: 2
+          uniqueItems: true
+    post:
+      parameters:
+        - name: pet
+          in: body
+          required: true
+          schema: {$ref: '#/definitions/Pet'}
+  /pets/{petId}:
+    get:
+      parameters:
+        - name: petId
+          in: path
+          required: true
+          type: number
+definitions:
+  Pet:
+    type: object
+    required: [name]
+    properties:
+      name: {type: string}
+      age: {type: integer}
+"""
+
+
+@pytest.fixture
+def validators():
+    return compile_request_validator(yaml.safe_load(swagger_str))
+
+
+def reasons(events):
+    return [(event.parameter_name, event.location, str(event.reason)) for event in events]
+
+
+def test_compile_request_validator(validators):
+    assert sorted(validators) == [("/pets", "get"), ("/pets", "post"), ("/pets/{petId}", "get")]
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {},
+        {"limit": "10", "status": "available,sold", "since": "2020-02-29", "cute": "true"},
+        {"limit": 10, "status": ["sold"], "tags": ["a", "b"], "cute": False},
+        {"limit": ["10"], "tags": "a"},
+        # the items are converted before being compared to the enum
+        {"ids": "1,2", "weight": "1.5"},
+        {"ids": [3], "weight": 2},
+        # the constraints of the parameters
+        {"n": "3", "ratio": "0.5", "code": "AB", "colors": "red,blue"},
+        {"n": 1, "ratio": 0.99, "code": ["ABC"], "colors": ["red"]},
+        # a csv array parsed by parse_qs
+        {"ids": ["1,2"], "colors": ["red,blue"]},
+    ],
+)
+def test_request_valid(validators, query):
+    assert validators["/pets", "get"](query=query, headers={"X-Request-Id": "1"}) == []
+
+
+@pytest.mark.parametrize(
+    "query,errors",
+    [
+        (
+            {"limit": "ten"},
+            [("limit", "query", "The value 'ten' is not of the expected type 'integer'")],
+        ),
+        (
+            {"status": "available,lost"},
+            [
+                (
+                    "status",
+                    "query",
+                    "The value 'lost' is not one of the enum values ['available', 'sold']",
+                )
+            ],
+        ),
+        (
+            {"since": "2020-13-01"},
+            [
+                (
+                    "since",
+                    "query",
+                    "The value '2020-13-01' does not conform to the string format 'date'",
+                )
+            ],
+        ),
+        (
+            {"cute": "yes", "limit": 1.5},
+            [
+                ("limit", "query", "The value 1.5 is not of the expected type 'integer'"),
+                ("cute", "query", "The value 'yes' is not of the expected type 'boolean'"),
+            ],
+        ),
+        (
+            {"ids": "1,3"},
+            [("ids", "query", "The value [1, 3] is not one of the enum values [[1, 2], [3]]")],
+        ),
+        (
+            # a bool is not a number
+            {"limit": True, "weight": False},
+            [
+                ("limit", "query", "The value True is not of the expected type 'integer'"),
+                ("weight", "query", "The value False is not of the expected type 'number'"),
+            ],
+        ),
+        (
+            {"n": "99", "ratio": "1", "code": "A", "colors": "red,red"},
+            [
+                ("n", "query", "The value 99 is greater than the maximum 3"),
+                ("ratio", "query", "The value 1.0 is not less than the exclusive maximum 1"),
+                ("code", "query", "The value 'A' is shorter than the minLength 2"),
+                ("colors", "query", "The value ['red', 'red'] has duplicate items"),
+            ],
+        ),
+        (
+            {"n": 0, "ratio": 0, "code": "ab", "colors": "red,blue,green"},
+            [
+                ("n", "query", "The value 0 is less than the minimum 1"),
+                ("ratio", "query", "The value 0 is not greater than the exclusive minimum 0"),
+                ("code", "query", "The value 'ab' does not match the pattern '^[A-Z]+$'"),
+                (
+                    "colors",
+                    "query",
+                    "The value ['red', 'blue', 'green'] has more items than the maxItems 2",
+                ),
+            ],
+        ),
+        (
+            {"code": "ABCD", "colors": ["", "purple"]},
+            [
+                ("code", "query", "The value 'ABCD' is longer than the maxLength 3"),
+                ("colors", "query", "The value 'purple' is longer than the maxLength 5"),
+            ],
+        ),
+        (
+            {"colors": []},
+            [("colors", "query", "The value [] has less items than the minItems 1")],
+        ),
+        (
+            {"ids": ["1,3"]},
+            [("ids", "query", "The value [1, 3] is not one of the enum values [[1, 2], [3]]")],
+        ),
+    ],
+)
+def test_request_invalid(validators, query, errors):
+    events = validators["/pets", "get"](query=query, headers={"X-Request-Id": "1"})
+    assert all(isinstance(event, RequestParameterValidationError) for event in events)
+    assert reasons(events) == errors
+
+
+def test_request_paths(validators):
+    events = validators["/pets", "get"](query={"limit": "ten"})
+    assert reasons(events) == [
+        ("X-Request-Id", "header", "The required header parameter 'X-Request-Id' is missing"),
+        ("limit", "query", "The value 'ten' is not of the expected type 'integer'"),
+    ]
+    # the $ref parameters are reported where they are defined
+    assert [event.path for event in events] == [
+        ("paths", "/pets", "parameters", "[0]"),
+        ("parameters", "Limit"),
+    ]
+
+    validate = validators["/pets/{petId}", "get"]
+    assert validate(path={"petId": "4.2"}) == []
+    assert reasons(validate(path={"petId": "x"})) == [
+        ("petId", "path", "The value 'x' is not of the expected type 'number'")
+    ]
+
+
+def test_request_body(validators):
+    validate = validators["/pets", "post"]
+    headers = {"X-Request-Id": "1"}
+    assert validate(headers=headers, body={"name": "rex", "age": 3}) == []
+    assert reasons(validate(headers=headers)) == [("pet", "body", "The required body is missing")]
+    assert reasons(validate(headers=headers, body={"name": "rex", "age": "3"})) == [
+        (
+            "pet",
+            "body",
+            "The body does not conform to its schema at 'age': '3' is not of type 'integer'",
+        )
+    ]
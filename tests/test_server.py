@@ -0,0 +1,187 @@
+import gzip
+import json
+import os
+import threading
+from urllib.error import HTTPError
+from urllib.request import urlopen, Request
+
+import pytest
+import yaml
+from test_common import SWAGGER_SAMPLES_PATH
+
+from oasapi import filter, prune
+from oasapi.filter import FilterCondition
+from oasapi.common import Interner
+from oasapi.server import make_server, SwaggerStore, render
+
+
+@pytest.fixture
+def specs_dir(tmp_path):
+    (tmp_path / "petstore.json").write_text(
+        (SWAGGER_SAMPLES_PATH / "swagger_petstore.json").read_text()
+    )
+    (tmp_path / "petstore-yaml.yaml").write_text(
+        (SWAGGER_SAMPLES_PATH / "swagger_petstore.yaml").read_text()
+    )
+    (tmp_path / "invalid.json").write_text("{")
+    (tmp_path / "config.json").write_text('{"not": "a swagger"}')
+    (tmp_path / "notes.txt").write_text("not a swagger")
+    return tmp_path
+
+
+@pytest.fixture
+def server(specs_dir):
+    server = make_server(specs_dir, port=0, reload_interval=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, url, headers=None):
+    host, port = server.server_address
+    try:
+        response = urlopen(Request(f"http://{host}:{port}{url}", headers=headers or {}))
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+    return response.status, response.headers, response.read()
+
+
+def test_store(specs_dir):
+    store = SwaggerStore(specs_dir)
+    assert sorted(store.swaggers) == ["petstore", "petstore-yaml"]
+    assert store.get("petstore").swagger == json.loads(
+        (specs_dir / "petstore.json").read_text()
+    )
+    assert store.get("unknown") is None
+
+
+def test_store_interned(specs_dir):
+    store = SwaggerStore(specs_dir, interner=Interner())
+    swagger = store.get("petstore").swagger
+    swagger_yaml = store.get("petstore-yaml").swagger
+    assert swagger == json.loads((specs_dir / "petstore.json").read_text())
+
+    # leaf objects are shared across the swaggers
+    leaf = swagger["definitions"]["Pet"]["properties"]["name"]
+    assert leaf == {"type": "string", "example": "doggie"}
+    assert leaf is swagger_yaml["definitions"]["Pet"]["properties"]["name"]
+
+    # shared objects are rendered in full
+    assert b"&id" not in render(swagger, "yaml").body
+    assert yaml.safe_load(render(swagger, "yaml").body) == swagger
+
+    # the leaf objects of a removed swagger are released
+    (specs_dir / "other.json").write_text('{"swagger": "2.0", "paths": {}, "x": {"only": "here"}}')
+    store.refresh()
+    assert {"only": "here"} in store.interner.leaves.values()
+    (specs_dir / "other.json").unlink()
+    store.refresh()
+    assert {"only": "here"} not in store.interner.leaves.values()
+    assert leaf in store.interner.leaves.values()
+
+
+def test_list_specs(server):
+    status, headers, body = get(server, "/specs")
+    assert status == 200
+    assert json.loads(body) == ["petstore", "petstore-yaml"]
+
+
+def test_get_spec_filtered_pruned(server, specs_dir):
+    swagger = json.loads((specs_dir / "petstore.json").read_text())
+
+    status, headers, body = get(server, "/specs/petstore?tag=store&scope=read:pets&prune=1")
+    assert status == 200
+    assert headers["Content-Type"] == "application/json"
+    conditions = [FilterCondition(tags=["store"], security_scopes=["read:pets"])]
+    expected, _ = prune(filter(swagger, conditions=conditions)[0])
+    assert json.loads(body) == expected
+
+    status, headers, body = get(server, "/specs/petstore-yaml?format=yaml")
+    assert status == 200
+    assert headers["Content-Type"] == "application/x-yaml"
+    assert yaml.safe_load(body) == yaml.safe_load((specs_dir / "petstore-yaml.yaml").read_text())
+
+
+def test_get_spec_etag_gzip(server):
+    status, headers, body = get(server, "/specs/petstore?tag=pet")
+    etag = headers["ETag"]
+
+    assert headers["Vary"] == "Accept-Encoding"
+
+    status, headers, gzip_body = get(server, "/specs/petstore?tag=pet", {"Accept-Encoding": "gzip"})
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert headers["Vary"] == "Accept-Encoding"
+    # each encoding has its own ETag
+    gzip_etag = headers["ETag"]
+    assert gzip_etag != etag
+    assert gzip.decompress(gzip_body) == body
+
+    status, headers, body = get(server, "/specs/petstore?tag=pet", {"If-None-Match": etag})
+    assert status == 304
+    assert body == b""
+    assert headers["Vary"] == "Accept-Encoding"
+
+    headers = {"If-None-Match": etag, "Accept-Encoding": "gzip"}
+    assert get(server, "/specs/petstore?tag=pet", headers)[0] == 200
+    headers = {"If-None-Match": gzip_etag, "Accept-Encoding": "gzip"}
+    assert get(server, "/specs/petstore?tag=pet", headers)[0] == 304
+
+    assert server.rendered_cache.stats.hits == 4
+
+
+def test_get_spec_errors(server):
+    assert get(server, "/specs/unknown")[0] == 404
+    assert get(server, "/other")[0] == 404
+    assert get(server, "/specs/petstore?format=xml")[0] == 400
+    status, _, body = get(server, "/specs/petstore?path=(")
+    assert status == 400
+    assert b"is not a valid regexp" in body
+    # a json file which is not a swagger is not served
+    assert get(server, "/specs/config")[0] == 404
+
+
+def test_concurrent_rendering(server):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(get(server, "/specs/petstore?tag=store")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {status for status, _, _ in results} == {200}
+    assert len({body for _, _, body in results}) == 1
+    # the view is rendered once
+    assert len(server.rendered_cache) == 1
+    assert server.filter_cache.stats.misses == 1
+    assert server._rendering == {}
+
+
+def test_reload_on_change(server, specs_dir):
+    swagger = dict(swagger="2.0", info=dict(title="my API", version="v1.0"), paths={})
+    (specs_dir / "new.json").write_text(json.dumps(swagger))
+    assert json.loads(get(server, "/specs/new")[2]) == swagger
+
+    swagger["info"]["title"] = "my new API"
+    (specs_dir / "new.json").write_text(json.dumps(swagger))
+    stat = (specs_dir / "new.json").stat()
+    os.utime(specs_dir / "new.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert json.loads(get(server, "/specs/new")[2]) == swagger
+
+    (specs_dir / "new.json").unlink()
+    assert get(server, "/specs/new")[0] == 404
+
+
+def test_list_specs_reload(server, specs_dir):
+    # the new and removed files are listed without requesting them first
+    swagger = dict(swagger="2.0", info=dict(title="my API", version="v1.0"), paths={})
+    (specs_dir / "new.json").write_text(json.dumps(swagger))
+    assert json.loads(get(server, "/specs")[2]) == ["new", "petstore", "petstore-yaml"]
+
+    (specs_dir / "petstore.json").unlink()
+    assert json.loads(get(server, "/specs")[2]) == ["new", "petstore-yaml"]
@@ -0,0 +1,39 @@
+import io
+
+import pytest
+
+from oasapi.streaming import JsonReader
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+def test_json_reader(chunk_size):
+    content = '{"a": 12345, "b" : {"c": [1, 2.5e3, "x"], "d": {}},\n "e": "\\u00e9t\\u00e9", "f": 123}'
+    reader = JsonReader(io.StringIO(content), chunk_size=chunk_size)
+
+    result = []
+    for key, key_text in reader.items():
+        if key == "b":
+            for item, _ in reader.items():
+                result.append((key, item, reader.read()))
+        else:
+            result.append((key, key_text, reader.read()))
+
+    assert result == [
+        ("a", '"a"', (12345, "12345")),
+        ("b", "c", ([1, 2500.0, "x"], '[1, 2.5e3, "x"]')),
+        ("b", "d", ({}, "{}")),
+        ("e", '"e"', ("été", '"\\u00e9t\\u00e9"')),
+        ("f", '"f"', (123, "123")),
+    ]
+    assert reader.peek() == ""
+
+
+def test_json_reader_errors():
+    reader = JsonReader(io.StringIO('["a"]'))
+    with pytest.raises(ValueError, match="Expecting '{' in the JSON document, found '\\['"):
+        list(reader.items())
+
+    reader = JsonReader(io.StringIO('{"a": [1, }'), chunk_size=2)
+    with pytest.raises(ValueError):
+        for _ in reader.items():
+            reader.read()
@@ -9,6 +9,8 @@ from oasapi.events import (
     OAuth2ScopeNotFoundInSecurityDefinitionValidationError,
     ReferenceInvalidSection,
     ReferenceInvalidSyntax,
+    Reason,
+    EventSet,
 )
 from oasapi.validation import (
     validate,
@@ -603,3 +605,58 @@ securityDefinitions:
             type="Security definition not found",
         ),
     }
+
+
+def test_event_lazy_reason():
+    enum = ["a", "b", "a"]
+    reason = Reason("The enum values {} contains duplicate values", enum)
+    event = ParameterDefinitionValidationError(
+        path=("parameters", "p", "enum"), reason=reason, parameter_name="p"
+    )
+    event_str = ParameterDefinitionValidationError(
+        path=("parameters", "p", "enum"),
+        reason="The enum values ['a', 'b', 'a'] contains duplicate values",
+        parameter_name="p",
+    )
+
+    assert str(reason) == "The enum values ['a', 'b', 'a'] contains duplicate values"
+    assert f"-> {reason}" == "-> The enum values ['a', 'b', 'a'] contains duplicate values"
+    assert event == event_str and hash(event) == hash(event_str)
+    assert str(event) == str(event_str)
+    assert event == ParameterDefinitionValidationError(
+        path=("parameters", "p", "enum"),
+        reason=Reason("The enum values {} contains duplicate values", enum),
+        parameter_name="p",
+    )
+    assert event != ParameterDefinitionValidationError(
+        path=("parameters", "p", "enum"), reason="another reason", parameter_name="p"
+    )
+    assert len({event, event_str}) == 1
+
+    # the reason does not change with the swagger
+    enum.append("c")
+    assert str(reason) == "The enum values ['a', 'b', 'a'] contains duplicate values"
+    assert event == event_str
+
+    # the comparison is transitive (on the formatted reasons)
+    assert Reason("{} b", "a") == "a b" == Reason("a {}", "b") == Reason("a b")
+    assert Reason("{} b", "a") != Reason("{} b", "c")
+
+    # events are slotted
+    assert not hasattr(event, "__dict__")
+
+
+def test_event_set():
+    events = [
+        ParameterDefinitionValidationError(path=("parameters", name), reason="r", parameter_name=name)
+        for name in ["b", "c", "a"]
+    ]
+    event_set = EventSet(events + events[:1])
+
+    # iterated in the order of the addition of the events, without duplicates
+    assert list(event_set) == events
+    assert event_set == set(events) and set(events) == event_set
+    assert list(event_set | EventSet(events[::-1])) == events
+    event_set.discard(events[0])
+    event_set.add(events[0])
+    assert list(event_set) == events[1:] + events[:1]